@@ -0,0 +1,71 @@
+"""
+Access control for Smallie's admin APIs
+
+The admin dashboard signs in at POST /api/admin/session with the password,
+which the server compares with ADMIN_PASSWORD in constant time. That
+endpoint is rate limited per client IP and answers with a signed token
+that expires after ADMIN_SESSION_TTL seconds; the dashboard sends the token
+(never the password) as a bearer token to the admin endpoints. Tokens are
+signed with the app's secret_key together with ADMIN_PASSWORD, so they
+can't be forged without the password and changing the password revokes
+every token issued. Until ADMIN_PASSWORD is set the admin APIs answer 503,
+so a deployment that forgot it stays closed.
+"""
+
+import os
+import hmac
+import logging
+import functools
+
+from flask import current_app, request, jsonify
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "")
+if not ADMIN_PASSWORD:
+    logging.warning("ADMIN_PASSWORD is not set; admin APIs are disabled")
+
+# Seconds an admin session token stays valid
+SESSION_TTL = int(os.environ.get("ADMIN_SESSION_TTL", "3600"))
+
+_TOKEN_SALT = "smallie-admin-session"
+
+
+def _serializer():
+    return URLSafeTimedSerializer(f"{current_app.secret_key or ''}:{ADMIN_PASSWORD}", salt=_TOKEN_SALT)
+
+
+def check_password(password):
+    """True if `password` is the admin password"""
+    if not ADMIN_PASSWORD or not isinstance(password, str):
+        return False
+    return hmac.compare_digest(password.encode("utf-8"), ADMIN_PASSWORD.encode("utf-8"))
+
+
+def issue_token():
+    """A signed admin session token, valid for SESSION_TTL seconds"""
+    return _serializer().dumps({"admin": True})
+
+
+def is_admin():
+    """True if the request carries an unexpired admin session token as a bearer token"""
+    header = request.headers.get("Authorization", "")
+    if not ADMIN_PASSWORD or not header.startswith("Bearer "):
+        return False
+    try:
+        session = _serializer().loads(header[len("Bearer "):], max_age=SESSION_TTL)
+    except BadSignature:
+        # Also covers SignatureExpired
+        return False
+    return isinstance(session, dict) and session.get("admin") is True
+
+
+def admin_required(view):
+    """Decorate a Flask view so it answers 401 unless the caller is an admin (503 with no password set)"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_PASSWORD:
+            return jsonify({"status": "error", "message": "Admin access is disabled until ADMIN_PASSWORD is set"}), 503
+        if not is_admin():
+            return jsonify({"status": "error", "message": "Admin sign-in required"}), 401
+        return view(*args, **kwargs)
+    return wrapper
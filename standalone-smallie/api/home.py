@@ -8,6 +8,9 @@ and our Flask application's home page.
 import os
 import sys
 import json
+import base64
+import html
+import threading
 import traceback
 from http.server import BaseHTTPRequestHandler
 
@@ -25,9 +28,27 @@ except Exception as e:
     traceback.print_exc()
     HAS_FLASK_APP = False
 
+import repositories
+import competition_clock
+from demo_data import DEFAULT_CONTESTANTS
+from firebase_init import get_db
+from contestants_cache import contestants_cache
+from prerendered import PrerenderedPage
+from static_assets import asset_url
+
 # Helper function to get the HTML content for the homepage
-def get_home_html():
-    """Return the HTML content for the homepage"""
+def get_home_html(state=None, contestants=None):
+    """Return the HTML content for the homepage for a clock state and contestants list"""
+    if state is None or contestants is None:
+        state, contestants = load_home_data()
+    task = state["task"]
+    task_title = html.escape(str(task.get("title", "")))
+    task_description = html.escape(str(task.get("description", "")))
+    active = [c for c in contestants if not c.get("eliminated")]
+    contestant_items = "\n".join(
+        f'                <li>{html.escape(str(c.get("name", "")))}{" (eliminated)" if c.get("eliminated") else ""}</li>'
+        for c in contestants
+    )
     
     # Get Firebase variables for the client-side
     firebase_api_key = os.environ.get('FIREBASE_API_KEY', '')
@@ -129,13 +150,16 @@ def get_home_html():
         <div class="section">
             <h2>Daily Challenge</h2>
             <p>Each day from April 15-21, 2025, contestants complete a new Nigerian-themed challenge.</p>
-            <p>Today's challenge: <strong>Nollywood Skit Showdown</strong></p>
-            <p>2-minute Nollywood skit (e.g., Cheating Husband)</p>
+            <p>Day {state["day"]} challenge: <strong>{task_title}</strong></p>
+            <p>{task_description}</p>
         </div>
         
         <div class="section">
             <h2>Contestants</h2>
-            <p>10 talented Nigerian content creators competing for the grand prize</p>
+            <p>{len(active)} of {len(contestants)} talented Nigerian content creators still competing for the grand prize</p>
+            <ul>
+{contestant_items}
+            </ul>
         </div>
         
         <div class="section">
@@ -170,19 +194,84 @@ def get_home_html():
     <script src="https://www.gstatic.com/firebasejs/9.19.1/firebase-app-compat.js"></script>
     <script src="https://www.gstatic.com/firebasejs/9.19.1/firebase-auth-compat.js"></script>
     <script src="https://www.gstatic.com/firebasejs/9.19.1/firebase-firestore-compat.js"></script>
-    <script src="/static/js/firebase-client.js"></script>
+    <script src="{asset_url('js/firebase-client.js')}"></script>
 </body>
 </html>"""
 
+def load_home_data():
+    """Return (clock state, contestants) for the homepage"""
+    db = get_db()
+    state = competition_clock.get_clock(db).state()
+    if db is None:
+        contestants = repositories.for_db(None).contestants.list(order_by="id")
+    else:
+        contestants = contestants_cache.get(db)
+    return state, contestants or DEFAULT_CONTESTANTS
+
+
+class HomePage:
+    """
+    The homepage rendered once per data version and served from memory.
+
+    The version is the competition day plus what the page shows of each
+    contestant (name and elimination status), so vote traffic doesn't
+    trigger re-renders; a new day or an elimination does.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._page = None
+        self.renders = 0
+
+    def get(self):
+        state, contestants = load_home_data()
+        version = (
+            state["day"],
+            state["task"].get("title"),
+            tuple((str(c.get("id")), c.get("name"), bool(c.get("eliminated"))) for c in contestants),
+        )
+        page = self._page
+        if version == self._version and page is not None:
+            return page
+
+        with self._lock:
+            if version != self._version or self._page is None:
+                self._page = PrerenderedPage(get_home_html(state, contestants))
+                self._version = version
+                self.renders += 1
+            return self._page
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._page = None
+
+
+home_page = HomePage()
+
+# Log environment variables once per cold start (without sensitive data)
+print(f"Firebase Project ID: {os.environ.get('FIREBASE_PROJECT_ID', 'Not Set')}")
+print(f"Firebase App ID available: {'Yes' if os.environ.get('FIREBASE_APP_ID') else 'No'}")
+print(f"Firebase API Key available: {'Yes' if os.environ.get('FIREBASE_API_KEY') else 'No'}")
+
 # For HTTP server handler implementation
 class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
+        status, headers, body = home_page.get().respond(
+            self.headers.get('If-None-Match'),
+            self.headers.get('Accept-Encoding'),
+            head=self.command == 'HEAD',
+        )
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
         self.end_headers()
-        
-        # Return static HTML for the homepage
-        self.wfile.write(get_home_html().encode())
+        self.wfile.write(body)
+
+    do_HEAD = do_GET
 
 def handler(event, context):
     """
@@ -191,21 +280,22 @@ def handler(event, context):
     This simulates what happens in the app.py index() function,
     but adapted for a serverless context.
     """
-    # Log environment variables (without sensitive data)
-    print(f"Firebase Project ID: {os.environ.get('FIREBASE_PROJECT_ID', 'Not Set')}")
-    print(f"Firebase App ID available: {'Yes' if os.environ.get('FIREBASE_APP_ID') else 'No'}")
-    print(f"Firebase API Key available: {'Yes' if os.environ.get('FIREBASE_API_KEY') else 'No'}")
-    
     try:
-        # Use our HTML generator function
-        html_content = get_home_html()
-        
+        # Serve the prerendered page (304 for repeat visitors, precompressed bytes otherwise)
+        headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+        status, response_headers, body = home_page.get().respond(
+            headers.get('if-none-match'),
+            headers.get('accept-encoding'),
+            head=event.get('httpMethod') == 'HEAD',
+        )
+        response_headers = dict(response_headers)
+        encoded = 'Content-Encoding' in response_headers
+
         return {
-            "statusCode": 200,
-            "headers": {
-                "Content-Type": "text/html",
-            },
-            "body": html_content
+            "statusCode": status,
+            "headers": response_headers,
+            "body": base64.b64encode(body).decode('ascii') if encoded else body.decode('utf-8'),
+            "isBase64Encoded": encoded
         }
     except Exception as e:
         # Log and return error info
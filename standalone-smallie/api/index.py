@@ -5,7 +5,6 @@ This file implements a proper serverless handler for Flask applications on Verce
 It includes enhanced error handling and fallbacks for production use.
 """
 
-from http.server import BaseHTTPRequestHandler
 import json
 import os
 import sys
@@ -25,77 +24,27 @@ except Exception as e:
     traceback.print_exc()
     HAS_FLASK_APP = False
 
-class Handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        """Handle GET requests by forwarding to Flask app"""
-        self._handle_request()
+from local_server import WSGIRequestHandler, PooledHTTPServer, WORKERS
 
-    def do_POST(self):
-        """Handle POST requests by forwarding to Flask app"""
-        self._handle_request()
+def fallback_app(environ, start_response):
+    """Minimal WSGI app used when the Flask app failed to import"""
+    body = json.dumps({
+        "status": "ok",
+        "message": "Serverless function running in fallback mode",
+        "path": environ.get("PATH_INFO", "/"),
+        "project_id": os.environ.get("FIREBASE_PROJECT_ID", "Not set"),
+        "warning": "Flask app not available - using simplified response"
+    }).encode()
+    start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+    return [body]
 
-    def _handle_request(self):
-        """Shared request handling logic"""
-        try:
-            # Attempt to use Flask app to handle the request if available
-            if HAS_FLASK_APP:
-                # Simulate WSGI environment
-                environ = {
-                    'REQUEST_METHOD': self.command,
-                    'PATH_INFO': self.path,
-                    'QUERY_STRING': '',
-                    'SERVER_NAME': self.server.server_name,
-                    'SERVER_PORT': str(self.server.server_port),
-                    'wsgi.input': self.rfile,
-                    'wsgi.errors': sys.stderr,
-                    'wsgi.version': (1, 0),
-                    'wsgi.multithread': True,
-                    'wsgi.multiprocess': False,
-                    'wsgi.run_once': False,
-                    'wsgi.url_scheme': 'http',
-                }
-                
-                # Try to dispatch the request to Flask
-                response = flask_app(environ, self._start_response)
-                self.wfile.write(response)
-            else:
-                # Fallback to simple response
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                
-                response = {
-                    "status": "ok",
-                    "message": "Serverless function running in fallback mode",
-                    "path": self.path,
-                    "project_id": os.environ.get("FIREBASE_PROJECT_ID", "Not set"),
-                    "warning": "Flask app not available - using simplified response"
-                }
-                
-                self.wfile.write(json.dumps(response).encode())
-        except Exception as e:
-            # Handle any errors
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            error_response = {
-                "status": "error",
-                "message": str(e),
-                "traceback": traceback.format_exc()
-            }
-            
-            self.wfile.write(json.dumps(error_response).encode())
-    
-    def _start_response(self, status, headers):
-        """WSGI start_response implementation"""
-        status_code = int(status.split(' ')[0])
-        self.send_response(status_code)
-        
-        for header, value in headers:
-            self.send_header(header, value)
-        
-        self.end_headers()
+class Handler(WSGIRequestHandler):
+    """
+    HTTP/1.1 handler that forwards every request to the Flask app with a full
+    WSGI environ and streams the response. Serve it with `python api/index.py`
+    (see local_server.py) for a pooled, keep-alive server.
+    """
+    app = staticmethod(flask_app if HAS_FLASK_APP else fallback_app)
 
 # This is the function Vercel calls
 def handler(event, context):
@@ -296,4 +245,15 @@ def handler(event, context):
 </body>
 </html>
         """
-        }
\ No newline at end of file
+        }
+
+if __name__ == "__main__":
+    server = PooledHTTPServer((os.environ.get("HOST", "0.0.0.0"), int(os.environ.get("PORT", "5000"))),
+                              Handler, workers=WORKERS)
+    print(f"Serving on http://{server.server_address[0]}:{server.server_address[1]} with {WORKERS} worker threads")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
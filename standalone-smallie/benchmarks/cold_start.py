@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Smallie entry points
+
+Each run starts a fresh Python process, imports one entry point and sends it
+a first GET request through the Flask test client, timing both steps. This
+approximates what a serverless cold start pays before the first response.
+
+Usage:
+    python benchmarks/cold_start.py [--runs 5] [--path /] [--output results.json]
+
+Set FIREBASE_CREDENTIALS (or provide temp/firebase-credentials.json) to
+include real Firebase initialization; without it the app runs in demo mode.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry point file -> name of the WSGI app attribute it exposes
+ENTRY_POINTS = {
+    "app.py": "app",
+    "app_vercel.py": "app",
+    "index.py": "flask_app",
+    "api/index.py": "flask_app",
+    "api/home.py": "flask_app",
+}
+
+
+def measure_in_child(entry_point, path):
+    """Import one entry point and time its first request (runs in a fresh process)"""
+    import importlib.util
+    import logging
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    logging.disable(logging.CRITICAL)
+
+    started = time.perf_counter()
+    module_name = "bench_" + entry_point.replace("/", "_").replace(".py", "")
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, entry_point))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    imported = time.perf_counter()
+
+    result = {
+        "entry_point": entry_point,
+        "import_ms": (imported - started) * 1000,
+        "firebase_imported_at_startup": "firebase_admin" in sys.modules,
+    }
+
+    flask_app = getattr(module, ENTRY_POINTS[entry_point], None)
+    if flask_app is not None:
+        response = flask_app.test_client().get(path)
+        result["first_request_ms"] = (time.perf_counter() - imported) * 1000
+        result["status"] = response.status_code
+    return result
+
+
+def run_entry_point(entry_point, runs, path):
+    """Run the child measurement `runs` times and summarise it"""
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", entry_point, "--path", path],
+            capture_output=True, text=True, cwd=ROOT
+        )
+        for line in completed.stdout.splitlines():
+            if line.startswith("RESULT "):
+                samples.append(json.loads(line[len("RESULT "):]))
+                break
+        else:
+            print(f"{entry_point}: run failed\n{completed.stderr[-2000:]}")
+            return None
+
+    summary = {"entry_point": entry_point, "runs": runs, "status": samples[-1].get("status")}
+    for key in ("import_ms", "first_request_ms"):
+        values = [sample[key] for sample in samples if key in sample]
+        if values:
+            summary[key] = {
+                "median": round(statistics.median(values), 1),
+                "min": round(min(values), 1),
+                "max": round(max(values), 1),
+            }
+    summary["firebase_imported_at_startup"] = samples[-1]["firebase_imported_at_startup"]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and first-request time per entry point")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per entry point")
+    parser.add_argument("--path", default="/", help="path for the first request")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print("RESULT " + json.dumps(measure_in_child(args.child, args.path)))
+        return
+
+    results = []
+    print(f"{'entry point':<16}{'import ms':>12}{'first req ms':>14}{'total ms':>11}  firebase@import")
+    for entry_point in ENTRY_POINTS:
+        summary = run_entry_point(entry_point, args.runs, args.path)
+        if summary is None:
+            continue
+        results.append(summary)
+        import_ms = summary["import_ms"]["median"]
+        request_ms = summary.get("first_request_ms", {}).get("median", 0.0)
+        print(f"{entry_point:<16}{import_ms:>12.1f}{request_ms:>14.1f}{import_ms + request_ms:>11.1f}"
+              f"  {'yes' if summary['firebase_imported_at_startup'] else 'no'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"path": args.path, "runs": args.runs, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+In-memory stand-in for the Firestore client, for benchmarks
+
+Implements the subset of google.cloud.firestore the app uses: collections,
+documents, collection groups, simple queries with cursors, batches, merge
+writes with Increment/SERVER_TIMESTAMP transforms and on_snapshot
+listeners. Every
+read and write is counted, and counts are attributed to the label set with
+FakeFirestore.label() on the current thread, so a benchmark can report
+Firestore operations per endpoint. Not a faithful emulator: transactions
+simply hold the store lock from their first read to commit, there are no
+indexes, and listeners fire synchronously on the writing thread.
+"""
+
+import uuid
+import datetime
+import threading
+import contextlib
+from collections import defaultdict
+
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists
+
+# Marks a create() in the (path, data, merge) write tuples
+CREATE = "create"
+
+
+class Snapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+def _apply(old, data, merge):
+    """Apply a set() payload (with field transforms) to an existing document"""
+    new = dict(old or {}) if merge else {}
+    for key, value in data.items():
+        previous = (old or {}).get(key)
+        if isinstance(value, firestore.Increment):
+            new[key] = (previous or 0) + value.value
+        elif value is firestore.SERVER_TIMESTAMP:
+            new[key] = datetime.datetime.now(datetime.timezone.utc)
+        elif isinstance(value, dict) and merge:
+            new[key] = _apply(previous if isinstance(previous, dict) else {}, value, True)
+        else:
+            new[key] = value
+    return new
+
+
+class DocumentReference:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path[-1]
+
+    @property
+    def parent(self):
+        return CollectionReference(self._db, self.path[:-1])
+
+    def collection(self, name):
+        return CollectionReference(self._db, self.path + (name,))
+
+    def get(self, transaction=None):
+        with self._db.lock:
+            self._db.count("reads")
+            return Snapshot(self, self._db.docs.get(self.path))
+
+    def set(self, data, merge=False):
+        self._db.write([(self.path, data, merge)])
+
+    def create(self, data):
+        self._db.write([(self.path, data, CREATE)])
+
+    def update(self, data):
+        self._db.write([(self.path, data, True)])
+
+    def delete(self):
+        self._db.write([(self.path, None, False)])
+
+
+class Query:
+    def __init__(self, db, path, group=False, filters=(), order=(), limit=None, start=None, end=None):
+        self._db = db
+        self.path = path
+        self.group = group
+        self.filters = tuple(filters)
+        self.order = tuple(order)
+        self._limit = limit
+        # Cursors are (values, inclusive)
+        self._start = start
+        self._end = end
+
+    def _copy(self, **changes):
+        options = dict(group=self.group, filters=self.filters, order=self.order,
+                       limit=self._limit, start=self._start, end=self._end)
+        options.update(changes)
+        return Query(self._db, self.path, **options)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self.filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        return self._copy(order=self.order + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_at(self, values):
+        return self._copy(start=(values, True))
+
+    def start_after(self, values):
+        return self._copy(start=(values, False))
+
+    def end_before(self, values):
+        return self._copy(end=(values, False))
+
+    def end_at(self, values):
+        return self._copy(end=(values, True))
+
+    def _position(self, snap, cursor):
+        """-1, 0 or 1 as `snap` sorts before, at or after the cursor values"""
+        fields = [field for field, _ in self.order]
+        if isinstance(cursor, dict):
+            cursor = [cursor.get(field) for field in fields]
+        elif isinstance(cursor, Snapshot):
+            cursor = [_sort_key(cursor, field) for field in fields]
+        elif not isinstance(cursor, (list, tuple)):
+            cursor = [cursor]
+        for (field, direction), value in zip(self.order, cursor):
+            actual = _sort_key(snap, field)
+            if actual == value:
+                continue
+            before = actual < value
+            if direction == "DESCENDING":
+                before = not before
+            return -1 if before else 1
+        return 0
+
+    def matches(self, path):
+        if self.group:
+            return len(path) >= 2 and path[-2] == self.path[-1]
+        return path[:-1] == self.path
+
+    def _run(self):
+        # Must be called with the db lock held
+        results = []
+        for path, data in sorted(self._db.docs.items()):
+            if not self.matches(path):
+                continue
+            if all(_compare(data.get(field), op, value) for field, op, value in self.filters):
+                results.append(Snapshot(DocumentReference(self._db, path), data))
+
+        for field, direction in reversed(self.order):
+            results.sort(key=lambda snap: _sort_key(snap, field), reverse=direction == "DESCENDING")
+
+        if self._start is not None:
+            cursor, inclusive = self._start
+            results = [snap for snap in results if self._position(snap, cursor) >= (0 if inclusive else 1)]
+        if self._end is not None:
+            cursor, inclusive = self._end
+            results = [snap for snap in results if self._position(snap, cursor) <= (0 if inclusive else -1)]
+
+        if self._limit:
+            results = results[:self._limit]
+        return results
+
+    def get(self, transaction=None):
+        with self._db.lock:
+            results = self._run()
+            # Firestore bills at least one read per query
+            self._db.count("reads", max(1, len(results)))
+            return results
+
+    def stream(self, transaction=None):
+        return iter(self.get())
+
+    def on_snapshot(self, callback):
+        return self._db.watch(self, callback)
+
+
+class CollectionReference(Query):
+    def __init__(self, db, path):
+        super().__init__(db, path)
+        self.id = path[-1]
+
+    @property
+    def parent(self):
+        return DocumentReference(self._db, self.path[:-1]) if len(self.path) > 1 else None
+
+    def document(self, document_id=None):
+        return DocumentReference(self._db, self.path + (document_id or uuid.uuid4().hex[:20],))
+
+    def add(self, data):
+        reference = self.document()
+        reference.set(data)
+        return None, reference
+
+    def list_documents(self):
+        with self._db.lock:
+            return [DocumentReference(self._db, path) for path in self._db.docs if path[:-1] == self.path]
+
+
+def _sort_key(snap, field):
+    return snap.id if field == "__name__" else snap.get(field)
+
+
+def _compare(actual, op, expected):
+    if op == "==":
+        return actual == expected
+    if op == "!=":
+        return actual != expected
+    if op == "in":
+        return actual in expected
+    if op == "array_contains":
+        return isinstance(actual, list) and expected in actual
+    if actual is None:
+        return False
+    if op == "<":
+        return actual < expected
+    if op == "<=":
+        return actual <= expected
+    if op == ">":
+        return actual > expected
+    if op == ">=":
+        return actual >= expected
+    raise ValueError(f"Unsupported operator {op}")
+
+
+class WriteBatch:
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append((reference.path, data, merge))
+
+    def create(self, reference, data):
+        self._writes.append((reference.path, data, CREATE))
+
+    def update(self, reference, data):
+        self._writes.append((reference.path, data, True))
+
+    def delete(self, reference):
+        self._writes.append((reference.path, None, False))
+
+    def commit(self):
+        self._db.write(self._writes)
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+
+class Transaction(WriteBatch):
+    """Runs under firestore.transactional by holding the store lock throughout"""
+
+    _read_only = False
+    _max_attempts = 1
+
+    def __init__(self, db):
+        super().__init__(db)
+        self._id = None
+
+    def _clean_up(self):
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self._db.lock.acquire()
+        self._id = uuid.uuid4().bytes
+
+    def _commit(self):
+        try:
+            self._db.write(self._writes)
+        finally:
+            self._finish()
+
+    def _rollback(self):
+        if self._id is not None:
+            self._finish()
+
+    def _finish(self):
+        self._clean_up()
+        self._db.lock.release()
+
+
+class Watch:
+    def __init__(self, db, query, callback):
+        self._db = db
+        self.query = query
+        self.callback = callback
+
+    def unsubscribe(self):
+        with self._db.lock:
+            if self in self._db.watches:
+                self._db.watches.remove(self)
+
+
+class FakeFirestore:
+    """The client: holds documents in a dict keyed by path tuple"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.docs = {}
+        self.watches = []
+        # label -> {"reads": n, "writes": n, "commits": n}
+        self.ops = defaultdict(lambda: {"reads": 0, "writes": 0, "commits": 0})
+        self._local = threading.local()
+
+    def collection(self, name):
+        return CollectionReference(self, (name,))
+
+    def collection_group(self, name):
+        return Query(self, (name,), group=True)
+
+    def document(self, path):
+        return DocumentReference(self, tuple(path.split("/")))
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def transaction(self, **kwargs):
+        return Transaction(self)
+
+    def get_all(self, references):
+        return [reference.get() for reference in references]
+
+    @contextlib.contextmanager
+    def label(self, name):
+        """Attribute the operations made by this thread inside the block to `name`"""
+        previous = getattr(self._local, "label", None)
+        self._local.label = name
+        try:
+            yield
+        finally:
+            self._local.label = previous
+
+    def count(self, kind, amount=1):
+        label = getattr(self._local, "label", None) or "background"
+        with self.lock:
+            self.ops[label][kind] += amount
+
+    def reset_counts(self):
+        with self.lock:
+            self.ops.clear()
+
+    def write(self, writes):
+        """Apply a list of (path, data, merge) atomically, then notify listeners"""
+        with self.lock:
+            for path, _, merge in writes:
+                if merge == CREATE and path in self.docs:
+                    # The whole commit fails, as in Firestore
+                    raise AlreadyExists(f"Document already exists: {'/'.join(path)}")
+            for path, data, merge in writes:
+                if data is None:
+                    self.docs.pop(path, None)
+                else:
+                    self.docs[path] = _apply(self.docs.get(path), data, merge is True)
+            self.count("writes", len(writes))
+            self.count("commits")
+            fired = []
+            for watch in self.watches:
+                changed = sum(1 for path, _, _ in writes if watch.query.matches(path))
+                if changed:
+                    # Listeners are billed one read per changed document
+                    self.ops["listeners"]["reads"] += changed
+                    fired.append((watch, watch.query._run()))
+
+        # Run callbacks outside the lock, like the real client's background thread
+        for watch, docs in fired:
+            watch.callback(docs, [], None)
+
+    def watch(self, query, callback):
+        with self.lock:
+            watch = Watch(self, query, callback)
+            self.watches.append(watch)
+            docs = query._run()
+            self.ops["listeners"]["reads"] += len(docs)
+        callback(docs, [], None)
+        return watch
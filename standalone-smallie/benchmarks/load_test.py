@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for Smallie
+
+Starts the Flask app on the pooled local server (local_server.py) backed by
+an in-memory Firestore stand-in (benchmarks/fake_firestore.py) or by the
+Firestore emulator. It then drives concurrent users through scenarios like
+"view homepage, view leaderboard, cast vote" over keep-alive connections.
+Reports throughput, p50/p95/p99 latency and, with the in-memory backend,
+Firestore reads/writes per request for each endpoint.
+
+Usage:
+    python benchmarks/load_test.py [--users 50] [--duration 10] [--scenario voter]
+                                   [--backend fake|emulator|demo] [--write-behind]
+                                   [--output results.json]
+
+--backend emulator needs FIRESTORE_EMULATOR_HOST (e.g. from
+`firebase emulators:start --only firestore`); operation counts aren't
+available there. --backend demo runs without any Firestore (db is None).
+Compare the JSON files from two commits to spot regressions.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import logging
+import argparse
+import platform
+import threading
+import subprocess
+import http.client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Each scenario is the list of (endpoint name, method, path) one user repeats
+SCENARIOS = {
+    "viewer": [("home", "GET", "/"), ("leaderboard", "GET", "/api/leaderboard")],
+    "voter": [("home", "GET", "/"), ("leaderboard", "GET", "/api/leaderboard"), ("vote", "POST", "/api/votes")],
+    "admin": [("admin", "GET", "/admin"), ("stats", "GET", "/api/stats")],
+    "health": [("health", "GET", "/api/health")],
+}
+
+# Request header carrying the endpoint name, so Firestore ops can be attributed
+ENDPOINT_HEADER = "X-Bench-Endpoint"
+
+# Admin password for the run, sent with every request for the admin endpoints
+ADMIN_PASSWORD = "bench-admin"
+
+# Session token from signing in with ADMIN_PASSWORD, set by run()
+admin_token = ""
+
+
+def make_backend(name):
+    """Return the Firestore client for a backend name (None for demo mode)"""
+    if name == "demo":
+        return None
+    if name == "fake":
+        from fake_firestore import FakeFirestore
+        return FakeFirestore()
+    if name == "emulator":
+        if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+            sys.exit("--backend emulator needs FIRESTORE_EMULATOR_HOST to be set")
+        from google.cloud import firestore as cloud_firestore
+        from google.auth.credentials import AnonymousCredentials
+        return cloud_firestore.Client(project=os.environ.get("FIREBASE_PROJECT_ID", "smallie-bench"),
+                                      credentials=AnonymousCredentials())
+    raise ValueError(f"Unknown backend {name}")
+
+
+def attribute_ops(app, db):
+    """WSGI middleware: count the request's Firestore ops under its endpoint name"""
+    def middleware(environ, start_response):
+        with db.label(environ.get("HTTP_X_BENCH_ENDPOINT", "other")):
+            # Consume the body inside the label (the benchmarked endpoints don't stream)
+            return list(app(environ, start_response))
+    return middleware
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered), 2) if ordered else None,
+        "p50_ms": round(percentile(ordered, 0.50), 2) if ordered else None,
+        "p95_ms": round(percentile(ordered, 0.95), 2) if ordered else None,
+        "p99_ms": round(percentile(ordered, 0.99), 2) if ordered else None,
+        "max_ms": round(ordered[-1], 2) if ordered else None,
+    }
+
+
+class User(threading.Thread):
+    """One simulated visitor looping through a scenario on a keep-alive connection"""
+
+    def __init__(self, number, steps, port, contestant_ids, deadline, think_time):
+        super().__init__(name=f"bench-user-{number}", daemon=True)
+        self.number = number
+        self.steps = steps
+        self.port = port
+        self.contestant_ids = contestant_ids
+        self.deadline = deadline
+        self.think_time = think_time
+        # endpoint -> list of latencies (ms); errors counted separately
+        self.latencies = {}
+        self.errors = {}
+
+    def run(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        while time.monotonic() < self.deadline:
+            for endpoint, method, path in self.steps:
+                body = None
+                headers = {ENDPOINT_HEADER: endpoint, "Accept-Encoding": "gzip",
+                           "Authorization": f"Bearer {admin_token}"}
+                if method == "POST":
+                    body = json.dumps({
+                        "contestantId": random.choice(self.contestant_ids),
+                        "count": 1,
+                        "email": f"user{self.number}@bench.test",
+                    })
+                    headers["Content-Type"] = "application/json"
+
+                started = time.perf_counter()
+                try:
+                    connection.request(method, path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status < 400
+                except (OSError, http.client.HTTPException):
+                    ok = False
+                    connection.close()
+                    connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+
+                if ok:
+                    self.latencies.setdefault(endpoint, []).append(elapsed_ms)
+                else:
+                    self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+                if self.think_time:
+                    time.sleep(self.think_time)
+        connection.close()
+
+
+def run(args):
+    logging.disable(logging.CRITICAL)
+    if not args.rate_limit:
+        # Every simulated user shares 127.0.0.1, which the per-IP limits would throttle
+        os.environ["RATE_LIMIT_ENABLED"] = "0"
+    os.environ["ADMIN_PASSWORD"] = ADMIN_PASSWORD
+    if args.write_behind:
+        os.environ["VOTE_BUFFER_ENABLED"] = "1"
+        os.environ["VOTE_WAL_PATH"] = os.path.join(tempfile.mkdtemp(prefix="smallie-bench-"), "votes.wal")
+
+    import firebase_init
+    db = make_backend(args.backend)
+    firebase_init.set_client(db)
+
+    # Import after the client is set so nothing tries real credentials
+    from app_vercel import app
+    from demo_data import DEFAULT_CONTESTANTS
+    import local_server
+    import seed
+
+    if db is not None:
+        seed.seed(db)
+
+    # Votes are only accepted while voting is open: pin the clock inside day 1's window
+    import competition_clock
+    voting_open = competition_clock.get_clock(db).release_at[0] + 3600
+    clock_state = competition_clock.CompetitionClock.state
+    competition_clock.CompetitionClock.state = lambda self, now=None: clock_state(self, voting_open)
+    wsgi_app = attribute_ops(app, db) if hasattr(db, "label") else app
+
+    # The admin scenario signs in once, like the dashboard
+    global admin_token
+    session = app.test_client().post("/api/admin/session", json={"password": ADMIN_PASSWORD})
+    admin_token = session.get_json()["token"]
+
+    server = local_server.serve_in_thread(wsgi_app, workers=max(args.users, 8))
+    port = server.server_address[1]
+    # Votes for eliminated contestants are rejected, so only target active ones
+    contestant_ids = [str(c["id"]) for c in DEFAULT_CONTESTANTS if not c.get("eliminated")]
+
+    steps = []
+    for name in args.scenario:
+        steps.extend(SCENARIOS[name])
+
+    # Warm caches and lazy imports outside the measurement
+    warmup = User(0, steps, port, contestant_ids, time.monotonic() + args.warmup, 0)
+    warmup.run()
+    if hasattr(db, "reset_counts"):
+        db.reset_counts()
+
+    started = time.monotonic()
+    users = [User(n, steps, port, contestant_ids, started + args.duration, args.think_time)
+             for n in range(1, args.users + 1)]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    elapsed = time.monotonic() - started
+    server.shutdown()
+    server.server_close()
+    if args.write_behind:
+        # Count the final flush with the rest of the background writes
+        import vote_buffer
+        vote_buffer.get_buffer(db).close()
+
+    all_latencies, total_errors, endpoints = [], 0, {}
+    for endpoint, _, _ in dict.fromkeys(steps):
+        latencies = [ms for user in users for ms in user.latencies.get(endpoint, [])]
+        errors = sum(user.errors.get(endpoint, 0) for user in users)
+        all_latencies.extend(latencies)
+        total_errors += errors
+        summary = summarize(latencies, errors, elapsed)
+        if hasattr(db, "ops"):
+            ops = db.ops.get(endpoint, {"reads": 0, "writes": 0})
+            handled = summary["requests"] + errors
+            summary["firestore_reads_per_request"] = round(ops["reads"] / handled, 2) if handled else 0.0
+            summary["firestore_writes_per_request"] = round(ops["writes"] / handled, 2) if handled else 0.0
+        endpoints[endpoint] = summary
+
+    result = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "backend": args.backend,
+        "scenario": args.scenario,
+        "users": args.users,
+        "duration_s": round(elapsed, 2),
+        "think_time_s": args.think_time,
+        "write_behind": args.write_behind,
+        "overall": summarize(all_latencies, total_errors, elapsed),
+        "endpoints": endpoints,
+    }
+    if hasattr(db, "ops"):
+        result["background_firestore_ops"] = {
+            label: dict(counts) for label, counts in db.ops.items() if label in ("background", "listeners")
+        }
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=ROOT).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_report(result):
+    overall = result["overall"]
+    print(f"{result['users']} users, {result['duration_s']}s, backend={result['backend']}, "
+          f"scenario={'+'.join(result['scenario'])}")
+    print(f"{'endpoint':<14}{'requests':>10}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'reads/req':>11}{'writes/req':>12}")
+    rows = list(result["endpoints"].items()) + [("overall", overall)]
+    for endpoint, summary in rows:
+        reads = summary.get("firestore_reads_per_request")
+        writes = summary.get("firestore_writes_per_request")
+        print(f"{endpoint:<14}{summary['requests']:>10}{summary['errors']:>8}{summary['throughput_rps']:>9.1f}"
+              f"{_ms(summary['p50_ms']):>9}{_ms(summary['p95_ms']):>9}{_ms(summary['p99_ms']):>9}"
+              f"{'-' if reads is None else reads:>11}{'-' if writes is None else writes:>12}")
+
+
+def _ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive concurrent users against the Smallie app")
+    parser.add_argument("--users", type=int, default=50, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to run")
+    parser.add_argument("--warmup", type=float, default=1, help="seconds of single-user warm-up")
+    parser.add_argument("--think-time", type=float, default=0, help="seconds each user waits between requests")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable; default: voter)")
+    parser.add_argument("--backend", choices=("fake", "emulator", "demo"), default="fake")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the vote/signup rate limits on")
+    parser.add_argument("--write-behind", action="store_true",
+                        help="buffer votes in a local log and flush them in batches (vote_buffer.py)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    args.scenario = args.scenario or ["voter"]
+
+    result = run(args)
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the serverless WSGI adapter
+
+Measures per-request overhead of wsgi_adapter.handle() against the previous
+index.handler() implementation (byte-string += in a loop plus a forced UTF-8
+decode) using a stub WSGI app, so only adapter cost is measured.
+
+Usage:
+    python benchmarks/wsgi_adapter.py [--iterations 200] [--output results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wsgi_adapter
+
+# Response sizes to test, in bytes
+BODY_SIZES = [1024, 32 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+CHUNK_SIZE = 8 * 1024
+
+
+class StubRequest:
+    """Minimal stand-in for the Vercel request object"""
+    url = "https://smallie.example/api/leaderboard"
+    method = "GET"
+    path = "/api/leaderboard"
+    query_string = b"day=3"
+    body = b""
+    headers = {"host": "smallie.example", "accept-encoding": "gzip", "user-agent": "bench"}
+
+
+def make_app(size, content_type):
+    """WSGI app yielding `size` bytes in CHUNK_SIZE pieces"""
+    chunk = b"x" * CHUNK_SIZE
+    full, rest = divmod(size, CHUNK_SIZE)
+
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", content_type), ("Content-Length", str(size))])
+        for _ in range(full):
+            yield chunk
+        if rest:
+            yield chunk[:rest]
+    return app
+
+
+def legacy_handler(app, request):
+    """The previous index.handler() body collection, kept for comparison"""
+    environ = {
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": request.url.split("://")[0],
+        "wsgi.input": request.body,
+        "wsgi.errors": sys.stderr,
+        "REQUEST_METHOD": request.method,
+        "PATH_INFO": request.path,
+        "QUERY_STRING": request.query_string.decode("utf-8"),
+    }
+    for key, value in request.headers.items():
+        environ[f"HTTP_{key.upper().replace('-', '_')}"] = value
+    response_data = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        response_data["status"] = status
+        response_data["headers"] = response_headers
+
+    body = b""
+    for chunk in app(environ, start_response):
+        if chunk:
+            body += chunk if isinstance(chunk, bytes) else chunk.encode("utf-8")
+    return {
+        "statusCode": int(response_data["status"].split(" ")[0]),
+        "headers": dict(response_data["headers"]),
+        "body": body.decode("utf-8"),
+    }
+
+
+def time_handler(fn, app, iterations):
+    samples = []
+    request = StubRequest()
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(app, request)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return round(statistics.median(samples), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request overhead of the WSGI adapter")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'body size':>10}{'legacy us':>14}{'adapter us':>14}{'binary us':>13}{'speedup':>10}")
+    for size in BODY_SIZES:
+        # The quadratic legacy loop gets slow on big bodies; scale iterations down
+        iterations = max(5, args.iterations * 32 * 1024 // max(size, 32 * 1024))
+        text_app = make_app(size, "text/html; charset=utf-8")
+        binary_app = make_app(size, "image/png")
+
+        legacy = time_handler(legacy_handler, text_app, iterations)
+        adapter = time_handler(wsgi_adapter.handle, text_app, iterations)
+        binary = time_handler(wsgi_adapter.handle, binary_app, iterations)
+        results.append({"body_bytes": size, "iterations": iterations, "legacy_us": legacy,
+                        "adapter_text_us": adapter, "adapter_binary_us": binary})
+        print(f"{size:>10}{legacy:>14.1f}{adapter:>14.1f}{binary:>13.1f}{legacy / adapter:>9.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Build the fingerprinted static assets in static/dist/
+
+Minifies every stylesheet in static/css and script in static/js, bundles
+the classic scripts listed in static_assets.BUNDLES, and writes each
+output as name.<hash>.ext with .gz (and, if the optional brotli package is
+installed, .br) variants, plus static/dist/manifest.json for the templates.
+ES modules are fingerprinted one file each, dependencies first, with their
+relative imports rewritten to the hashed names.
+
+The minifiers are deliberately conservative: they drop comments, blank
+lines, indentation and redundant spaces, but keep line breaks in scripts
+(so automatic semicolon insertion is unaffected) and never touch strings,
+template literals or regular expressions.
+
+Run at deploy time (vercel.json's buildCommand runs it on Vercel):
+
+    python build_assets.py
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+
+from static_assets import BUNDLES, DIST_DIR, MANIFEST_PATH, STATIC_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Files smaller than this aren't worth precompressing
+MIN_COMPRESS_SIZE = 256
+
+# Characters a space can be dropped next to without changing the meaning
+JS_TIGHT = set("{}()[];,:=?&|*%^~")
+CSS_TIGHT_BEFORE = set("{};,>")
+CSS_TIGHT_AFTER = set("{};,:>")
+
+# A "/" after one of these (or a keyword below) starts a regex literal, not a division
+REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = {"return", "typeof", "instanceof", "in", "of", "new", "delete", "void",
+                  "throw", "case", "do", "else", "yield", "await"}
+
+CSS_LAST_SEMICOLON = re.compile(r";\s*}")
+MODULE_SYNTAX = re.compile(r"^\s*(import|export)\b", re.MULTILINE)
+RELATIVE_IMPORT = re.compile(r"""(\bfrom\s*|\bimport\s*\(?\s*)(['"])(\./[^'"]+)\2""")
+
+
+def _string_end(source, i):
+    # source[i] is the opening quote; returns the index after the closing one
+    quote, j = source[i], i + 1
+    while j < len(source):
+        if source[j] == "\\":
+            j += 2
+        elif source[j] == quote or source[j] == "\n":
+            return j + 1
+        else:
+            j += 1
+    return j
+
+
+def _template_end(source, i):
+    # source[i] is the opening backtick
+    j = i + 1
+    while j < len(source):
+        if source[j] == "\\":
+            j += 2
+        elif source[j] == "`":
+            return j + 1
+        elif source.startswith("${", j):
+            j = _substitution_end(source, j + 2)
+        else:
+            j += 1
+    return j
+
+
+def _substitution_end(source, j):
+    # Inside ${...}; returns the index after the matching brace
+    depth = 0
+    while j < len(source):
+        char = source[j]
+        if char in "'\"":
+            j = _string_end(source, j)
+            continue
+        if char == "`":
+            j = _template_end(source, j)
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            if depth == 0:
+                return j + 1
+            depth -= 1
+        j += 1
+    return j
+
+
+def _regex_end(source, i):
+    # source[i] is the opening slash; returns the index after the flags
+    j, in_class = i + 1, False
+    while j < len(source) and source[j] != "\n":
+        char = source[j]
+        if char == "\\":
+            j += 2
+            continue
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            j += 1
+            while j < len(source) and (source[j].isalnum() or source[j] == "_"):
+                j += 1
+            return j
+        j += 1
+    return j
+
+
+def _regex_allowed(out):
+    # Decide from the output so far whether a "/" starts a regex literal
+    text = "".join(out[-3:]).rstrip()
+    if not text:
+        return True
+    if text[-1] in REGEX_AFTER:
+        return True
+    word = re.search(r"[A-Za-z_$][\w$]*$", text)
+    return bool(word) and word.group(0) in REGEX_KEYWORDS
+
+
+def minify_js(source):
+    """Strip comments, indentation, blank lines and redundant spaces from a script"""
+    out = []
+    i, n = 0, len(source)
+    pending = ""  # whitespace seen since the last token: "", " " or "\n"
+
+    def emit(token):
+        nonlocal pending
+        previous = out[-1][-1] if out else ""
+        if pending == "\n" and out:
+            out.append("\n")
+        elif pending == " " and previous and previous not in JS_TIGHT and token[0] not in JS_TIGHT:
+            out.append(" ")
+        pending = ""
+        out.append(token)
+
+    while i < n:
+        char = source[i]
+        if char in " \t\r\f\v":
+            pending = pending or " "
+            i += 1
+        elif char == "\n":
+            pending = "\n"
+            i += 1
+        elif char in "'\"":
+            end = _string_end(source, i)
+            emit(source[i:end])
+            i = end
+        elif char == "`":
+            end = _template_end(source, i)
+            emit(source[i:end])
+            i = end
+        elif source.startswith("//", i):
+            end = source.find("\n", i)
+            i = n if end < 0 else end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            # A comment spanning lines still ends a statement for ASI
+            if "\n" in source[i:end]:
+                pending = "\n"
+            else:
+                pending = pending or " "
+            i = end
+        elif char == "/" and _regex_allowed(out):
+            end = _regex_end(source, i)
+            emit(source[i:end])
+            i = end
+        else:
+            j = i + 1
+            if char.isalnum() or char in "_$":
+                while j < n and (source[j].isalnum() or source[j] in "_$"):
+                    j += 1
+            emit(source[i:j])
+            i = j
+    return "".join(out) + "\n"
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    out = []
+    i, n = 0, len(source)
+    while i < n:
+        char = source[i]
+        if char in "'\"":
+            end = _string_end(source, i)
+            out.append(source[i:end])
+            i = end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+        elif char.isspace():
+            j = i
+            while j < n and source[j].isspace():
+                j += 1
+            previous = out[-1][-1] if out else ""
+            following = source[j] if j < n else ""
+            if previous and following and previous not in CSS_TIGHT_AFTER and following not in CSS_TIGHT_BEFORE:
+                out.append(" ")
+            i = j
+        elif char == ";" and CSS_LAST_SEMICOLON.match(source, i):
+            # The last declaration in a block needs no semicolon
+            i += 1
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out).strip() + "\n"
+
+
+def is_module(source):
+    return bool(MODULE_SYNTAX.search(source))
+
+
+def fingerprint(name, body):
+    """name.<hash>.ext for `body`"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+
+
+def write_output(name, body):
+    """Write body (and compressed variants) under its hashed name; returns the path relative to static/"""
+    path = os.path.join(DIST_DIR, fingerprint(name, body))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(body)
+    if len(body) >= MIN_COMPRESS_SIZE:
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + ".br", "wb") as f:
+                f.write(brotli.compress(body, quality=11))
+    return os.path.relpath(path, STATIC_DIR).replace(os.sep, "/")
+
+
+def _read(name):
+    with open(os.path.join(STATIC_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _module_order(modules):
+    # Dependencies before the modules that import them
+    ordered, visiting = [], set()
+
+    def visit(name):
+        if name in ordered or name in visiting:
+            return
+        visiting.add(name)
+        for _, _, target in RELATIVE_IMPORT.findall(modules[name]):
+            dependency = os.path.normpath(os.path.join(os.path.dirname(name), target)).replace(os.sep, "/")
+            if dependency in modules:
+                visit(dependency)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in sorted(modules):
+        visit(name)
+    return ordered
+
+
+def build():
+    """Rebuild static/dist from scratch; returns the manifest"""
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    manifest = {}
+    bundled = {source for sources in BUNDLES.values() for source in sources}
+
+    for name in sorted(os.listdir(os.path.join(STATIC_DIR, "css"))):
+        if name.endswith(".css"):
+            name = f"css/{name}"
+            manifest[name] = write_output(name, minify_css(_read(name)).encode("utf-8"))
+
+    for bundle, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            text = _read(source)
+            if is_module(text):
+                raise ValueError(f"{source} is an ES module and can't be bundled into {bundle}")
+            # The semicolon guards against a source that ends without one
+            parts.append(minify_js(text).rstrip() + ";")
+        manifest[bundle] = write_output(bundle, ("\n".join(parts) + "\n").encode("utf-8"))
+
+    scripts = {f"js/{name}": _read(f"js/{name}") for name in sorted(os.listdir(os.path.join(STATIC_DIR, "js")))
+               if name.endswith(".js") and f"js/{name}" not in bundled}
+    for name in _module_order(scripts):
+        def rewrite(match, name=name):
+            target = os.path.normpath(os.path.join(os.path.dirname(name), match.group(3))).replace(os.sep, "/")
+            if target not in manifest:
+                return match.group(0)
+            # Built files keep the source layout, so the import stays relative
+            built = os.path.relpath(manifest[target], os.path.dirname(f"dist/{name}")).replace(os.sep, "/")
+            return f"{match.group(1)}{match.group(2)}./{built}{match.group(2)}"
+
+        body = RELATIVE_IMPORT.sub(rewrite, minify_js(scripts[name]))
+        manifest[name] = write_output(name, body.encode("utf-8"))
+
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify, bundle and fingerprint static/css and static/js")
+    parser.parse_args()
+
+    manifest = build()
+    for name, built in sorted(manifest.items()):
+        size = os.path.getsize(os.path.join(STATIC_DIR, built))
+        gz_path = os.path.join(STATIC_DIR, built + ".gz")
+        gz = f", {os.path.getsize(gz_path)} gzipped" if os.path.exists(gz_path) else ""
+        print(f"{name} -> {built} ({size} bytes{gz})")
+    if brotli is None:
+        print("Note: brotli is not installed; only .gz variants were written", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
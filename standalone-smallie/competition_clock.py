@@ -0,0 +1,232 @@
+"""
+Competition clock for Smallie
+
+Loads the daily task catalog once and precomputes the timezone-aware
+(Africa/Lagos, WAT) release and voting-close instants for every day of the
+competition. Answering "which day is it, what's the task, is voting open and
+how long until it closes" is then a constant-time lookup with no Firestore
+reads. The same state is served at /api/clock so the browser timer can sync
+against server time.
+"""
+
+import os
+import time
+import logging
+import datetime
+import threading
+
+import repositories
+
+try:
+    from zoneinfo import ZoneInfo
+    WAT = ZoneInfo("Africa/Lagos")
+except Exception:
+    # No tz database available; WAT is a fixed UTC+1 with no daylight saving
+    WAT = datetime.timezone(datetime.timedelta(hours=1), "WAT")
+
+# First day of the competition (WAT calendar date)
+COMPETITION_START = datetime.date.fromisoformat(os.environ.get("COMPETITION_START_DATE", "2025-04-15"))
+NUM_DAYS = 7
+
+# WAT hour bucket stored on each vote
+HOUR_FORMAT = "%Y-%m-%dT%H"
+
+# Seconds between re-reads of the tasks collection (admins can edit tasks)
+CATALOG_TTL = float(os.environ.get("TASK_CATALOG_TTL", "600"))
+
+DEFAULT_RELEASE_TIME = datetime.time(9, 0)
+DEFAULT_CLOSE_TIME = datetime.time(21, 0)
+
+# Phases reported by CompetitionClock.state()
+PHASE_UPCOMING = "upcoming"
+PHASE_VOTING = "voting"
+PHASE_CLOSED = "closed"
+PHASE_ENDED = "ended"
+
+UPCOMING_TASK = {"title": "Competition starts soon", "description": "Stay tuned for Day 1!", "day": 0}
+ENDED_TASK = {"title": "Competition has ended", "description": "Thanks for participating!", "day": NUM_DAYS + 1}
+
+# Built-in task catalog, used to seed Firestore and when it is unavailable
+DAILY_TASKS = [
+    {
+        "day": 1,
+        "date": "2025-04-15",
+        "title": "Naija Throwback Dance Challenge",
+        "description": "60-second dance to a classic hit (e.g., P-Square)",
+        "release_time": "09:00 WAT",
+        "voting_close_time": "21:00 WAT"
+    },
+    {
+        "day": 2,
+        "date": "2025-04-16",
+        "title": "Jollof Wars: Cook-Off Edition",
+        "description": "Cook jollof with ₦500 in 10 minutes, taste it",
+        "release_time": "09:00 WAT",
+        "voting_close_time": "21:00 WAT"
+    },
+    {
+        "day": 3,
+        "date": "2025-04-17",
+        "title": "Nollywood Skit Showdown",
+        "description": "2-minute Nollywood skit (e.g., Cheating Husband)",
+        "release_time": "09:00 WAT",
+        "voting_close_time": "21:00 WAT"
+    },
+    {
+        "day": 4,
+        "date": "2025-04-18",
+        "title": "Afrobeat Freestyle Face-Off",
+        "description": "1-minute freestyle on a trending beat (e.g., Burna Boy)",
+        "release_time": "09:00 WAT",
+        "voting_close_time": "21:00 WAT"
+    },
+    {
+        "day": 5,
+        "date": "2025-04-19",
+        "title": "Owambe Fashion Flex",
+        "description": "Style an owambe outfit from home, 90-second catwalk",
+        "release_time": "09:00 WAT",
+        "voting_close_time": "21:00 WAT"
+    },
+    {
+        "day": 6,
+        "date": "2025-04-20",
+        "title": "Pidgin Proverbs Remix",
+        "description": "60-second pidgin skit/song from a proverb (e.g., Monkey no fine...)",
+        "release_time": "09:00 WAT",
+        "voting_close_time": "21:00 WAT"
+    },
+    {
+        "day": 7,
+        "date": "2025-04-21",
+        "title": "Lagos Hustle Pitch",
+        "description": "3-minute pitch as Smallie winner",
+        "release_time": "09:00 WAT",
+        "voting_close_time": "21:00 WAT"
+    }
+]
+
+
+def _parse_clock_time(value, default):
+    """Parse a catalog time such as "09:00 WAT" into a datetime.time"""
+    try:
+        hours, minutes = str(value).split()[0].split(":")
+        return datetime.time(int(hours), int(minutes))
+    except Exception:
+        return default
+
+
+class CompetitionClock:
+    """Precomputed WAT schedule answering day/task/phase queries in O(1)"""
+
+    def __init__(self, tasks, start_date=COMPETITION_START, tz=WAT):
+        catalog = {task["day"]: task for task in DAILY_TASKS}
+        for task in tasks:
+            try:
+                day = int(task.get("day"))
+            except (TypeError, ValueError):
+                continue
+            if 1 <= day <= NUM_DAYS:
+                catalog[day] = task
+
+        self.start_date = start_date
+        self.tasks = []
+        self.release_at = []
+        self.close_at = []
+        for day in range(1, NUM_DAYS + 1):
+            task = catalog[day]
+            date = start_date + datetime.timedelta(days=day - 1)
+            release = _parse_clock_time(task.get("release_time"), DEFAULT_RELEASE_TIME)
+            close = _parse_clock_time(task.get("voting_close_time"), DEFAULT_CLOSE_TIME)
+            self.tasks.append(dict(task, day=day, date=date.isoformat()))
+            self.release_at.append(datetime.datetime.combine(date, release, tz).timestamp())
+            self.close_at.append(datetime.datetime.combine(date, close, tz).timestamp())
+
+        self._first_midnight = datetime.datetime.combine(start_date, datetime.time(0), tz).timestamp()
+
+    def state(self, now=None):
+        """Return the competition state at `now` (epoch seconds, default: current time)"""
+        if now is None:
+            now = time.time()
+
+        # Calendar day index within the competition (WAT has no DST, so days are 86400s)
+        index = int((now - self._first_midnight) // 86400)
+
+        if index < 0 or (index == 0 and now < self.release_at[0]):
+            return self._state(now, 0, PHASE_UPCOMING, UPCOMING_TASK, next_release=self.release_at[0])
+        if index >= NUM_DAYS or (index == NUM_DAYS - 1 and now >= self.close_at[-1]):
+            return self._state(now, NUM_DAYS + 1, PHASE_ENDED, ENDED_TASK)
+
+        if now < self.release_at[index]:
+            # Before today's release the previous day's task is still current
+            return self._state(now, index, PHASE_CLOSED, self.tasks[index - 1],
+                               next_release=self.release_at[index])
+
+        day = index + 1
+        next_release = self.release_at[index + 1] if day < NUM_DAYS else None
+        if now < self.close_at[index]:
+            return self._state(now, day, PHASE_VOTING, self.tasks[index],
+                               close=self.close_at[index], next_release=next_release)
+        return self._state(now, day, PHASE_CLOSED, self.tasks[index], next_release=next_release)
+
+    def buckets(self, now=None):
+        """
+        The canonical buckets for a vote cast at `now`: the competition day
+        (as in state()) and the WAT hour, e.g. "2025-04-15T21". Votes carry
+        both so daily and hourly queries are equality filters.
+        """
+        if now is None:
+            now = time.time()
+        return {
+            "day": self.state(now)["day"],
+            "hour": datetime.datetime.fromtimestamp(now, WAT).strftime(HOUR_FORMAT),
+        }
+
+    def _state(self, now, day, phase, task, close=None, next_release=None):
+        return {
+            "day": day,
+            "phase": phase,
+            "task": task,
+            "server_time": now,
+            "close_at": close,
+            "seconds_to_close": int(close - now) if close is not None else None,
+            "next_release_at": next_release,
+        }
+
+
+_lock = threading.Lock()
+_clock = None
+_loaded_at = 0.0
+
+
+def load_tasks(db):
+    """Read the task catalog from Firestore (one query), falling back to DAILY_TASKS"""
+    if db is None:
+        return DAILY_TASKS
+    try:
+        return repositories.for_db(db).tasks.list() or DAILY_TASKS
+    except Exception as e:
+        logging.error(f"Error loading task catalog from Firebase: {e}")
+        return DAILY_TASKS
+
+
+def get_clock(db):
+    """Return the shared clock, rebuilding it from Firestore at most every CATALOG_TTL seconds"""
+    global _clock, _loaded_at
+
+    with _lock:
+        if _clock is not None and time.monotonic() - _loaded_at < CATALOG_TTL:
+            return _clock
+
+    clock = CompetitionClock(load_tasks(db))
+    with _lock:
+        _clock = clock
+        _loaded_at = time.monotonic()
+    return clock
+
+
+def reset():
+    """Drop the shared clock so the next get_clock() reloads the catalog"""
+    global _clock
+    with _lock:
+        _clock = None
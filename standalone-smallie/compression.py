@@ -0,0 +1,189 @@
+"""
+Response compression for Smallie's Flask routes
+
+install(app) compresses HTML and JSON responses with brotli (when the
+optional brotli package is installed) or gzip, whichever the client's
+Accept-Encoding allows, and adds `Vary: Accept-Encoding`. Bodies under
+MIN_SIZE bytes are left alone, as are other content types (images, fonts
+and archives are compressed already; Server-Sent Events must reach the
+browser event by event), responses that already carry a Content-Encoding
+(the precompressed /static/dist/ files) and file responses.
+
+Streamed responses are compressed chunk by chunk, flushing after each, so
+the browser still receives every chunk as it is produced. Responses with
+an ETag have their compressed bytes kept in an LRU keyed by that ETag, so
+an unchanged page is compressed (harder) once rather than on every
+request; each encoding gets its own ETag ("<etag>-gz", "<etag>-br"), and
+a client revalidating one of them gets a 304.
+"""
+
+import os
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+from prerendered import _parse_accept_encoding, _parse_etags
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENABLED = os.environ.get("COMPRESSION_ENABLED", "1") == "1"
+
+# Bodies smaller than this aren't worth compressing
+MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "512"))
+
+# Compressed bodies kept for responses with an ETag
+CACHE_SIZE = int(os.environ.get("COMPRESSION_CACHE_SIZE", "64"))
+
+COMPRESSIBLE_TYPES = ("text/html", "application/json")
+
+# Preferred order when the client accepts several encodings
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+ETAG_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+
+# Levels per request, and for bodies compressed once and cached
+GZIP_LEVEL = 6
+GZIP_CACHED_LEVEL = 9
+BROTLI_QUALITY = 5
+BROTLI_CACHED_QUALITY = 11
+
+
+def _compress(body, encoding, cached=False):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_CACHED_QUALITY if cached else BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_CACHED_LEVEL if cached else GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+def _compress_stream(chunks, encoding):
+    # Flush after every chunk so streamed output isn't held back
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(_as_bytes(chunk)) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(_as_bytes(chunk)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _as_bytes(chunk):
+    return chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+class CompressedCache:
+    """LRU of compressed bodies keyed by (path, ETag, encoding)"""
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, compress):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compress()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+def _add_vary(response):
+    vary = {value.strip().lower() for value in response.headers.get("Vary", "").split(",")}
+    if "accept-encoding" not in vary:
+        response.headers.add("Vary", "Accept-Encoding")
+
+
+def _choose(accept_encoding):
+    accepted = _parse_accept_encoding(accept_encoding)
+    for encoding in ENCODINGS:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress_response(response, cache):
+    """Compress `response` in place for the current request if it's worth it"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    streamed = response.is_streamed
+    if not streamed and (response.content_length or 0) < MIN_SIZE:
+        return response
+
+    _add_vary(response)
+    encoding = _choose(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+
+    if streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    etag, weak = response.get_etag()
+    if etag:
+        tag = f'"{etag}{ETAG_SUFFIXES[encoding]}"'
+        if tag in _parse_etags(request.headers.get("If-None-Match")):
+            response.status_code = 304
+            response.set_data(b"")
+            response.headers.pop("Content-Length", None)
+            response.headers["ETag"] = f"W/{tag}" if weak else tag
+            return response
+        body = cache.get((request.path, etag, encoding),
+                         lambda: _compress(response.get_data(), encoding, cached=True))
+        response.headers["ETag"] = f"W/{tag}" if weak else tag
+    else:
+        body = _compress(response.get_data(), encoding)
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def install(app, cache=None):
+    """Compress the HTML and JSON responses `app` serves"""
+    cache = cache if cache is not None else compressed_bodies
+    if not ENABLED:
+        return
+
+    @app.after_request
+    def _compress_response(response):
+        try:
+            return compress_response(response, cache)
+        except Exception as e:
+            logging.error(f"Sending {request.path} uncompressed: {e}")
+            return response
+
+
+# Shared by every request in the process
+compressed_bodies = CompressedCache()
@@ -0,0 +1,191 @@
+"""
+Process-wide cache of the contestants list for Smallie
+
+The homepage used to read the whole contestants collection on every view.
+This cache loads it once, then keeps it fresh with Firestore snapshot
+listeners on the contestants collection and the vote counter shards, so
+steady-state page views are served from memory.
+
+Listeners can stall without failing (e.g. on a frozen serverless instance),
+so their data is trusted for at most LISTEN_TTL seconds since they last
+delivered anything; past that the list is reloaded and dead listeners are
+restarted. Without listeners, CACHE_TTL bounds staleness. One thread
+reloads at a time, and the vote shards (a read of every contestant's
+shards) are only re-read once they're older than CACHE_TTL, so an
+invalidate() re-reads just the contestant documents.
+"""
+
+import os
+import time
+import logging
+import threading
+
+import vote_counters
+
+# Seconds a loaded list stays valid when no snapshot listener is running
+CACHE_TTL = float(os.environ.get("CONTESTANTS_CACHE_TTL", "30"))
+
+# Seconds the listeners' data stays valid without hearing from them
+LISTEN_TTL = float(os.environ.get("CONTESTANTS_CACHE_LISTEN_TTL", "300"))
+
+# Set CONTESTANTS_CACHE_LISTEN=0 to disable the snapshot listeners
+LISTEN_ENABLED = os.environ.get("CONTESTANTS_CACHE_LISTEN", "1") != "0"
+
+
+class ContestantsCache:
+    """Holds the merged contestant list and keeps hit/miss counters"""
+
+    def __init__(self, ttl=CACHE_TTL, listen=LISTEN_ENABLED, listen_ttl=LISTEN_TTL):
+        self.ttl = ttl
+        self.listen = listen
+        self.listen_ttl = listen_ttl
+        self.hits = 0
+        self.misses = 0
+        self.version = 0
+        self._lock = threading.Lock()
+        # Held by the one thread reloading or (re)starting listeners. Separate
+        # from _lock: listeners may deliver their first snapshot (which takes
+        # _lock) before on_snapshot() returns
+        self._load_lock = threading.Lock()
+        self._docs = {}
+        self._shards = {}
+        self._contestants = None
+        self._loaded_at = 0.0
+        self._shards_at = None
+        self._watches = []
+
+    def get(self, db):
+        """
+        Return the cached contestants, loading them from Firestore on a miss.
+        Returns an empty list if the collection is empty and None on errors.
+        """
+        return self.get_with_version(db)[0]
+
+    def get_with_version(self, db):
+        """
+        Like get(), but returns (contestants, version). The version changes
+        whenever a contestant document does (roster, names, elimination), but
+        not when only vote counts move, so it can key rendered output that
+        doesn't show counts.
+        """
+        with self._lock:
+            if self._contestants is not None and self._is_fresh():
+                self.hits += 1
+                return self._contestants, self.version
+            self.misses += 1
+
+        with self._load_lock:
+            # Concurrent misses wait for the first one's load instead of repeating it
+            with self._lock:
+                if self._contestants is not None and self._is_fresh():
+                    return self._contestants, self.version
+            try:
+                self._load(db)
+            except Exception as e:
+                logging.error(f"Error loading contestants into cache: {e}")
+                return None, None
+
+            if self.listen and not self._watches_alive():
+                self._start_listeners(db)
+
+        with self._lock:
+            return self._contestants, self.version
+
+    def invalidate(self):
+        """Force the next get() to reload from Firestore"""
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def stats(self):
+        """Return the cache counters for the stats endpoint"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "version": self.version,
+                "size": len(self._contestants or []),
+                "listening": self._watches_alive(),
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            }
+
+    def close(self):
+        """Stop the snapshot listeners"""
+        for watch in self._watches:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                logging.error(f"Error stopping contestants listener: {e}")
+        self._watches = []
+
+    def _is_fresh(self):
+        # _loaded_at moves on every load and every listener delivery
+        ttl = self.listen_ttl if self._watches_alive() else self.ttl
+        return time.monotonic() - self._loaded_at < ttl
+
+    def _watches_alive(self):
+        # Real watches report is_active; ones without it are taken as alive
+        return bool(self._watches) and all(getattr(watch, "is_active", True) for watch in self._watches)
+
+    def _load(self, db):
+        docs = {doc.id: doc.to_dict() for doc in db.collection("contestants").get()}
+        shards = None
+        if self._shards_at is None or time.monotonic() - self._shards_at >= self.ttl:
+            shards = vote_counters.group_shard_counts(
+                db.collection_group(vote_counters.SHARDS_COLLECTION).get())
+
+        with self._lock:
+            changed = docs != self._docs or self._contestants is None
+            self._docs = docs
+            if shards is not None:
+                self._shards = shards
+                self._shards_at = time.monotonic()
+            self._rebuild(changed)
+
+    def _rebuild(self, docs_changed):
+        # Must be called with the lock held
+        contestants = []
+        for doc_id, data in self._docs.items():
+            contestant = dict(data)
+            contestant["votes"] = int(contestant.get("votes", 0)) + sum(self._shards.get(doc_id, {}).values())
+            contestants.append(contestant)
+        contestants.sort(key=lambda c: str(c.get("id", "")).zfill(8))
+
+        self._contestants = contestants
+        self._loaded_at = time.monotonic()
+        if docs_changed:
+            self.version += 1
+
+    def _start_listeners(self, db):
+        if self._watches:
+            logging.warning("Contestants listeners stopped, restarting them")
+            self.close()
+        try:
+            self._watches = [
+                db.collection("contestants").on_snapshot(self._on_contestants),
+                db.collection_group(vote_counters.SHARDS_COLLECTION).on_snapshot(self._on_shards),
+            ]
+            logging.info("Contestants cache listening for Firestore changes")
+        except Exception as e:
+            logging.error(f"Could not start contestants listeners, falling back to TTL: {e}")
+            self.close()
+            self.listen = False
+
+    def _on_contestants(self, docs, changes, read_time):
+        docs = {doc.id: doc.to_dict() for doc in docs}
+        with self._lock:
+            changed = docs != self._docs
+            self._docs = docs
+            self._rebuild(changed)
+
+    def _on_shards(self, docs, changes, read_time):
+        shards = vote_counters.group_shard_counts(docs)
+        with self._lock:
+            self._shards = shards
+            self._shards_at = time.monotonic()
+            self._rebuild(False)
+
+
+# Shared instance used by the Flask routes
+contestants_cache = ContestantsCache()
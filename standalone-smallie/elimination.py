@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Daily elimination engine for Smallie
+
+At 21:00 WAT each day the active contestant with the fewest votes that day
+is eliminated, and the day's top three are recorded for the daily payouts.
+
+DailyStandings keeps one day's tallies in a min-heap and a max-heap (stale
+entries are skipped lazily), so every vote is an O(log n) update and the
+bottom one and top three are read in O(log n) without scanning `votes`.
+The app feeds each recorded vote into the standings for live views.
+Closing a day rebuilds them from the sharded per-day aggregates in
+vote_stats (one query of VOTE_STATS_SHARDS documents), because other
+instances' votes only reach this process through those aggregates.
+
+The elimination and its result document (eliminations/{day}) are written
+in one Firestore transaction. A day that already has a result is never
+closed again, so the close can be retried or triggered by several
+callers at once. Ties for last place are recorded in the result
+(`tiedForLast`) and broken by contestant id, compared as numbers ("2"
+before "10").
+
+Vercel's cron calls GET /api/eliminations/close after the close time. It
+closes every day whose voting has ended and that has no result yet, oldest
+first, so a day the cron missed is closed by the next run. A day can also
+be closed by hand:
+
+    python elimination.py [--day N] [--dry-run]
+"""
+
+import sys
+import heapq
+import logging
+import argparse
+import threading
+
+import vote_stats
+import vote_buffer
+import competition_clock
+
+# firebase_admin is imported inside close_day so cold starts don't pay for it
+
+RESULTS_COLLECTION = "eliminations"
+
+# Places recorded for the daily payouts
+TOP_PLACES = 3
+
+
+def id_order(contestant_id):
+    """Sort key for contestant ids: numeric ids by value ("2" before "10"), then any others"""
+    return (0, int(contestant_id), "") if str(contestant_id).isdigit() else (1, 0, str(contestant_id))
+
+
+class DailyStandings:
+    """One day's vote tallies with O(log n) bottom/top queries"""
+
+    def __init__(self, tallies=None):
+        self.tallies = {}
+        self._versions = {}
+        self._min = []
+        self._max = []
+        for contestant_id, votes in (tallies or {}).items():
+            self.tallies[contestant_id] = int(votes)
+            self._versions[contestant_id] = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        # Heap entries are (votes, id order, id, version); ties order by contestant id
+        self._min = [(votes, id_order(contestant_id), contestant_id, self._versions[contestant_id])
+                     for contestant_id, votes in self.tallies.items()]
+        self._max = [(-votes, id_order(contestant_id), contestant_id, self._versions[contestant_id])
+                     for contestant_id, votes in self.tallies.items()]
+        heapq.heapify(self._min)
+        heapq.heapify(self._max)
+
+    def _is_current(self, entry):
+        return entry[2] in self.tallies and self._versions[entry[2]] == entry[3]
+
+    def _push(self, contestant_id):
+        version = self._versions.get(contestant_id, -1) + 1
+        self._versions[contestant_id] = version
+        votes = self.tallies[contestant_id]
+        heapq.heappush(self._min, (votes, id_order(contestant_id), contestant_id, version))
+        heapq.heappush(self._max, (-votes, id_order(contestant_id), contestant_id, version))
+        # Superseded entries pile up between queries; drop them once they dominate
+        if len(self._min) > 4 * len(self.tallies) + 16:
+            self._rebuild()
+
+    def add(self, contestant_id, count=1):
+        """Record `count` more votes for a contestant that's still in the running"""
+        if contestant_id in self.tallies:
+            self.tallies[contestant_id] += count
+            self._push(contestant_id)
+
+    def join(self, contestant_id, votes=0):
+        """Add a contestant to the standings (no-op if already there)"""
+        if contestant_id not in self.tallies:
+            self.tallies[contestant_id] = int(votes)
+            self._push(contestant_id)
+
+    def remove(self, contestant_id):
+        """Drop an eliminated contestant; its heap entries go stale"""
+        # The version is kept so a later join() never revives an old entry
+        self.tallies.pop(contestant_id, None)
+
+    def _top_entries(self, heap, k):
+        # Pop until k current entries are found, then push them back
+        found = []
+        while heap and len(found) < k:
+            entry = heapq.heappop(heap)
+            if self._is_current(entry):
+                found.append(entry)
+        for entry in found:
+            heapq.heappush(heap, entry)
+        return found
+
+    def bottom(self, k=1):
+        """The k lowest (contestant_id, votes) pairs, fewest votes first"""
+        return [(contestant_id, votes) for votes, _, contestant_id, _ in self._top_entries(self._min, k)]
+
+    def top(self, k=TOP_PLACES):
+        """The k highest (contestant_id, votes) pairs, most votes first"""
+        return [(contestant_id, -votes) for votes, _, contestant_id, _ in self._top_entries(self._max, k)]
+
+    def tied_for_last(self):
+        """Every contestant sharing the lowest tally (more than one means a tie)"""
+        lowest = self.bottom(1)
+        if not lowest:
+            return []
+        floor = lowest[0][1]
+        return sorted((contestant_id for contestant_id, votes in self.tallies.items() if votes == floor), key=id_order)
+
+    def __len__(self):
+        return len(self.tallies)
+
+
+def load_day_tallies(db, day):
+    """Read one day's per-contestant tallies from the stats shards (bypasses the stats TTL)"""
+    aggregates = vote_stats.merge_shards(db.collection(vote_stats.STATS_COLLECTION).get())
+    return (aggregates["days"].get(str(day)) or {}).get("contestants", {})
+
+
+def build_result(day, standings, names):
+    """The eliminations/{day} document for closed standings"""
+    def entry(contestant_id, votes):
+        return {"id": contestant_id, "name": names.get(contestant_id, ""), "votes": votes}
+
+    loser = standings.bottom(1)
+    return {
+        "day": day,
+        "eliminated": entry(*loser[0]) if loser else None,
+        "top": [entry(contestant_id, votes) for contestant_id, votes in standings.top(TOP_PLACES)],
+        "tiedForLast": standings.tied_for_last(),
+        "tallies": dict(standings.tallies),
+    }
+
+
+def close_day(db, day, dry_run=False):
+    """
+    Eliminate the day's lowest-voted active contestant and record the top
+    three, in one transaction. Returns the result; if the day was already
+    closed, returns the stored result unchanged.
+
+    The day's tallies are a snapshot read before the transaction (they span
+    many aggregate shards). POST /api/votes refuses votes once voting has
+    closed, so the snapshot is final provided the close runs after the last
+    accepted vote has been committed: with write-behind voting, callers wait
+    for vote_buffer.wait_until_drained() first.
+    """
+    from firebase_admin import firestore
+
+    tallies = load_day_tallies(db, day)
+    result_ref = db.collection(RESULTS_COLLECTION).document(str(day))
+
+    @firestore.transactional
+    def apply(transaction):
+        existing = result_ref.get(transaction=transaction)
+        if existing.exists:
+            return dict(existing.to_dict(), alreadyClosed=True)
+
+        active = {doc.id: doc.to_dict() or {} for doc in db.collection("contestants").get(transaction=transaction)
+                  if not (doc.to_dict() or {}).get("eliminated")}
+        standings = DailyStandings({contestant_id: tallies.get(contestant_id, 0) for contestant_id in active})
+        result = build_result(day, standings, {cid: data.get("name", "") for cid, data in active.items()})
+        if dry_run:
+            return result
+
+        if result["eliminated"]:
+            transaction.update(db.collection("contestants").document(result["eliminated"]["id"]), {
+                "eliminated": True,
+                "eliminatedDay": day,
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            })
+        transaction.create(result_ref, dict(result, closedAt=firestore.SERVER_TIMESTAMP))
+        return result
+
+    result = apply(db.transaction())
+    if result["eliminated"] and not dry_run and not result.get("alreadyClosed"):
+        logging.info(f"Day {day} closed: eliminated {result['eliminated']['name']} "
+                     f"with {result['eliminated']['votes']} votes")
+    return result
+
+
+def get_result(db, day):
+    """The stored result for a closed day, or None"""
+    doc = db.collection(RESULTS_COLLECTION).document(str(day)).get()
+    return doc.to_dict() if doc.exists else None
+
+
+def day_to_close(state):
+    """The day whose voting has closed and is due for elimination, or None"""
+    if state["phase"] == competition_clock.PHASE_ENDED:
+        return competition_clock.NUM_DAYS
+    if state["phase"] == competition_clock.PHASE_CLOSED and 1 <= state["day"] <= competition_clock.NUM_DAYS:
+        return state["day"]
+    return None
+
+
+def days_to_close(db, state):
+    """Every day whose voting has ended and that has no result yet, oldest first"""
+    last = day_to_close(state)
+    if last is None:
+        # While a day's voting is open, every earlier day is over
+        last = state["day"] - 1 if state["phase"] == competition_clock.PHASE_VOTING else 0
+    if last < 1:
+        return []
+    refs = [db.collection(RESULTS_COLLECTION).document(str(day)) for day in range(1, last + 1)]
+    closed = {int(snap.id) for snap in db.get_all(refs) if snap.exists}
+    return [day for day in range(1, last + 1) if day not in closed]
+
+
+class EliminationEngine:
+    """Live per-day standings fed by the vote path, plus the daily close"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days = {}
+
+    def standings(self, db, day, contestants):
+        """Live standings for `day`, loaded from the aggregates on first use"""
+        with self._lock:
+            standings = self._days.get(day)
+        if standings is None:
+            tallies = load_day_tallies(db, day)
+            active = [str(c.get("id")) for c in contestants if not c.get("eliminated")]
+            standings = DailyStandings({contestant_id: tallies.get(contestant_id, 0) for contestant_id in active})
+
+        with self._lock:
+            standings = self._days.setdefault(day, standings)
+            # Follow manual eliminations and restorations from the admin dashboard
+            for contestant in contestants:
+                if contestant.get("eliminated"):
+                    standings.remove(str(contestant.get("id")))
+                else:
+                    standings.join(str(contestant.get("id")))
+            return standings
+
+    def record(self, vote):
+        """Apply a recorded vote to its day's standings, if they're loaded"""
+        with self._lock:
+            standings = self._days.get(vote.get("day"))
+            if standings is not None:
+                standings.add(vote["contestantId"], vote["count"])
+
+    def snapshot(self, db, day, contestants):
+        """Current bottom one and top three for `day`"""
+        standings = self.standings(db, day, contestants)
+        with self._lock:
+            loser = standings.bottom(1)
+            return {
+                "day": day,
+                "closed": False,
+                "bottom": {"id": loser[0][0], "votes": loser[0][1]} if loser else None,
+                "top": [{"id": contestant_id, "votes": votes} for contestant_id, votes in standings.top(TOP_PLACES)],
+                "tiedForLast": standings.tied_for_last(),
+            }
+
+    def close(self, db, day):
+        """Close `day` and drop the eliminated contestant from later days' standings"""
+        result = close_day(db, day)
+        with self._lock:
+            self._days.pop(day, None)
+            if result.get("eliminated"):
+                for standings in self._days.values():
+                    standings.remove(result["eliminated"]["id"])
+        return result
+
+
+# Shared by every request in the process
+engine = EliminationEngine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Close a competition day and eliminate its lowest-voted contestant")
+    parser.add_argument("--day", type=int, help="day to close (default: every day whose voting ended without a result)")
+    parser.add_argument("--dry-run", action="store_true", help="show the result without writing it")
+    args = parser.parse_args()
+
+    from firebase_init import get_db
+
+    logging.basicConfig(level=logging.INFO)
+    db = get_db()
+    if db is None:
+        print("Error: no Firebase credentials found; set FIREBASE_CREDENTIALS or add temp/firebase-credentials.json")
+        sys.exit(1)
+
+    clock = competition_clock.get_clock(db)
+    days = [args.day] if args.day else days_to_close(db, clock.state())
+    if not days:
+        print("Nothing to close: every day whose voting ended has a result; pass --day to close a specific day")
+        sys.exit(1)
+    if args.dry_run and len(days) > 1:
+        # Later days depend on earlier eliminations, which a dry run doesn't write
+        days = days[:1]
+
+    if vote_buffer.ENABLED:
+        behind = vote_buffer.wait_until_drained(db, clock.close_at[days[-1] - 1])
+        if behind:
+            print(f"Error: votes for day {days[-1]} are still buffered in {', '.join(behind)}; try again shortly")
+            sys.exit(1)
+
+    for day in days:
+        result = close_day(db, day, dry_run=args.dry_run)
+        if result.get("alreadyClosed"):
+            print(f"Day {day} was already closed")
+        eliminated = result["eliminated"]
+        verb = "Would eliminate" if args.dry_run else "Eliminated"
+        if eliminated:
+            print(f"Day {day}: {verb} {eliminated['name']} ({eliminated['id']}) with {eliminated['votes']} votes")
+        if len(result["tiedForLast"]) > 1:
+            print(f"Note: tied for last: {', '.join(result['tiedForLast'])}")
+        for place, entry in enumerate(result["top"], start=1):
+            print(f"  {place}. {entry['name']} ({entry['id']}): {entry['votes']} votes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Concurrent data loading for Smallie's pages
+
+A page that needs several independent reads (contestants, the competition
+clock, ...) hands them to gather(), which runs them at once on a shared,
+bounded thread pool, so the page waits for the slowest read rather than
+the sum of them. Each call runs in a copy of the caller's context, so the
+request's Flask context and Firestore accounting (firestore_accounting.py)
+carry over into the pool.
+
+Every call has a deadline (FETCH_TIMEOUT seconds, counted from when gather()
+starts). A call that fails or misses it is logged and replaced by its
+fallback, if it has one, and re-raised otherwise. A call that timed out
+can't be interrupted; it finishes in the background and its result is
+dropped.
+"""
+
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+ENABLED = os.environ.get("FETCH_POOL_ENABLED", "1") == "1"
+
+# Threads shared by all requests in the process
+WORKERS = int(os.environ.get("FETCH_WORKERS", "8"))
+
+# Seconds a page waits for any one read
+TIMEOUT = float(os.environ.get("FETCH_TIMEOUT", "3"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="fetch")
+        return _pool
+
+
+def _fallback(name, fallbacks, error):
+    if name not in fallbacks:
+        raise error
+    logging.warning(f"Falling back for {name}: {error!r}")
+    return fallbacks[name]()
+
+
+def gather(calls, fallbacks=None, timeout=TIMEOUT):
+    """
+    Run {name: function} concurrently; returns {name: result}. `fallbacks`
+    maps a name to a function giving its result if the call fails or takes
+    longer than `timeout` seconds.
+    """
+    fallbacks = fallbacks or {}
+    if not ENABLED or len(calls) < 2:
+        results = {}
+        for name, call in calls.items():
+            try:
+                results[name] = call()
+            except Exception as e:
+                results[name] = _fallback(name, fallbacks, e)
+        return results
+
+    pool = _executor()
+    futures = {name: pool.submit(contextvars.copy_context().run, call) for name, call in calls.items()}
+    deadline = time.monotonic() + timeout
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            future.cancel()
+            results[name] = _fallback(name, fallbacks, TimeoutError(f"{name} took longer than {timeout}s"))
+        except Exception as e:
+            results[name] = _fallback(name, fallbacks, e)
+    return results
@@ -0,0 +1,152 @@
+"""
+Lazy Firebase initialization shared by app.py and app_vercel.py
+
+Nothing here runs at import time. The credentials are decoded once per
+process, the firebase_admin app is initialized once (and reused if another
+module already did), and the Firestore client is created on the first call
+to get_db(). Cold starts that never touch Firestore (health checks, static
+fallbacks) skip the firebase_admin import entirely.
+
+Credentials are looked up in this order:
+1. FIREBASE_CREDENTIALS: base64-encoded JSON, a raw JSON string, or a file path
+2. temp/firebase-credentials.json next to this file
+If neither yields a working client the app runs in demo mode (get_db() returns None).
+
+The client is wrapped by firestore_accounting so each request's reads,
+writes and round trips are counted (FIRESTORE_ACCOUNTING=0 turns this off).
+"""
+
+import os
+import json
+import base64
+import logging
+import threading
+import functools
+
+import firestore_accounting
+
+CREDENTIALS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp", "firebase-credentials.json")
+
+_lock = threading.Lock()
+_db = None
+_initialized = False
+_first_client_hooks = []
+
+
+@functools.lru_cache(maxsize=1)
+def load_credentials():
+    """Decode the service account credentials once; returns a dict or None"""
+    firebase_creds = os.environ.get("FIREBASE_CREDENTIALS")
+    if firebase_creds:
+        # 1. base64-encoded JSON (recommended for Vercel)
+        try:
+            cred_dict = json.loads(base64.b64decode(firebase_creds).decode("utf-8"))
+            logging.info("Decoded base64 Firebase credentials")
+            return cred_dict
+        except Exception:
+            pass
+
+        # 2. direct JSON string
+        try:
+            cred_dict = json.loads(firebase_creds)
+            logging.info("Parsed Firebase credentials as JSON string")
+            return cred_dict
+        except Exception:
+            pass
+
+        # 3. filesystem path
+        if os.path.exists(firebase_creds):
+            try:
+                with open(firebase_creds, "r") as f:
+                    cred_dict = json.load(f)
+                logging.info(f"Loaded Firebase credentials from file: {firebase_creds}")
+                return cred_dict
+            except Exception as e:
+                logging.error(f"Failed to load credentials from file: {e}")
+
+        logging.error("Could not parse FIREBASE_CREDENTIALS from any source")
+
+    if os.path.exists(CREDENTIALS_FILE):
+        try:
+            with open(CREDENTIALS_FILE, "r") as f:
+                cred_dict = json.load(f)
+            logging.info(f"Loaded Firebase credentials from {CREDENTIALS_FILE}")
+            return cred_dict
+        except Exception as e:
+            logging.error(f"Failed to load credentials file: {e}")
+
+    return None
+
+
+def get_db():
+    """Return the shared Firestore client, creating it on first use (None in demo mode)"""
+    global _db, _initialized
+
+    if _initialized:
+        return _db
+
+    with _lock:
+        if not _initialized:
+            _db = _create_client()
+            _initialized = True
+            if _db is not None:
+                for hook in _first_client_hooks:
+                    try:
+                        hook(_db)
+                    except Exception as e:
+                        logging.error(f"Error in Firebase startup hook {hook.__name__}: {e}")
+    return _db
+
+
+def set_client(db):
+    """Use `db` as the Firestore client (local fakes, benchmarks); skips credential loading"""
+    global _db, _initialized
+    with _lock:
+        _db = firestore_accounting.wrap(db)
+        _initialized = True
+
+
+def on_first_client(hook):
+    """Register hook(db) to run once, right after the Firestore client is created"""
+    _first_client_hooks.append(hook)
+    return hook
+
+
+def is_initialized():
+    return _initialized
+
+
+def verify_id_token(id_token):
+    """Return the uid of a valid Firebase ID token, or None (invalid, expired or demo mode)"""
+    if not id_token or get_db() is None:
+        return None
+    try:
+        from firebase_admin import auth
+        return auth.verify_id_token(id_token)["uid"]
+    except Exception as e:
+        logging.info(f"Rejected Firebase ID token: {e}")
+        return None
+
+
+def _create_client():
+    cred_dict = load_credentials()
+    if cred_dict is None:
+        logging.warning("No Firebase credentials found, using demo mode with local data")
+        return None
+
+    try:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        # Reuse the default app if something else already initialized it
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(cred_dict))
+            logging.info("Firebase app initialized with credentials")
+
+        db = firestore_accounting.wrap(firestore.client())
+        logging.info("✅ Firebase Firestore connected and ready for use")
+        return db
+    except Exception as e:
+        logging.error(f"Error initializing Firebase: {e}")
+        logging.warning("⚠️ Running in local data mode - Firestore connection not available")
+        return None
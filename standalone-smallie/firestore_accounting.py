@@ -0,0 +1,325 @@
+"""
+Per-request Firestore cost accounting for Smallie
+
+wrap(client) returns a stand-in for the Firestore client that counts, for
+the request being served, the documents read, the documents written, the
+round trips and the time spent waiting on them. Collections, queries,
+document references, batches and transactions handed out by the wrapper
+are wrapped too, and unwrapped again on the way into the real client, so
+callers don't notice the difference. Work done outside a request
+(listeners, background flushes) isn't counted.
+
+install(app) starts a tally for every request and, when the response is
+ready:
+
+- adds a Server-Timing header, e.g.
+  `firestore;dur=41.2;desc="reads=11 writes=3 rpcs=4"`
+- logs a warning when the route goes over its budget (FIRESTORE_BUDGETS)
+- logs a warning when the same query or document read ran more than once
+  in the request, which usually means an N+1 loop
+
+Counts follow Firestore's billing: a query costs one read per document
+returned (at least one), get_all one per document requested, and each
+created, set, updated or deleted document is one write.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from collections import Counter
+
+from flask import g, request
+
+ENABLED = os.environ.get("FIRESTORE_ACCOUNTING", "1") == "1"
+
+# Budget for routes with no entry in ROUTE_BUDGETS
+DEFAULT_BUDGET = {"reads": 50, "writes": 20, "rpcs": 10}
+
+# Per-route budgets, keyed by route template; FIRESTORE_BUDGETS (JSON, same
+# shape) overrides or extends them. Missing limits fall back to DEFAULT_BUDGET.
+# Cached routes read nothing once warm; their budgets cover a cold cache fill.
+ROUTE_BUDGETS = {
+    "/": {"reads": 30, "writes": 0},
+    "/admin": {"reads": 0, "writes": 0},
+    "/api/leaderboard": {"reads": 30, "writes": 0},
+    "/api/clock": {"reads": 10, "writes": 0},
+    "/api/stats": {"reads": 15, "writes": 0},
+    "/api/votes": {"reads": 15, "writes": 5, "rpcs": 6},
+    "/api/signups": {"reads": 5, "writes": 2},
+}
+ROUTE_BUDGETS.update(json.loads(os.environ.get("FIRESTORE_BUDGETS", "{}")))
+
+# Identical reads within one request before it's reported as N+1
+REPEAT_THRESHOLD = int(os.environ.get("FIRESTORE_REPEAT_THRESHOLD", "2"))
+
+
+class RequestUsage:
+    """Firestore operations made while serving one request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.rpcs = 0
+        self.seconds = 0.0
+        self.queries = Counter()
+
+    def add(self, reads=0, writes=0, seconds=0.0, signature=None):
+        with self._lock:
+            self.reads += reads
+            self.writes += writes
+            self.rpcs += 1
+            self.seconds += seconds
+            if signature is not None:
+                self.queries[signature] += 1
+
+    def add_reads(self, reads):
+        # Documents streamed after the round trip was counted
+        with self._lock:
+            self.reads += reads
+
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        """[(signature, times)] for reads issued at least `threshold` times"""
+        return [(signature, times) for signature, times in self.queries.most_common() if times >= threshold]
+
+    def server_timing(self):
+        return (f'firestore;dur={self.seconds * 1000:.1f};'
+                f'desc="reads={self.reads} writes={self.writes} rpcs={self.rpcs}"')
+
+
+_usage = contextvars.ContextVar("firestore_usage", default=None)
+
+
+def current():
+    """The RequestUsage for the request being served, or None"""
+    return _usage.get()
+
+
+def _record(started, reads=0, writes=0, signature=None):
+    usage = _usage.get()
+    if usage is not None:
+        usage.add(reads=reads, writes=writes, seconds=time.perf_counter() - started, signature=signature)
+
+
+def _unwrap(value):
+    if isinstance(value, _Wrapper):
+        return value._target
+    if isinstance(value, list):
+        return [_unwrap(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_unwrap(item) for item in value)
+    return value
+
+
+def _describe(value):
+    # Short, stable text for a query argument
+    if hasattr(value, "field_path") and hasattr(value, "op_string"):
+        return f"{value.field_path} {value.op_string} {value.value!r}"
+    if isinstance(value, _Wrapper):
+        return value._name
+    text = repr(value)
+    return text if len(text) <= 80 else text[:77] + "..."
+
+
+def _path(reference):
+    path = reference.path
+    return path if isinstance(path, str) else "/".join(path)
+
+
+def _wrap(value, name):
+    kind = _KINDS.get(type(value).__name__)
+    return kind(value, name) if kind is not None else value
+
+
+class _Wrapper:
+    """Forwards everything to the wrapped object; subclasses count the costly calls"""
+
+    __slots__ = ("_target", "_name")
+
+    def __init__(self, target, name):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attribute):
+        value = getattr(self._target, attribute)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            args = _unwrap(args)
+            kwargs = {key: _unwrap(item) for key, item in kwargs.items()}
+            return self._call(attribute, value, args, kwargs)
+        return call
+
+    def __setattr__(self, attribute, value):
+        setattr(self._target, attribute, value)
+
+    def __eq__(self, other):
+        return self._target == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __repr__(self):
+        return f"<accounted {self._target!r}>"
+
+    def _call(self, attribute, method, args, kwargs):
+        # Builders (collection(), where(), ...) return wrapped children named after the chain
+        if attribute in ("on_snapshot", "listen"):
+            return method(*args, **kwargs)
+        described = [_describe(arg) for arg in args] + [f"{key}={_describe(item)}" for key, item in kwargs.items()]
+        return _wrap(method(*args, **kwargs), f"{self._name}.{attribute}({', '.join(described)})")
+
+
+class _Client(_Wrapper):
+    __slots__ = ()
+
+    def _call(self, attribute, method, args, kwargs):
+        if attribute in ("collection", "collection_group", "document"):
+            return _wrap(method(*args, **kwargs), "/".join(str(arg) for arg in args))
+        if attribute == "get_all":
+            # The references may come as a generator, which _unwrap() leaves alone
+            references = [_unwrap(ref) for ref in (args[0] if args else kwargs.pop("references"))]
+            started = time.perf_counter()
+            snapshots = list(method(references, *args[1:], **kwargs))
+            signature = f"get_all({', '.join(sorted(_path(ref) for ref in references))})"
+            _record(started, reads=len(references), signature=signature)
+            return iter(snapshots)
+        if attribute in ("batch", "transaction", "bulk_writer"):
+            return _wrap(method(*args, **kwargs), attribute)
+        return method(*args, **kwargs)
+
+
+class _Query(_Wrapper):
+    __slots__ = ()
+
+    def _call(self, attribute, method, args, kwargs):
+        if attribute == "get":
+            started = time.perf_counter()
+            result = method(*args, **kwargs)
+            _record(started, reads=max(1, len(result)) if isinstance(result, list) else 1, signature=self._name)
+            return result
+        if attribute == "stream":
+            started = time.perf_counter()
+            return self._stream(method(*args, **kwargs), started)
+        if attribute == "document":
+            return _wrap(method(*args, **kwargs), f"{self._name}/{args[0] if args else '<auto>'}")
+        return super()._call(attribute, method, args, kwargs)
+
+    def _stream(self, documents, started):
+        _record(started, signature=self._name)
+        count = 0
+        for document in documents:
+            count += 1
+            yield document
+        usage = _usage.get()
+        if usage is not None:
+            usage.add_reads(max(1, count))
+
+
+class _Document(_Wrapper):
+    __slots__ = ()
+
+    def _call(self, attribute, method, args, kwargs):
+        if attribute == "get":
+            started = time.perf_counter()
+            result = method(*args, **kwargs)
+            _record(started, reads=1, signature=f"{self._name}.get()")
+            return result
+        if attribute in ("set", "create", "update", "delete"):
+            started = time.perf_counter()
+            result = method(*args, **kwargs)
+            _record(started, writes=1)
+            return result
+        if attribute == "collection":
+            return _wrap(method(*args, **kwargs), f"{self._name}/{args[0]}")
+        return super()._call(attribute, method, args, kwargs)
+
+
+class _Batch(_Wrapper):
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self._target)
+
+    def _call(self, attribute, method, args, kwargs):
+        # Transactions commit through _commit() (firestore.transactional) or commit()
+        if attribute in ("commit", "_commit"):
+            writes = len(self._target)
+            started = time.perf_counter()
+            result = method(*args, **kwargs)
+            _record(started, writes=writes)
+            return result
+        if attribute in ("_begin", "_rollback"):
+            started = time.perf_counter()
+            result = method(*args, **kwargs)
+            _record(started)
+            return result
+        if attribute == "get":
+            # Transaction.get(ref_or_query)
+            started = time.perf_counter()
+            snapshots = list(method(*args, **kwargs))
+            _record(started, reads=max(1, len(snapshots)), signature=f"transaction.get({_describe(args[0])})")
+            return iter(snapshots)
+        return method(*args, **kwargs)
+
+
+_KINDS = {
+    "Client": _Client,
+    "FakeFirestore": _Client,
+    "CollectionReference": _Query,
+    "Query": _Query,
+    "CollectionGroup": _Query,
+    "AggregationQuery": _Query,
+    "DocumentReference": _Document,
+    "WriteBatch": _Batch,
+    "Transaction": _Batch,
+}
+
+
+def wrap(client):
+    """An accounted stand-in for a Firestore client (the client itself if accounting is off)"""
+    if not ENABLED or client is None or isinstance(client, _Wrapper):
+        return client
+    return _Client(client, "client")
+
+
+def budget_for(route):
+    return dict(DEFAULT_BUDGET, **ROUTE_BUDGETS.get(route, {}))
+
+
+def install(app):
+    """Tally Firestore use for every request `app` serves"""
+
+    @app.before_request
+    def _start_tally():
+        g._firestore_usage_token = _usage.set(RequestUsage())
+
+    @app.after_request
+    def _report_tally(response):
+        usage = _usage.get()
+        if usage is None or not usage.rpcs:
+            return response
+        response.headers.add("Server-Timing", usage.server_timing())
+
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        budget = budget_for(route)
+        over = [f"{kind} {getattr(usage, kind)}/{limit}" for kind, limit in budget.items() if getattr(usage, kind) > limit]
+        if over:
+            logging.warning(f"Firestore budget exceeded on {request.method} {route}: {', '.join(over)}")
+        for signature, times in usage.repeated():
+            logging.warning(f"Possible N+1 on {request.method} {route}: {signature} ran {times} times")
+        return response
+
+    @app.teardown_request
+    def _end_tally(error=None):
+        token = g.pop("_firestore_usage_token", None)
+        if token is not None:
+            try:
+                _usage.reset(token)
+            except ValueError:
+                # Torn down in another context (streamed responses); just clear it
+                _usage.set(None)
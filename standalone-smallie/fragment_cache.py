@@ -0,0 +1,111 @@
+"""
+Fragment-cached page rendering for Smallie
+
+A page is rendered once as a shell, with placeholders where its dynamic
+fragments go, and each fragment is rendered on its own and cached under a
+key describing the data it shows (the contestants version, the competition
+day). A page view looks up the shell and fragments and joins the strings;
+only a fragment whose key changed is rendered again.
+
+Set FRAGMENT_CACHE_ENABLED=0 to render everything on every request, e.g.
+while editing templates.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from markupsafe import Markup
+
+ENABLED = os.environ.get("FRAGMENT_CACHE_ENABLED", "1") == "1"
+
+# Rendered fragments kept per process (a few keys per fragment are live at once)
+MAX_ENTRIES = int(os.environ.get("FRAGMENT_CACHE_SIZE", "64"))
+
+_SLOT = "\x00fragment:{}\x00"
+
+
+class FragmentCache:
+    """LRU of rendered strings keyed by (fragment name, data key)"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, enabled=ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.renders = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, name, key, render):
+        """The cached output of render() for (name, key), rendering it on a miss"""
+        if not self.enabled:
+            self.renders += 1
+            return render()
+        cache_key = (name, key)
+        with self._lock:
+            if cache_key in self._entries:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return self._entries[cache_key]
+
+        # Rendered outside the lock; two threads may both render a new key once
+        value = render()
+        with self._lock:
+            self.renders += 1
+            self._entries[cache_key] = value
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def page(self, name, key, render_shell, fragments):
+        """
+        Assemble a page. render_shell(slots) renders the shell with `slots`
+        (a {fragment name: placeholder} mapping) in place of the fragments;
+        `fragments` maps each fragment name to (key, render function).
+        """
+        def split_shell():
+            slots = {fragment: Markup(_SLOT.format(fragment)) for fragment in fragments}
+            parts = [render_shell(slots)]
+            for fragment in fragments:
+                parts = [piece for part in parts
+                         for piece in _split_keep(part, _SLOT.format(fragment), fragment)]
+            return parts
+
+        out = []
+        for part in self.get(name, key, split_shell):
+            if isinstance(part, _Slot):
+                fragment_key, render = fragments[part.name]
+                part = self.get(part.name, fragment_key, render)
+            out.append(part)
+        return "".join(out)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "renders": self.renders, "entries": len(self._entries)}
+
+
+class _Slot:
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+def _split_keep(part, placeholder, fragment):
+    # Split a shell piece around a placeholder, leaving a _Slot where it was
+    if not isinstance(part, str) or placeholder not in part:
+        return [part]
+    pieces = part.split(placeholder)
+    result = [pieces[0]]
+    for piece in pieces[1:]:
+        result += [_Slot(fragment), piece]
+    return result
+
+
+# Shared by every request in the process
+fragments = FragmentCache()
@@ -0,0 +1,103 @@
+"""
+Idempotency keys for the vote path
+
+Payment callbacks and double-clicks can submit the same vote twice. Votes
+carry an idempotency key (the payment provider's transaction id, or a key the
+browser generates per vote), and IdempotencyGuard sits in front of the
+durable record of it:
+
+- an LRU of recently seen keys and their results answers replays in O(1)
+  without touching Firestore;
+- concurrent requests with the same key are held off while the first is
+  in flight.
+
+The durable record is the vote document itself (votes/{key}, written with
+create()), so a replay this process doesn't remember (another instance,
+a restart) still fails atomically instead of double counting; the caller
+then answers it from the recorded vote. Callers that don't write the vote
+right away (write-behind voting) pass load_record to claim() to check the
+durable record first.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+# Recently seen keys whose results are kept for replays
+LRU_SIZE = int(os.environ.get("IDEMPOTENCY_LRU_SIZE", "10000"))
+
+# Outcomes of IdempotencyGuard.claim()
+NEW = "new"
+DUPLICATE = "duplicate"
+IN_PROGRESS = "in_progress"
+
+
+class IdempotencyGuard:
+    """In-memory front for a durable idempotency record"""
+
+    def __init__(self, lru_size=LRU_SIZE):
+        self.lru_size = lru_size
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._pending = set()
+        self.replays = 0
+        self.durable_lookups = 0
+        self.durable_hits = 0
+
+    def claim(self, key, load_record=None):
+        """
+        Claim `key` for processing. Returns (NEW, None) when the caller should
+        go ahead (and must call release() afterwards), (DUPLICATE, result) for
+        a replay, or (IN_PROGRESS, None) while another request holds the key.
+        load_record(key), if given, is called for keys the LRU doesn't know;
+        it returns the durable record's result or None.
+        """
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.replays += 1
+                return DUPLICATE, result
+            if key in self._pending:
+                return IN_PROGRESS, None
+            self._pending.add(key)
+
+        if load_record is not None:
+            self.durable_lookups += 1
+            try:
+                record = load_record(key)
+            except Exception:
+                # The durable write still rejects a real replay
+                record = None
+            if record is not None:
+                self.durable_hits += 1
+                self.release(key, record)
+                with self._lock:
+                    self.replays += 1
+                return DUPLICATE, record
+        return NEW, None
+
+    def release(self, key, result=None):
+        """Finish processing `key`; remember `result` if the operation succeeded"""
+        with self._lock:
+            self._pending.discard(key)
+            if result is None:
+                return
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.lru_size:
+                self._results.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_keys": len(self._results),
+                "in_flight": len(self._pending),
+                "replays": self.replays,
+                "durable_lookups": self.durable_lookups,
+                "durable_hits": self.durable_hits,
+            }
+
+
+# Shared by every vote request in the process
+vote_keys = IdempotencyGuard()
@@ -0,0 +1,182 @@
+"""
+Server-Sent Events leaderboard for Smallie
+
+One background thread per process polls the in-memory contestants cache
+(which the Firestore listeners keep current), ranks the contestants and
+fans the result out to every connected viewer. New subscribers get the
+full board once; after that only the entries whose rank, votes or
+elimination status changed are sent. Firestore load therefore depends on
+the cache, not on the number of open browser tabs.
+
+Each open stream holds a worker thread, so streams are closed after
+MAX_STREAM_SECONDS; the browser reconnects after the `retry:` delay and
+gets a fresh snapshot. Serverless functions can't hold a connection open
+(Vercel cuts them off at the function's maxDuration), so streaming is off
+when VERCEL_DEPLOYMENT=1 and browsers poll /api/leaderboard instead.
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+
+# Seconds between leaderboard recomputations
+POLL_INTERVAL = float(os.environ.get("LEADERBOARD_POLL_INTERVAL", "2"))
+
+# Seconds between keep-alive comments on idle streams
+HEARTBEAT_INTERVAL = 15
+
+# Messages buffered per subscriber before it is considered too slow and dropped
+SUBSCRIBER_QUEUE_SIZE = 32
+
+# Milliseconds the browser waits before reconnecting a dropped stream
+RETRY_MS = 3000
+
+# Seconds a stream stays open before the browser is made to reconnect
+MAX_STREAM_SECONDS = float(os.environ.get("LEADERBOARD_STREAM_MAX_SECONDS", "300"))
+
+# Set LEADERBOARD_STREAM_ENABLED=1 to stream on Vercel anyway, or 0 to turn it off elsewhere
+STREAM_ENABLED = os.environ.get(
+    "LEADERBOARD_STREAM_ENABLED", "0" if os.environ.get("VERCEL_DEPLOYMENT") == "1" else "1") == "1"
+
+
+def rank_contestants(contestants):
+    """Return {id: entry} with 1-based ranks, highest votes first"""
+    ordered = sorted(contestants, key=lambda c: int(c.get("votes") or 0), reverse=True)
+    board = {}
+    for rank, contestant in enumerate(ordered, start=1):
+        contestant_id = str(contestant.get("id"))
+        board[contestant_id] = {
+            "id": contestant_id,
+            "name": contestant.get("name", ""),
+            "votes": int(contestant.get("votes") or 0),
+            "eliminated": bool(contestant.get("eliminated")),
+            "rank": rank,
+        }
+    return board
+
+
+def diff_boards(old, new):
+    """Return the entries of `new` that differ from `old`, plus removed ids"""
+    changed = [entry for contestant_id, entry in new.items() if old.get(contestant_id) != entry]
+    removed = [contestant_id for contestant_id in old if contestant_id not in new]
+    return changed, removed
+
+
+def format_event(event, data):
+    """Encode one SSE message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class LeaderboardBroadcaster:
+    """Holds the current leaderboard and pushes changes to subscriber queues"""
+
+    def __init__(self, load_contestants, interval=POLL_INTERVAL):
+        self.load_contestants = load_contestants
+        self.interval = interval
+        self.version = 0
+        self._board = {}
+        self._refreshed_at = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def snapshot(self):
+        """Return the current board as a list ordered by rank"""
+        with self._lock:
+            board = self._board
+        return sorted(board.values(), key=lambda entry: entry["rank"])
+
+    def subscribe(self):
+        """Register a new viewer and return its message queue"""
+        if not self._board:
+            self.refresh()
+
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            subscriber.put_nowait(self._snapshot_event())
+            self._subscribers.add(subscriber)
+            self._ensure_thread()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def refresh_if_stale(self):
+        """Refresh unless the board was recomputed in the last `interval` seconds"""
+        refreshed_at = self._refreshed_at
+        if refreshed_at is None or time.monotonic() - refreshed_at >= self.interval:
+            self.refresh()
+
+    def refresh(self):
+        """Recompute the board and broadcast changed entries"""
+        try:
+            contestants = self.load_contestants() or []
+        except Exception as e:
+            logging.error(f"Error loading contestants for leaderboard: {e}")
+            return
+        self._refreshed_at = time.monotonic()
+
+        board = rank_contestants(contestants)
+        with self._lock:
+            changed, removed = diff_boards(self._board, board)
+            if not changed and not removed:
+                return
+
+            self._board = board
+            self.version += 1
+            message = format_event("update", {"version": self.version, "entries": changed, "removed": removed})
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    # Too slow to keep up; replace its backlog with one full snapshot
+                    with subscriber.mutex:
+                        subscriber.queue.clear()
+                    subscriber.put_nowait(self._snapshot_event())
+
+    def stream(self, subscriber, max_seconds=MAX_STREAM_SECONDS):
+        """Yield SSE messages for one subscriber until it disconnects or `max_seconds` pass"""
+        deadline = time.monotonic() + max_seconds
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    yield subscriber.get(timeout=min(HEARTBEAT_INTERVAL, remaining))
+                except queue.Empty:
+                    if time.monotonic() < deadline:
+                        yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _snapshot_event(self):
+        # Must be called with the lock held
+        return format_event("snapshot", {
+            "version": self.version,
+            "entries": sorted(self._board.values(), key=lambda entry: entry["rank"]),
+        })
+
+    def _ensure_thread(self):
+        # Must be called with the lock held
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="leaderboard-broadcaster", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            self.refresh()
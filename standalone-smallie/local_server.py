@@ -0,0 +1,311 @@
+"""
+Threaded HTTP/1.1 front end for running Smallie without Vercel
+
+A small WSGI server on the standard library. Connections are served by a
+fixed pool of worker threads and kept alive between requests. Each request
+gets a full PEP 3333 environ (query string, body, headers), and the WSGI
+iterable is written out chunk by chunk as the app produces it, so the
+leaderboard SSE stream works and large pages never need to be buffered.
+
+    python local_server.py              # HOST / PORT / HTTP_WORKERS from the environment
+"""
+
+import os
+import sys
+import socket
+import logging
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote_to_bytes
+from concurrent.futures import ThreadPoolExecutor
+
+# Worker threads; each one serves one open connection at a time (SSE viewers included)
+WORKERS = int(os.environ.get("HTTP_WORKERS", "256"))
+
+# Seconds an idle keep-alive connection is held open before it is closed
+KEEPALIVE_TIMEOUT = float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", "5"))
+
+# Pending connections the listening socket queues while all workers are busy
+LISTEN_BACKLOG = 512
+
+# Request bodies left unread by the app are drained up to this size to keep the
+# connection reusable; anything larger closes the connection instead
+MAX_DRAIN = 1024 * 1024
+
+# Headers the server manages itself
+_HOP_BY_HOP = {"connection", "keep-alive", "transfer-encoding"}
+
+
+class LimitedInput:
+    """wsgi.input that stops at Content-Length so the next request stays intact"""
+
+    def __init__(self, rfile, length):
+        self.rfile = rfile
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.rfile.read(size)
+        self.remaining -= len(data)
+        if len(data) < size:
+            # Client went away mid-body
+            self.remaining = 0
+        return data
+
+    def readline(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        line = self.rfile.readline(size)
+        self.remaining -= len(line)
+        return line
+
+    def readlines(self, hint=-1):
+        return list(iter(self.readline, b""))
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+    def drain(self):
+        """Discard the unread rest of the body; False if it was too large to bother"""
+        if self.remaining > MAX_DRAIN:
+            return False
+        while self.remaining > 0:
+            if not self.read(min(self.remaining, 65536)):
+                return False
+        return True
+
+
+class WSGIRequestHandler(BaseHTTPRequestHandler):
+    """Runs `app` for every request on a persistent HTTP/1.1 connection"""
+
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # body waits on the client's delayed ACK (~40ms per keep-alive request)
+    disable_nagle_algorithm = True
+    app = None
+
+    def do_GET(self):
+        self.handle_wsgi()
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = do_GET
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+    def make_environ(self):
+        path, _, query = self.path.partition("?")
+        path_info = unquote_to_bytes(path).decode("latin-1") if "%" in path else path
+
+        try:
+            content_length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            content_length = 0
+
+        server_name, server_port = self.server.server_address[:2]
+        environ = {
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": self.headers.get("X-Forwarded-Proto", "http"),
+            "wsgi.input": LimitedInput(self.rfile, content_length),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+            "REQUEST_METHOD": self.command,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": path_info,
+            "QUERY_STRING": query,
+            "SERVER_NAME": getattr(self.server, "server_name", None) or str(server_name),
+            "SERVER_PORT": str(server_port),
+            "SERVER_PROTOCOL": self.request_version,
+            "REMOTE_ADDR": self.client_address[0],
+            "CONTENT_TYPE": self.headers.get("Content-Type", ""),
+            "CONTENT_LENGTH": str(content_length) if content_length else "",
+        }
+
+        for key, value in self.headers.items():
+            name = key.upper().replace("-", "_")
+            if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                continue
+            name = f"HTTP_{name}"
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+        return environ
+
+    def handle_wsgi(self):
+        environ = self.make_environ()
+        response = ResponseWriter(self)
+        try:
+            body_iter = self.app(environ, response.start_response)
+            try:
+                for chunk in body_iter:
+                    response.write(chunk)
+                response.finish()
+            finally:
+                close = getattr(body_iter, "close", None)
+                if close is not None:
+                    close()
+        except (BrokenPipeError, ConnectionResetError, socket.timeout):
+            # Viewer disconnected (typically an SSE tab being closed)
+            self.close_connection = True
+            return
+        except Exception:
+            logging.exception(f"Unhandled error serving {self.command} {self.path}")
+            if response.headers_sent:
+                # Can't send a status any more; the truncated response must not be reused
+                self.close_connection = True
+                return
+            response.send_error()
+
+        if not environ["wsgi.input"].drain():
+            self.close_connection = True
+
+
+class ResponseWriter:
+    """start_response/write for one request, choosing Content-Length or chunked framing"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.status = None
+        self.headers = None
+        self.headers_sent = False
+        self.chunked = False
+        self.head = handler.command == "HEAD"
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info:
+            try:
+                if self.headers_sent:
+                    raise exc_info[1].with_traceback(exc_info[2])
+            finally:
+                exc_info = None
+        elif self.status is not None:
+            raise AssertionError("start_response() called twice without exc_info")
+        self.status = status
+        self.headers = headers
+        return self.write
+
+    def write(self, data):
+        if not self.headers_sent:
+            self._send_headers(body_known=False)
+        if not data or self.head:
+            return
+        wfile = self.handler.wfile
+        if self.chunked:
+            wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        else:
+            wfile.write(data)
+        # Flush each chunk so streamed responses reach the browser immediately
+        wfile.flush()
+
+    def finish(self):
+        if not self.headers_sent:
+            # Nothing was yielded; the response is empty
+            self._send_headers(body_known=True)
+        elif self.chunked and not self.head:
+            self.handler.wfile.write(b"0\r\n\r\n")
+            self.handler.wfile.flush()
+
+    def send_error(self):
+        self.status = "500 Internal Server Error"
+        self.headers = [("Content-Type", "application/json")]
+        body = b'{"status":"error","message":"Internal server error"}'
+        self.headers.append(("Content-Length", str(len(body))))
+        self._send_headers(body_known=True)
+        if not self.head:
+            self.handler.wfile.write(body)
+
+    def _send_headers(self, body_known):
+        if self.status is None:
+            raise AssertionError("write() before start_response()")
+        handler = self.handler
+        code, _, reason = self.status.partition(" ")
+        handler.send_response(int(code), reason)
+
+        has_length = False
+        for name, value in self.headers:
+            lowered = name.lower()
+            if lowered in _HOP_BY_HOP:
+                continue
+            if lowered == "content-length":
+                has_length = True
+            handler.send_header(name, value)
+
+        no_body = self.head or int(code) in (204, 304) or int(code) < 200
+        if not has_length and not no_body:
+            if body_known:
+                handler.send_header("Content-Length", "0")
+            elif handler.request_version == "HTTP/1.1":
+                self.chunked = True
+                handler.send_header("Transfer-Encoding", "chunked")
+            else:
+                # HTTP/1.0 without a length: the end of the body is the end of the connection
+                handler.close_connection = True
+
+        if handler.close_connection:
+            handler.send_header("Connection", "close")
+        elif handler.request_version == "HTTP/1.0":
+            handler.send_header("Connection", "keep-alive")
+        handler.end_headers()
+        self.headers_sent = True
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands each accepted connection to a bounded thread pool"""
+
+    request_queue_size = LISTEN_BACKLOG
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers=WORKERS):
+        super().__init__(server_address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http-worker")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def make_server(app, host="127.0.0.1", port=5000, workers=WORKERS, handler_class=WSGIRequestHandler):
+    """Bind a pooled server for `app` without starting it"""
+    handler = type("BoundWSGIRequestHandler", (handler_class,), {"app": staticmethod(app)})
+    return PooledHTTPServer((host, port), handler, workers=workers)
+
+
+def serve(app, host="0.0.0.0", port=5000, workers=WORKERS):
+    """Serve `app` until interrupted"""
+    server = make_server(app, host, port, workers)
+    logging.info(f"Serving on http://{host}:{port} with {workers} worker threads")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def serve_in_thread(app, host="127.0.0.1", port=0, workers=WORKERS):
+    """Start a server on a background thread; returns it (server.server_address has the port)"""
+    server = make_server(app, host, port, workers)
+    threading.Thread(target=server.serve_forever, name="http-server", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    from app import app
+
+    serve(app, os.environ.get("HOST", "0.0.0.0"), int(os.environ.get("PORT", "5000")))
@@ -0,0 +1,191 @@
+"""
+Request metrics for Smallie in Prometheus text format
+
+install(app) hooks a Flask app so every request is counted by method, route
+template (e.g. /api/eliminations/<int:day>) and status, timed into a
+latency histogram, and tracked in an in-flight gauge. /metrics serves them
+for Prometheus to scrape.
+
+Each thread records into its own shard of plain dicts, so the request path
+never takes a lock; a scrape sums the shards. When a thread exits (e.g. the
+thread-per-request dev server), its shard is folded into a retired
+aggregate, so counters never go backwards and memory stays bounded by the
+number of live threads. On Vercel every function instance keeps its
+own numbers; scrape a self-hosted run (local_server.py, gunicorn) for
+totals.
+"""
+
+import time
+import bisect
+import weakref
+import threading
+
+from flask import g, request
+
+# Histogram bucket upper bounds in seconds (Prometheus' defaults)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Route label for requests that matched no route (404s)
+UNMATCHED = "unmatched"
+
+
+class _Shard:
+    """One thread's counters; only its own thread writes to it"""
+
+    def __init__(self):
+        self.requests = {}      # (method, route, status) -> count
+        self.durations = {}     # (method, route) -> [bucket counts..., +Inf count, sum]
+        self.in_flight = {}     # (method, route) -> requests being served
+
+    def merge_into(self, requests, durations, in_flight):
+        # Copy before iterating: the owning thread may add keys meanwhile
+        for key, count in list(self.requests.items()):
+            requests[key] = requests.get(key, 0) + count
+        for key, histogram in list(self.durations.items()):
+            merged = durations.setdefault(key, [0] * len(histogram))
+            for index, value in enumerate(list(histogram)):
+                merged[index] += value
+        for key, count in list(self.in_flight.items()):
+            in_flight[key] = in_flight.get(key, 0) + count
+
+
+class _ThreadKey:
+    # Lives in the thread's local storage, so it's dropped when the thread exits
+    __slots__ = ("__weakref__",)
+
+
+class RequestMetrics:
+    """Per-route request counters, latency histograms and in-flight gauges"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started_at = time.time()
+        self._local = threading.local()
+        self._shards_lock = threading.Lock()
+        self._shards = {}
+        self._retired = _Shard()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            owner = self._local.owner = _ThreadKey()
+            with self._shards_lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, self._retire, id(shard))
+        return shard
+
+    def _retire(self, shard_id):
+        # The thread is gone, so nothing writes to its shard any more
+        with self._shards_lock:
+            shard = self._shards.pop(shard_id, None)
+            if shard is not None:
+                shard.merge_into(self._retired.requests, self._retired.durations, self._retired.in_flight)
+
+    def start(self, method, route):
+        """Count a request as in flight"""
+        in_flight = self._shard().in_flight
+        key = (method, route)
+        in_flight[key] = in_flight.get(key, 0) + 1
+
+    def finish(self, method, route, status, seconds):
+        """Record a finished request and take it out of the in-flight gauge"""
+        shard = self._shard()
+        key = (method, route)
+        shard.in_flight[key] = shard.in_flight.get(key, 0) - 1
+
+        series = (method, route, str(status))
+        shard.requests[series] = shard.requests.get(series, 0) + 1
+
+        histogram = shard.durations.get(key)
+        if histogram is None:
+            histogram = shard.durations[key] = [0] * (len(self.buckets) + 2)
+        histogram[bisect.bisect_left(self.buckets, seconds)] += 1
+        histogram[-1] += seconds
+
+    def _merge(self):
+        requests, durations, in_flight = {}, {}, {}
+        with self._shards_lock:
+            # Retiring a shard also takes the lock, so none is counted twice or missed
+            self._retired.merge_into(requests, durations, in_flight)
+            for shard in self._shards.values():
+                shard.merge_into(requests, durations, in_flight)
+        return requests, durations, in_flight
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        requests, durations, in_flight = self._merge()
+        lines = [
+            "# HELP smallie_http_requests_total Requests served, by method, route and status.",
+            "# TYPE smallie_http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(f"smallie_http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        lines += [
+            "# HELP smallie_http_request_duration_seconds Request latency, by method and route.",
+            "# TYPE smallie_http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(durations.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), histogram[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append("smallie_http_request_duration_seconds_bucket"
+                             f"{_labels(method=method, route=route, le=le)} {cumulative}")
+            labels = _labels(method=method, route=route)
+            lines.append(f"smallie_http_request_duration_seconds_sum{labels} {histogram[-1]:.6f}")
+            lines.append(f"smallie_http_request_duration_seconds_count{labels} {cumulative}")
+
+        lines += [
+            "# HELP smallie_http_requests_in_flight Requests being served, by method and route.",
+            "# TYPE smallie_http_requests_in_flight gauge",
+        ]
+        for (method, route), count in sorted(in_flight.items()):
+            lines.append(f"smallie_http_requests_in_flight{_labels(method=method, route=route)} {count}")
+
+        lines += [
+            "# HELP smallie_process_start_time_seconds Unix time the process started.",
+            "# TYPE smallie_process_start_time_seconds gauge",
+            f"smallie_process_start_time_seconds {self.started_at:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def install(app, metrics):
+    """Record every request `app` serves in `metrics`"""
+
+    @app.before_request
+    def _start_timer():
+        route = request.url_rule.rule if request.url_rule is not None else UNMATCHED
+        g._metrics = (request.method, route, time.perf_counter())
+        metrics.start(request.method, route)
+
+    @app.after_request
+    def _record_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_timer(error=None):
+        started = g.pop("_metrics", None)
+        if started is None:
+            return
+        method, route, began = started
+        # No response means the view raised and Flask answered 500
+        status = g.pop("_metrics_status", 500)
+        metrics.finish(method, route, status, time.perf_counter() - began)
+
+
+# Shared by every request in the process
+request_metrics = RequestMetrics()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Backfill the day and hour buckets on existing vote documents
+
+Votes are now stamped with the competition day and the WAT hour they were
+cast in (competition_clock.buckets()), so daily and hourly queries are
+equality filters on an index instead of timestamp ranges. This migration
+stamps votes recorded before that, computing the buckets from each vote's
+votedAt (write-behind votes) or timestamp.
+
+The votes collection is split into --partitions ranges of document id,
+scanned in parallel by --workers threads, a page of PAGE_SIZE documents at
+a time; each page's updates go out in one batch. Only votes missing a
+bucket are written (with --fix-days, votes whose day disagrees with the
+clock are corrected too), so re-running is cheap and safe.
+
+The payout ledger (payouts.py) counted unstamped votes toward its total
+only, so after a run that updated votes it is reset and recounted on the
+next rollup, with the backfilled days.
+
+Progress is saved to --state after every page, and a re-run picks up each
+partition after the last vote it finished. Delete the state file to start
+over.
+
+Usage:
+    python migrate_vote_buckets.py [--workers 8] [--partitions 16] [--fix-days]
+                                   [--dry-run] [--rebuild-stats]
+
+Credentials come from FIREBASE_CREDENTIALS or temp/firebase-credentials.json,
+exactly as for the app (see firebase_init.py).
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import payouts
+import vote_stats
+import competition_clock
+
+# Documents per query page and per batched update (Firestore's batch limit)
+PAGE_SIZE = 500
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp", "vote-bucket-migration.json")
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 10
+
+# Firestore auto-ids are drawn from these characters (in id order); partition
+# boundaries are spread over them. Ids outside the alphabet (idempotency keys)
+# still land in the first or last partition, which are open-ended.
+ID_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+
+def partition_ranges(count):
+    """`count` contiguous [start, end) document id ranges covering every id"""
+    count = max(1, min(count, len(ID_ALPHABET)))
+    bounds = [ID_ALPHABET[len(ID_ALPHABET) * i // count] for i in range(1, count)]
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def vote_time(vote):
+    """Unix time a vote was cast, or None if it has no usable timestamp"""
+    value = vote.get("votedAt") or vote.get("timestamp")
+    if hasattr(value, "timestamp"):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def bucket_update(vote, clock, fix_days=False):
+    """The bucket fields to write on a vote, or None if it needs nothing"""
+    when = vote_time(vote)
+    if when is None:
+        return None
+    buckets = clock.buckets(when)
+    update = {}
+    if vote.get("day") is None or (fix_days and vote.get("day") != buckets["day"]):
+        update["day"] = buckets["day"]
+    if not vote.get("hour"):
+        update["hour"] = buckets["hour"]
+    return update or None
+
+
+class Progress:
+    """Per-partition resume points, saved to a JSON file after every page"""
+
+    def __init__(self, path, ranges, save=True):
+        self.path = path
+        self.save_enabled = save
+        self._lock = threading.Lock()
+        self._last_logged = time.monotonic()
+        self.partitions = {str(index): {"last_id": None, "done": False, "scanned": 0, "updated": 0, "skipped": 0}
+                           for index in range(len(ranges))}
+        self.ranges = [list(bounds) for bounds in ranges]
+
+        if save and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("ranges") != self.ranges:
+                raise SystemExit(f"Error: {path} was written with a different --partitions; "
+                                 "re-run with the same value or delete the file to start over")
+            self.partitions.update(saved["partitions"])
+
+    def get(self, index):
+        with self._lock:
+            return dict(self.partitions[str(index)])
+
+    def record(self, index, last_id, scanned, updated, skipped, done=False):
+        with self._lock:
+            entry = self.partitions[str(index)]
+            entry["last_id"] = last_id or entry["last_id"]
+            entry["scanned"] += scanned
+            entry["updated"] += updated
+            entry["skipped"] += skipped
+            entry["done"] = done
+            if self.save_enabled:
+                self._save()
+            if done or time.monotonic() - self._last_logged >= PROGRESS_INTERVAL:
+                self._last_logged = time.monotonic()
+                totals = self.totals()
+                logging.info(f"{totals['done']}/{len(self.partitions)} partitions done, "
+                             f"{totals['scanned']} votes scanned, {totals['updated']} updated")
+
+    def totals(self):
+        entries = self.partitions.values()
+        return {
+            "done": sum(1 for entry in entries if entry["done"]),
+            "scanned": sum(entry["scanned"] for entry in entries),
+            "updated": sum(entry["updated"] for entry in entries),
+            "skipped": sum(entry["skipped"] for entry in entries),
+        }
+
+    def _save(self):
+        # Must be called with the lock held; write-then-rename so a crash never leaves half a file
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"ranges": self.ranges, "partitions": self.partitions}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def migrate_partition(db, clock, index, bounds, progress, fix_days=False, dry_run=False):
+    """Scan one id range page by page, stamping the votes that are missing buckets"""
+    start, end = bounds
+    state = progress.get(index)
+    if state["done"]:
+        return
+
+    votes = db.collection("votes")
+    base = votes.order_by("__name__")
+    if end is not None:
+        base = base.end_before({"__name__": end})
+
+    last_id = state["last_id"]
+    while True:
+        if last_id is not None:
+            query = base.start_after({"__name__": last_id})
+        elif start is not None:
+            query = base.start_at({"__name__": start})
+        else:
+            query = base
+        docs = list(query.limit(PAGE_SIZE).get())
+
+        updates, skipped = [], 0
+        for doc in docs:
+            vote = doc.to_dict() or {}
+            update = bucket_update(vote, clock, fix_days)
+            if update:
+                updates.append((doc.reference, update))
+            elif vote_time(vote) is None:
+                skipped += 1
+
+        if updates and not dry_run:
+            batch = db.batch()
+            for reference, update in updates:
+                batch.update(reference, update)
+            batch.commit()
+
+        if docs:
+            last_id = docs[-1].id
+        done = len(docs) < PAGE_SIZE
+        progress.record(index, last_id, len(docs), len(updates), skipped, done=done)
+        if done:
+            return
+
+
+def migrate(db, workers=8, partitions=16, state_path=DEFAULT_STATE_PATH, fix_days=False, dry_run=False):
+    """Backfill every partition in parallel; returns the totals"""
+    clock = competition_clock.get_clock(db)
+    ranges = partition_ranges(partitions)
+    progress = Progress(state_path, ranges, save=not dry_run)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vote-buckets") as pool:
+        futures = [pool.submit(migrate_partition, db, clock, index, bounds, progress, fix_days, dry_run)
+                   for index, bounds in enumerate(ranges)]
+        # Surface the first failure; finished partitions keep their progress for a re-run
+        for future in futures:
+            future.result()
+    return progress.totals()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill day and hour buckets on existing votes")
+    parser.add_argument("--workers", type=int, default=8, help="partitions scanned at once (default 8)")
+    parser.add_argument("--partitions", type=int, default=16, help="document id ranges to split the votes into (default 16)")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="progress file used to resume")
+    parser.add_argument("--fix-days", action="store_true", help="also correct votes whose day disagrees with the clock")
+    parser.add_argument("--dry-run", action="store_true", help="count the votes that would change without writing")
+    parser.add_argument("--rebuild-stats", action="store_true",
+                        help="rebuild the vote aggregates afterwards, so hourly totals include old votes (pause voting first)")
+    args = parser.parse_args()
+
+    from firebase_init import get_db
+
+    logging.basicConfig(level=logging.INFO)
+    db = get_db()
+    if db is None:
+        print("Error: no Firebase credentials found; set FIREBASE_CREDENTIALS or add temp/firebase-credentials.json")
+        sys.exit(1)
+
+    started = time.monotonic()
+    totals = migrate(db, workers=args.workers, partitions=args.partitions, state_path=args.state,
+                     fix_days=args.fix_days, dry_run=args.dry_run)
+    verb = "Would update" if args.dry_run else "Updated"
+    print(f"{verb} {totals['updated']} of {totals['scanned']} votes scanned "
+          f"in {time.monotonic() - started:.1f}s")
+    if totals["skipped"]:
+        print(f"Note: {totals['skipped']} votes have no timestamp and were left alone")
+
+    if totals["updated"] and not args.dry_run:
+        payouts.reset(db)
+        print("Reset the payout ledger; the next rollup recounts it with the backfilled days")
+
+    if args.rebuild_stats and not args.dry_run:
+        vote_stats.rebuild(db)
+        print("Rebuilt the vote aggregates")
+
+
+if __name__ == "__main__":
+    main()
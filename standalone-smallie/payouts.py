@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Payout ledger for Smallie
+
+Rolls the votes collection up into one row per competition day plus a
+running total (payout_ledger/day_{n}, payout_ledger/total), resuming from
+a stored checkpoint: the (timestamp, id) of the last vote processed. Each
+page of new votes is folded in with one transaction that reads the
+checkpoint, so concurrent rollups can't count a vote twice, and history is
+never rescanned.
+
+Revenue is kept in integer cents (exact, and incrementable in Firestore);
+shares, the 50/30/20 split and currency conversions use Decimal and round
+down, so the amounts paid never exceed the pool and any remainder is
+reported as unallocated.
+
+Votes recorded before they were stamped with a day count toward the total
+only (and `undated_votes` on it), never toward a day row. Once
+migrate_vote_buckets.py has backfilled their days it calls reset(), and
+the next rollup recounts every vote from the start.
+
+/api/payouts/daily/<day> and /api/payouts/final read the precomputed rows
+(two documents) and bring the ledger up to date at most every
+PAYOUT_ROLLUP_INTERVAL seconds. To catch up by hand:
+
+    python payouts.py
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from decimal import Decimal, ROUND_DOWN
+
+import vote_counters
+from elimination import id_order
+
+# firebase_admin is imported inside the write helpers so cold starts don't pay for it
+
+LEDGER_COLLECTION = "payout_ledger"
+CHECKPOINT_DOC = "checkpoint"
+TOTAL_DOC = "total"
+
+# Votes folded in per transaction, and pages per refresh before yielding
+PAGE_SIZE = 500
+MAX_PAGES = int(os.environ.get("PAYOUT_ROLLUP_MAX_PAGES", "20"))
+
+# Seconds between rollups triggered by the payout endpoints
+ROLLUP_INTERVAL = float(os.environ.get("PAYOUT_ROLLUP_INTERVAL", "30"))
+
+VOTE_PRICE = Decimal(str(vote_counters.VOTE_PRICE))
+DAILY_SHARE = Decimal("0.09")
+PRIZE_POOL_SHARE = Decimal("0.90")
+
+# Split of a pool between 1st, 2nd and 3rd place
+PLACE_SHARES = (Decimal("0.5"), Decimal("0.3"), Decimal("0.2"))
+
+# Conversion rates for the payout screens
+NGN_PER_USD = Decimal(os.environ.get("PAYOUT_NGN_PER_USD", "480"))
+USD_PER_SOL = Decimal(os.environ.get("PAYOUT_USD_PER_SOL", "240"))
+
+CENT = Decimal("0.01")
+LAMPORT = Decimal("0.000000001")
+
+
+def vote_cents(vote):
+    """Revenue of one vote document in cents (price is set server-side, not read from the vote)"""
+    count = int(vote.get("count") or 1)
+    return int(count * VOTE_PRICE * 100)
+
+
+def _day_row(day):
+    return f"day_{day}"
+
+
+def rollup_page(db, page_size=PAGE_SIZE):
+    """Fold the next page of votes after the checkpoint into the ledger; returns votes processed"""
+    from firebase_admin import firestore
+
+    ledger = db.collection(LEDGER_COLLECTION)
+    checkpoint_ref = ledger.document(CHECKPOINT_DOC)
+
+    @firestore.transactional
+    def apply(transaction):
+        checkpoint = checkpoint_ref.get(transaction=transaction).to_dict() or {}
+        query = db.collection("votes").order_by("timestamp").order_by("__name__").limit(page_size)
+        if checkpoint.get("timestamp") is not None:
+            query = query.start_after({"timestamp": checkpoint["timestamp"], "__name__": checkpoint["vote_id"]})
+        votes = list(query.get(transaction=transaction))
+        if not votes:
+            return 0
+
+        rows = {}
+        for vote_doc in votes:
+            vote = vote_doc.to_dict() or {}
+            count = int(vote.get("count") or 1)
+            cents = vote_cents(vote)
+            contestant_id = str(vote.get("contestantId") or "")
+            day = int(vote.get("day") or 0)
+            if not day:
+                undated = rows.setdefault(TOTAL_DOC, {"votes": 0, "revenue_cents": 0, "contestants": {}})
+                undated["undated_votes"] = undated.get("undated_votes", 0) + count
+            for row_id in ((_day_row(day), TOTAL_DOC) if day else (TOTAL_DOC,)):
+                row = rows.setdefault(row_id, {"votes": 0, "revenue_cents": 0, "contestants": {}})
+                row["votes"] += count
+                row["revenue_cents"] += cents
+                if contestant_id:
+                    share = row["contestants"].setdefault(contestant_id, {"votes": 0, "revenue_cents": 0})
+                    share["votes"] += count
+                    share["revenue_cents"] += cents
+
+        for row_id, row in rows.items():
+            update = {
+                "votes": firestore.Increment(row["votes"]),
+                "revenue_cents": firestore.Increment(row["revenue_cents"]),
+                "contestants": {
+                    contestant_id: {field: firestore.Increment(value) for field, value in share.items()}
+                    for contestant_id, share in row["contestants"].items()
+                },
+            }
+            if row_id != TOTAL_DOC:
+                update["day"] = int(row_id[len("day_"):])
+            if row.get("undated_votes"):
+                update["undated_votes"] = firestore.Increment(row["undated_votes"])
+            transaction.set(ledger.document(row_id), update, merge=True)
+
+        last = votes[-1]
+        transaction.set(checkpoint_ref, {
+            "timestamp": last.get("timestamp"),
+            "vote_id": last.id,
+            "processed": firestore.Increment(len(votes)),
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        }, merge=True)
+        return len(votes)
+
+    return apply(db.transaction())
+
+
+def rollup(db, max_pages=MAX_PAGES):
+    """Process votes recorded since the checkpoint, at most `max_pages` pages; returns votes processed"""
+    processed = 0
+    for _ in range(max_pages):
+        count = rollup_page(db)
+        processed += count
+        if count < PAGE_SIZE:
+            break
+    if processed:
+        logging.info(f"Payout ledger rolled up {processed} votes")
+    return processed
+
+
+def reset(db):
+    """
+    Delete the ledger rows and checkpoint so the next rollup recounts every
+    vote (after votes' days were backfilled or corrected). Pause the payout
+    endpoints' rollups meanwhile, or a concurrent rollup may be lost.
+    """
+    ledger = db.collection(LEDGER_COLLECTION)
+    references = [doc.reference for doc in ledger.get()]
+    for start in range(0, len(references), PAGE_SIZE):
+        batch = db.batch()
+        for reference in references[start:start + PAGE_SIZE]:
+            batch.delete(reference)
+        batch.commit()
+    logging.info(f"Payout ledger reset ({len(references)} documents deleted)")
+    return len(references)
+
+
+def _usd(cents):
+    return Decimal(cents) / 100
+
+
+def amounts(usd):
+    """A USD amount with its NGN and SOL equivalents, as exact strings"""
+    usd = usd.quantize(CENT, rounding=ROUND_DOWN)
+    return {
+        "usd": str(usd),
+        "ngn": str((usd * NGN_PER_USD).quantize(CENT, rounding=ROUND_DOWN)),
+        "sol": str((usd / USD_PER_SOL).quantize(LAMPORT, rounding=ROUND_DOWN)),
+    }
+
+
+def distribute(pool_usd, contestants, names):
+    """Split a pool 50/30/20 between the top three of {id: {votes, ...}}; ties go to the lower id"""
+    ranked = sorted(contestants.items(), key=lambda item: (-int(item[1].get("votes", 0)), id_order(item[0])))
+    winners, paid = [], Decimal(0)
+    for place, ((contestant_id, share), fraction) in enumerate(zip(ranked, PLACE_SHARES), start=1):
+        if not share.get("votes"):
+            break
+        usd = (pool_usd * fraction).quantize(CENT, rounding=ROUND_DOWN)
+        paid += usd
+        winners.append(dict(amounts(usd), place=place, id=contestant_id,
+                            name=names.get(contestant_id, ""), votes=int(share["votes"])))
+    return winners, pool_usd - paid
+
+
+def summarize(row, share, names, as_of):
+    """Revenue, pool and per-place payouts for a ledger row"""
+    row = row or {"votes": 0, "revenue_cents": 0, "contestants": {}}
+    revenue = _usd(int(row.get("revenue_cents", 0)))
+    pool = (revenue * share).quantize(CENT, rounding=ROUND_DOWN)
+    winners, unallocated = distribute(pool, row.get("contestants") or {}, names)
+    return {
+        "votes": int(row.get("votes", 0)),
+        "revenue": amounts(revenue),
+        "share": str(share),
+        "pool": amounts(pool),
+        "winners": winners,
+        "unallocated": amounts(unallocated),
+        "as_of": as_of,
+    }
+
+
+class PayoutLedger:
+    """Reads the ledger rows, rolling up new votes at most every `interval` seconds"""
+
+    def __init__(self, interval=ROLLUP_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._rolled_up_at = None
+        self.rollups = 0
+
+    def refresh(self, db):
+        """Roll up new votes unless that happened in the last `interval` seconds"""
+        with self._lock:
+            if self._rolled_up_at is not None and time.monotonic() - self._rolled_up_at < self.interval:
+                return
+            self._rolled_up_at = time.monotonic()
+        try:
+            rollup(db)
+            self.rollups += 1
+        except Exception as e:
+            logging.error(f"Payout ledger rollup failed, serving the last rows: {e}")
+
+    def _read(self, db, row_id):
+        ledger = db.collection(LEDGER_COLLECTION)
+        docs = {doc.id: doc.to_dict() for doc in db.get_all([ledger.document(row_id), ledger.document(CHECKPOINT_DOC)])
+                if doc.exists}
+        checkpoint = docs.get(CHECKPOINT_DOC) or {}
+        as_of = checkpoint.get("timestamp")
+        return docs.get(row_id), as_of.isoformat() if hasattr(as_of, "isoformat") else None
+
+    def daily(self, db, day, names):
+        """Day `day`'s revenue and its 9% payout to the day's top three"""
+        self.refresh(db)
+        row, as_of = self._read(db, _day_row(day))
+        return dict(summarize(row, DAILY_SHARE, names, as_of), day=day)
+
+    def final(self, db, names):
+        """Total revenue and the 90% prize pool split between the overall top three"""
+        self.refresh(db)
+        row, as_of = self._read(db, TOTAL_DOC)
+        return summarize(row, PRIZE_POOL_SHARE, names, as_of)
+
+
+# Shared by every request in the process
+ledger = PayoutLedger()
+
+
+def main():
+    from firebase_init import get_db
+
+    logging.basicConfig(level=logging.INFO)
+    db = get_db()
+    if db is None:
+        print("Error: no Firebase credentials found; set FIREBASE_CREDENTIALS or add temp/firebase-credentials.json")
+        sys.exit(1)
+
+    total = 0
+    while True:
+        processed = rollup(db)
+        total += processed
+        if processed < PAGE_SIZE * MAX_PAGES:
+            break
+    print(f"Rolled up {total} new votes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Prerendered responses with precomputed compression and ETags
+
+A PrerenderedPage holds one rendered body together with its gzip and (when
+the optional brotli package is installed) brotli variants, each with its own
+strong ETag. Picking the response for a request is a couple of header
+lookups: a matching If-None-Match gets a 304, everyone else gets the best
+pre-compressed bytes their Accept-Encoding allows.
+"""
+
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 256
+
+# Preferred order when the client accepts several encodings
+ENCODINGS = ("br", "gzip")
+
+
+def _parse_accept_encoding(header):
+    """Return the set of encodings the client accepts (q=0 excluded)"""
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name)
+    return accepted
+
+
+def _parse_etags(header):
+    """Return the entity tags in an If-None-Match header (weak prefixes dropped)"""
+    tags = set()
+    for tag in (header or "").split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag)
+    return tags
+
+
+class PrerenderedPage:
+    """An immutable rendered body with its compressed variants and ETags"""
+
+    def __init__(self, body, content_type="text/html; charset=utf-8", cache_control="no-cache"):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:20]
+
+        self.content_type = content_type
+        self.cache_control = cache_control
+        # encoding -> (bytes, etag); None is the identity encoding
+        self.variants = {None: (body, f'"{digest}"')}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gz"')
+            if brotli is not None:
+                self.variants["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+        self.etags = {etag for _, etag in self.variants.values()}
+
+    @property
+    def etag(self):
+        return self.variants[None][1]
+
+    def select(self, accept_encoding=None):
+        """Return the (encoding, body, etag) to send for an Accept-Encoding header"""
+        accepted = _parse_accept_encoding(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return (encoding,) + self.variants[encoding]
+        return (None,) + self.variants[None]
+
+    def respond(self, if_none_match=None, accept_encoding=None, head=False):
+        """Return (status code, headers list, body bytes) for a GET/HEAD request"""
+        encoding, body, etag = self.select(accept_encoding)
+        headers = [
+            ("ETag", etag),
+            ("Cache-Control", self.cache_control),
+            ("Vary", "Accept-Encoding"),
+        ]
+
+        tags = _parse_etags(if_none_match)
+        matched = tags & self.etags
+        if matched or "*" in tags:
+            # Any variant's tag proves the client holds this version of the page
+            if matched:
+                headers[0] = ("ETag", min(matched))
+            return 304, headers, b""
+
+        headers.append(("Content-Type", self.content_type))
+        headers.append(("Content-Length", str(len(body))))
+        if encoding is not None:
+            headers.append(("Content-Encoding", encoding))
+        return 200, headers, b"" if head else body
@@ -0,0 +1,232 @@
+"""
+Token-bucket rate limiting for Smallie's write endpoints
+
+Each limit is a token bucket (`rate` tokens per second, up to `burst`)
+per key, e.g. per client IP. Keys must come from something the client
+can't choose freely, so never from the request body. Buckets live in a
+plain dict of (tokens, timestamp) tuples; a missing bucket is a full one,
+so idle keys are pruned freely and memory stays bounded by MAX_KEYS.
+
+Set RATE_LIMIT_REDIS_URL (and install the optional `redis` package) to
+share buckets between workers and instances; the check is then one
+atomic Lua call per limit. If Redis is unavailable the in-process
+buckets are used.
+
+Requests over a limit get 429 with a Retry-After header before the view
+runs, so they never reach Firestore.
+"""
+
+import os
+import math
+import time
+import logging
+import functools
+import threading
+
+from flask import request, jsonify
+
+import firebase_init
+
+# Most buckets held per limiter before idle ones are pruned
+MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+
+REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", "")
+
+# Proxies in front of the app that append to X-Forwarded-For; the client is
+# the hop the outermost of them added, counted from the right. With 0 the
+# header is ignored (clients can set it to anything) and the connection's
+# address is used. On Vercel the connection comes from Vercel's own proxy,
+# which replaces X-Forwarded-For with the address it saw, so it counts as one.
+TRUSTED_PROXIES = int(os.environ.get(
+    "RATE_LIMIT_TRUSTED_PROXIES", "1" if os.environ.get("VERCEL_DEPLOYMENT") == "1" else "0"))
+
+# Set RATE_LIMIT_ENABLED=0 to turn all limits off (e.g. for load tests)
+ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") != "0"
+
+
+class TokenBucketLimiter:
+    """In-process token buckets for one limit"""
+
+    def __init__(self, name, rate, burst, max_keys=MAX_KEYS):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def acquire(self, key, cost=1, now=None):
+        """Take `cost` tokens for `key`; returns (allowed, seconds until it would be)"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                if len(self._buckets) > self.max_keys:
+                    self._prune(now)
+                self.allowed += 1
+                return True, 0.0
+            self._buckets[key] = (tokens, now)
+            self.rejected += 1
+            return False, (cost - tokens) / self.rate
+
+    def _prune(self, now):
+        # Must be called with the lock held. Full buckets carry no state
+        refill = self.burst / self.rate
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < refill}
+        # Still too many active keys: drop the oldest half rather than grow without bound
+        if len(self._buckets) > self.max_keys:
+            keep = sorted(self._buckets.items(), key=lambda item: item[1][1])[len(self._buckets) // 2:]
+            self._buckets = dict(keep)
+
+    def stats(self):
+        with self._lock:
+            return {"keys": len(self._buckets), "allowed": self.allowed, "rejected": self.rejected,
+                    "rate_per_second": self.rate, "burst": self.burst, "shared": False}
+
+
+# Refill, take and expire a bucket atomically on the Redis server
+_REDIS_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 't', 's')
+local tokens = tonumber(bucket[1]) or burst
+local stamp = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 't', tokens, 's', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class RedisTokenBucketLimiter(TokenBucketLimiter):
+    """Token buckets shared through Redis, falling back to in-process buckets on errors"""
+
+    def __init__(self, name, rate, burst, client, max_keys=MAX_KEYS):
+        super().__init__(name, rate, burst, max_keys)
+        self._client = client
+        self._script = client.register_script(_REDIS_SCRIPT)
+
+    def acquire(self, key, cost=1, now=None):
+        try:
+            allowed, wait = self._script(keys=[f"smallie:rl:{self.name}:{key}"],
+                                         args=[self.rate, self.burst, time.time(), cost])
+        except Exception as e:
+            logging.error(f"Redis rate limiter unavailable, using local buckets: {e}")
+            return super().acquire(key, cost, now)
+        if int(allowed):
+            self.allowed += 1
+            return True, 0.0
+        self.rejected += 1
+        return False, float(wait)
+
+    def stats(self):
+        return dict(super().stats(), shared=True)
+
+
+_redis_client = None
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None and REDIS_URL:
+        try:
+            import redis
+            _redis_client = redis.Redis.from_url(REDIS_URL, socket_timeout=0.2)
+        except Exception as e:
+            logging.error(f"Could not set up Redis for rate limiting: {e}")
+    return _redis_client
+
+
+limiters = {}
+
+
+def limiter(name, per_minute, burst):
+    """Create (or return) the limiter `name`: `per_minute` sustained requests, `burst` at once"""
+    if name not in limiters:
+        client = _get_redis()
+        rate = per_minute / 60.0
+        if client is not None:
+            limiters[name] = RedisTokenBucketLimiter(name, rate, burst, client)
+        else:
+            limiters[name] = TokenBucketLimiter(name, rate, burst)
+    return limiters[name]
+
+
+def forwarded_client(forwarded_for, remote_addr, trusted_proxies=None):
+    """
+    The client's address given an X-Forwarded-For value and the connection's
+    address: with `trusted_proxies` (default TRUSTED_PROXIES) set, the hop the
+    outermost trusted proxy added, counted from the right (hops further left
+    are whatever the client sent); otherwise `remote_addr`
+    """
+    if trusted_proxies is None:
+        trusted_proxies = TRUSTED_PROXIES
+    if trusted_proxies:
+        hops = [hop.strip() for hop in (forwarded_for or "").split(",") if hop.strip()]
+        if len(hops) >= trusted_proxies:
+            return hops[-trusted_proxies]
+    return remote_addr
+
+
+def client_ip():
+    """The caller's IP, by forwarded_client()"""
+    return forwarded_client(request.headers.get("X-Forwarded-For"), request.remote_addr) or "unknown"
+
+
+def verified_uid():
+    """
+    The uid of the Firebase ID token sent as `Authorization: Bearer <token>`,
+    or None (no limit applies) without a valid one; never a uid from the body
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme != "Bearer":
+        return None
+    return firebase_init.verify_id_token(token.strip())
+
+
+def rate_limited(*limits):
+    """
+    Decorate a Flask view with (limiter, key_function) pairs. Every limit
+    whose key function returns a key must have a token; otherwise the view
+    is skipped and the caller gets 429 with Retry-After.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if ENABLED:
+                for bucket, key_function in limits:
+                    key = key_function()
+                    if key is None:
+                        continue
+                    allowed, wait = bucket.acquire(key)
+                    if not allowed:
+                        retry_after = max(1, math.ceil(wait))
+                        response = jsonify({
+                            "status": "error",
+                            "message": f"Too many requests, please try again in {retry_after} seconds",
+                        })
+                        response.status_code = 429
+                        response.headers["Retry-After"] = str(retry_after)
+                        return response
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stats():
+    return {name: bucket.stats() for name, bucket in limiters.items()}
@@ -0,0 +1,320 @@
+"""
+Data-access layer for Smallie
+
+One Repository per collection (contestants, tasks, votes, signups, payments)
+with the same interface on two backends:
+
+- FirestoreRepository: batched reads (get_all) and writes (WriteBatch, 500 per commit)
+- MemoryRepository: a locked dict, used for demo mode and local benchmarks
+
+for_db(db) returns the Store (set of repositories) for a Firestore client,
+or the shared in-memory demo store, seeded with the demo contestants and the
+task catalog, when db is None. Request handlers don't need to care which
+one they got.
+"""
+
+import json
+import uuid
+import base64
+import datetime
+import threading
+
+COLLECTIONS = ("contestants", "tasks", "votes", "signups", "payments")
+
+# Firestore rejects batches with more than 500 writes
+MAX_BATCH_WRITES = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when a page cursor can't be decoded"""
+
+
+def encode_cursor(value, doc_id):
+    """An opaque, URL-safe token for the position after (value, doc_id)"""
+    if isinstance(value, datetime.datetime):
+        value = {"$t": value.isoformat()}
+    raw = json.dumps([value, doc_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Return the (value, doc_id) encoded by encode_cursor()"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        value, doc_id = json.loads(raw)
+        if isinstance(value, dict):
+            value = datetime.datetime.fromisoformat(value["$t"])
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("cursor is not valid")
+    if not isinstance(doc_id, str):
+        raise InvalidCursor("cursor is not valid")
+    return value, doc_id
+
+
+class Repository:
+    """Interface shared by the backends; documents are plain dicts keyed by id"""
+
+    name = None
+
+    def get(self, doc_id):
+        """Return one document or None"""
+        return self.get_many([doc_id]).get(str(doc_id))
+
+    def get_many(self, doc_ids):
+        """Return {id: document} for the ids that exist, in one round trip"""
+        raise NotImplementedError
+
+    def list(self, where=(), order_by=None, descending=False, limit=None):
+        """Return documents matching every (field, op, value) in `where`"""
+        raise NotImplementedError
+
+    def page(self, where=(), order_by=None, descending=False, limit=50, cursor=None):
+        """
+        One page of documents matching `where`, ordered by `order_by` and then
+        by document id so the order is stable. Returns ([(id, document)],
+        next_cursor); next_cursor is None on the last page. Documents without
+        `order_by` are left out, as Firestore does.
+        """
+        raise NotImplementedError
+
+    def put(self, doc_id, data, merge=False):
+        self.put_many({doc_id: data}, merge=merge)
+
+    def put_many(self, documents, merge=False):
+        """Write {id: data} in as few commits as the backend allows"""
+        raise NotImplementedError
+
+    def add(self, data):
+        """Store `data` under a generated id and return the id"""
+        doc_id = uuid.uuid4().hex[:20]
+        self.put(doc_id, data)
+        return doc_id
+
+    def delete(self, doc_id):
+        raise NotImplementedError
+
+    def is_empty(self):
+        return not self.list(limit=1)
+
+
+class FirestoreRepository(Repository):
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.collection = db.collection(name)
+
+    def get_many(self, doc_ids):
+        refs = [self.collection.document(str(doc_id)) for doc_id in doc_ids]
+        if not refs:
+            return {}
+        return {snap.id: snap.to_dict() for snap in self.db.get_all(refs) if snap.exists}
+
+    def list(self, where=(), order_by=None, descending=False, limit=None):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        query = self.collection
+        for field, op, value in where:
+            query = query.where(filter=FieldFilter(field, op, value))
+        if order_by:
+            query = query.order_by(order_by, direction="DESCENDING" if descending else "ASCENDING")
+        if limit:
+            query = query.limit(limit)
+        return [doc.to_dict() for doc in query.get()]
+
+    def page(self, where=(), order_by=None, descending=False, limit=50, cursor=None):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        direction = "DESCENDING" if descending else "ASCENDING"
+        query = self.collection
+        for field, op, value in where:
+            query = query.where(filter=FieldFilter(field, op, value))
+        if order_by:
+            query = query.order_by(order_by, direction=direction)
+        query = query.order_by("__name__", direction=direction)
+        if cursor:
+            value, doc_id = decode_cursor(cursor)
+            query = query.start_after({order_by: value, "__name__": doc_id} if order_by else {"__name__": doc_id})
+
+        # One extra document tells us whether there is a next page
+        docs = list(query.limit(limit + 1).get())
+        items = [(doc.id, doc.to_dict()) for doc in docs[:limit]]
+        if len(docs) <= limit:
+            return items, None
+        last_id, last = items[-1]
+        return items, encode_cursor(last.get(order_by) if order_by else None, last_id)
+
+    def put_many(self, documents, merge=False):
+        items = list(documents.items())
+        for start in range(0, len(items), MAX_BATCH_WRITES):
+            batch = self.db.batch()
+            for doc_id, data in items[start:start + MAX_BATCH_WRITES]:
+                batch.set(self.collection.document(str(doc_id)), data, merge=merge)
+            batch.commit()
+
+    def add(self, data):
+        ref = self.collection.document()
+        ref.set(data)
+        return ref.id
+
+    def delete(self, doc_id):
+        self.collection.document(str(doc_id)).delete()
+
+
+def _matches(value, op, expected):
+    if op == "==":
+        return value == expected
+    if op == "!=":
+        return value != expected
+    if op == "in":
+        return value in expected
+    if op == "array_contains":
+        return isinstance(value, list) and expected in value
+    if value is None:
+        return False
+    if op == "<":
+        return value < expected
+    if op == "<=":
+        return value <= expected
+    if op == ">":
+        return value > expected
+    if op == ">=":
+        return value >= expected
+    raise ValueError(f"Unsupported operator {op}")
+
+
+class MemoryRepository(Repository):
+    def __init__(self, name, documents=None):
+        self.name = name
+        self._lock = threading.Lock()
+        self._docs = {str(doc_id): dict(data) for doc_id, data in (documents or {}).items()}
+
+    def get_many(self, doc_ids):
+        with self._lock:
+            return {str(doc_id): dict(self._docs[str(doc_id)]) for doc_id in doc_ids if str(doc_id) in self._docs}
+
+    def list(self, where=(), order_by=None, descending=False, limit=None):
+        with self._lock:
+            docs = [dict(data) for _, data in sorted(self._docs.items())]
+        docs = [doc for doc in docs if all(_matches(doc.get(field), op, value) for field, op, value in where)]
+        if order_by:
+            present = [doc for doc in docs if doc.get(order_by) is not None]
+            docs = sorted(present, key=lambda doc: doc[order_by], reverse=descending)
+        return docs[:limit] if limit else docs
+
+    def page(self, where=(), order_by=None, descending=False, limit=50, cursor=None):
+        with self._lock:
+            items = [(doc_id, dict(data)) for doc_id, data in self._docs.items()]
+        items = [(doc_id, doc) for doc_id, doc in items
+                 if all(_matches(doc.get(field), op, value) for field, op, value in where)
+                 and (not order_by or doc.get(order_by) is not None)]
+
+        def key(item):
+            return (item[1][order_by], item[0]) if order_by else item[0]
+
+        items.sort(key=key, reverse=descending)
+        if cursor:
+            value, doc_id = decode_cursor(cursor)
+            position = (value, doc_id) if order_by else doc_id
+            items = [item for item in items if (key(item) < position if descending else key(item) > position)]
+
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        last_id, last = items[-1]
+        return items, encode_cursor(last.get(order_by) if order_by else None, last_id)
+
+    def put_many(self, documents, merge=False):
+        with self._lock:
+            for doc_id, data in documents.items():
+                doc_id = str(doc_id)
+                if merge and doc_id in self._docs:
+                    self._docs[doc_id] = dict(self._docs[doc_id], **data)
+                else:
+                    self._docs[doc_id] = dict(data)
+
+    def delete(self, doc_id):
+        with self._lock:
+            self._docs.pop(str(doc_id), None)
+
+
+class Store:
+    """The repositories for one backend"""
+
+    def __init__(self, make_repository, db=None):
+        self.db = db
+        self.contestants = make_repository("contestants")
+        self.tasks = make_repository("tasks")
+        self.votes = make_repository("votes")
+        self.signups = make_repository("signups")
+        self.payments = make_repository("payments")
+        self.in_memory = isinstance(self.contestants, MemoryRepository)
+
+    def put_all(self, documents, merge=False):
+        """
+        Write {collection: {id: data}} across collections; on Firestore this is
+        a single batch (or one per 500 writes). Returns the number of writes.
+        """
+        if self.in_memory:
+            for name, docs in documents.items():
+                getattr(self, name).put_many(docs, merge=merge)
+            return sum(len(docs) for docs in documents.values())
+
+        writes = [(name, doc_id, data) for name, docs in documents.items() for doc_id, data in docs.items()]
+        for start in range(0, len(writes), MAX_BATCH_WRITES):
+            batch = self.db.batch()
+            for name, doc_id, data in writes[start:start + MAX_BATCH_WRITES]:
+                batch.set(self.db.collection(name).document(str(doc_id)), data, merge=merge)
+            batch.commit()
+        return len(writes)
+
+
+def firestore_store(db):
+    return Store(lambda name: FirestoreRepository(db, name), db)
+
+
+def memory_store(seed=None):
+    """An in-memory Store; `seed` maps collection name to {id: document}"""
+    seed = seed or {}
+    return Store(lambda name: MemoryRepository(name, seed.get(name)))
+
+
+def demo_seed():
+    """The demo contestants and task catalog, keyed as they are in Firestore"""
+    from demo_data import DEFAULT_CONTESTANTS
+    from competition_clock import DAILY_TASKS
+
+    return {
+        "contestants": {str(c["id"]): c for c in DEFAULT_CONTESTANTS},
+        "tasks": {f"day_{task['day']}": task for task in DAILY_TASKS},
+    }
+
+
+_lock = threading.Lock()
+_stores = {}
+_demo_store = None
+
+
+def for_db(db):
+    """Return the Store for a Firestore client, or the demo store when db is None"""
+    global _demo_store
+
+    if db is None:
+        if _demo_store is None:
+            with _lock:
+                if _demo_store is None:
+                    _demo_store = memory_store(demo_seed())
+        return _demo_store
+
+    store = _stores.get(id(db))
+    if store is None:
+        with _lock:
+            store = _stores.setdefault(id(db), firestore_store(db))
+    return store
+
+
+def reset():
+    """Drop the cached stores (the demo store is re-seeded on next use)"""
+    global _demo_store
+    with _lock:
+        _stores.clear()
+        _demo_store = None
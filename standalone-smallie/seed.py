@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Seed Firestore with the competition's task catalog and contestants
+
+Run once per project at deploy time (not from the app). The seed documents
+that don't exist yet are written in a single batched commit. Existing
+documents are left alone, so re-running is safe and never resets live vote
+counts or eliminations; use --force to overwrite them with the seed data.
+
+Usage:
+    python seed.py [--force] [--dry-run]
+
+Credentials come from FIREBASE_CREDENTIALS or temp/firebase-credentials.json,
+exactly as for the app (see firebase_init.py).
+"""
+
+import sys
+import logging
+import argparse
+
+import repositories
+from firebase_init import get_db
+from demo_data import DEFAULT_CONTESTANTS
+from competition_clock import DAILY_TASKS
+
+
+def seed_documents():
+    """The seed data as {collection: {document id: data}}"""
+    return {
+        "tasks": {f"day_{task['day']}": task for task in DAILY_TASKS},
+        "contestants": {str(contestant["id"]): contestant for contestant in DEFAULT_CONTESTANTS},
+    }
+
+
+def plan(store, force=False):
+    """Return the seed documents that still need writing (one batched read per collection)"""
+    pending = {}
+    for name, docs in seed_documents().items():
+        existing = set() if force else set(getattr(store, name).get_many(docs))
+        missing = {doc_id: data for doc_id, data in docs.items() if doc_id not in existing}
+        if missing:
+            pending[name] = missing
+    return pending
+
+
+def seed(db, force=False, dry_run=False):
+    """Write missing seed documents for `db`; returns {collection: count written}"""
+    store = repositories.for_db(db)
+    pending = plan(store, force)
+    if pending and not dry_run:
+        store.put_all(pending)
+    return {name: len(docs) for name, docs in pending.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed Firestore with tasks and contestants")
+    parser.add_argument("--force", action="store_true", help="overwrite existing seed documents")
+    parser.add_argument("--dry-run", action="store_true", help="show what would be written")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = get_db()
+    if db is None:
+        print("Error: no Firebase credentials found; set FIREBASE_CREDENTIALS or add temp/firebase-credentials.json")
+        sys.exit(1)
+
+    written = seed(db, force=args.force, dry_run=args.dry_run)
+    if not written:
+        print("Nothing to do: all seed documents already exist")
+        return
+    verb = "Would write" if args.dry_run else "Wrote"
+    for name, count in written.items():
+        print(f"{verb} {count} {name} documents")
+
+
+if __name__ == "__main__":
+    main()
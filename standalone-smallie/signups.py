@@ -0,0 +1,57 @@
+"""
+Contestant applications for Smallie
+
+Validation for POST /api/signups, mirroring the checks in static/js/signup.js
+so the server never stores what the form would have rejected.
+"""
+
+import re
+
+NAME_PATTERN = re.compile(r"^[a-zA-Z\s]{2,50}$")
+EMAIL_PATTERN = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
+URL_PATTERN = re.compile(r"^(https?://)?([\da-z.-]+)\.([a-z.]{2,6})([/\w .-]*)/?$", re.IGNORECASE)
+
+# Optional free-text fields and their maximum lengths
+OPTIONAL_FIELDS = {
+    "phone": 30,
+    "location": 100,
+    "socialHandle": 100,
+    "experience": 500,
+    "streamUrl": 300,
+}
+
+
+class SignupValidationError(ValueError):
+    """Raised when an application is missing or has invalid fields"""
+
+
+def validate_signup(payload):
+    """Validate an application from the signup form and return the fields to store"""
+    if not isinstance(payload, dict):
+        raise SignupValidationError("Application must be a JSON object")
+
+    name = str(payload.get("name") or "").strip()
+    if not NAME_PATTERN.match(name):
+        raise SignupValidationError("Please enter a valid name (2-50 characters, letters only)")
+
+    bio = str(payload.get("bio") or "").strip()
+    if len(bio) < 10 or len(bio) > 200:
+        raise SignupValidationError("Bio must be between 10 and 200 characters")
+
+    email = str(payload.get("email") or "").strip()
+    if not EMAIL_PATTERN.match(email) or len(email) > 254:
+        raise SignupValidationError("Please enter a valid email address")
+
+    signup = {"name": name, "bio": bio, "email": email}
+    for field, max_length in OPTIONAL_FIELDS.items():
+        value = str(payload.get(field) or "").strip()
+        if len(value) > max_length:
+            raise SignupValidationError(f"{field} must be at most {max_length} characters")
+        signup[field] = value
+
+    if signup["streamUrl"] and not URL_PATTERN.match(signup["streamUrl"]):
+        raise SignupValidationError("Please enter a valid URL for your stream link")
+
+    if payload.get("userId"):
+        signup["userId"] = str(payload["userId"])
+    return signup
@@ -37,9 +37,6 @@ const firebaseConfig = {
 const app = initializeApp(firebaseConfig);
 const db = getFirestore(app);
 
-// Admin password (hardcoded for simplicity)
-const ADMIN_PASSWORD = 'smallie2025';
-
 // DOM Elements - Dashboard Navigation
 const navItems = document.querySelectorAll('.nav-item');
 const contentSections = document.querySelectorAll('.content-section');
@@ -130,6 +127,24 @@ const hideLoading = () => {
     }
 };
 
+// GET an admin API with the signed-in admin's token
+const fetchAdmin = async (path) => {
+    const response = await fetch(path, {
+        headers: { 'Authorization': `Bearer ${localStorage.getItem('admin_token') || ''}` }
+    });
+    if (response.status === 401) {
+        // The session token expired (or predates this sign-in scheme): sign in again
+        logout();
+    }
+    if (!response.ok) {
+        throw new Error(`Admin API ${path} returned ${response.status}`);
+    }
+    return response.json();
+};
+
+// Fetch the server-maintained vote aggregates (totals, per day, per contestant per day)
+const fetchVoteStats = () => fetchAdmin('/api/stats');
+
 // Admin Authentication
 const checkAuthentication = () => {
     const isAuthenticated = localStorage.getItem('admin_authenticated') === 'true';
@@ -141,17 +156,26 @@ const checkAuthentication = () => {
     return isAuthenticated;
 };
 
-const login = (password) => {
-    if (password === ADMIN_PASSWORD) {
-        localStorage.setItem('admin_authenticated', 'true');
-        loginModal.style.display = 'none';
-        return true;
+// The server checks the password and returns a short-lived session token for the admin APIs
+const login = async (password) => {
+    const response = await fetch('/api/admin/session', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ password: password })
+    });
+    if (!response.ok) {
+        return false;
     }
-    return false;
+    const session = await response.json();
+    localStorage.setItem('admin_authenticated', 'true');
+    localStorage.setItem('admin_token', session.token);
+    loginModal.style.display = 'none';
+    return true;
 };
 
 const logout = () => {
     localStorage.removeItem('admin_authenticated');
+    localStorage.removeItem('admin_token');
     window.location.reload();
 };
 
@@ -250,28 +274,55 @@ const loadActiveContestants = async () => {
     }
 };
 
+// Admin list APIs return cursor-paginated pages; more are appended on demand
+const fetchAdminPage = (path, params = {}) => fetchAdmin(`${path}?${new URLSearchParams(params)}`);
+
+const loadPagedGrid = async (options, cursor = null) => {
+    const { container, path, params, renderItem, emptyMessage, buttonClass, onClick } = options;
+    const page = await fetchAdminPage(path, cursor ? { ...params, cursor } : params);
+    
+    const moreButton = container.querySelector('.load-more');
+    if (moreButton) {
+        moreButton.remove();
+    }
+    if (!cursor) {
+        container.innerHTML = page.items.length ? '' : `<div class="empty-message">${emptyMessage}</div>`;
+    }
+    container.insertAdjacentHTML('beforeend', page.items.map(renderItem).join(''));
+    
+    // Add event listeners to the new buttons only
+    container.querySelectorAll(`.${buttonClass}:not([data-bound])`).forEach(button => {
+        button.dataset.bound = 'true';
+        button.addEventListener('click', () => onClick(button.dataset.id));
+    });
+    
+    if (page.next_cursor) {
+        container.insertAdjacentHTML('beforeend', '<button class="btn btn-secondary load-more">Load more</button>');
+        container.querySelector('.load-more').addEventListener('click', async (e) => {
+            e.target.disabled = true;
+            try {
+                await loadPagedGrid(options, page.next_cursor);
+            } catch (error) {
+                console.error('Error loading more:', error);
+                e.target.disabled = false;
+            }
+        });
+    }
+};
+
 const loadPendingApplications = async () => {
     try {
         const applicationsContainer = document.getElementById('pending-applications-grid');
         applicationsContainer.innerHTML = '<div class="loading">Loading applications...</div>';
         
-        const signupsRef = collection(db, 'signups');
-        const q = query(
-            signupsRef,
-            where('status', '==', 'pending')
-        );
-        
-        const querySnapshot = await getDocs(q);
-        
-        if (querySnapshot.empty) {
-            applicationsContainer.innerHTML = '<div class="empty-message">No pending applications found.</div>';
-            return;
-        }
-        
-        let html = '';
-        querySnapshot.forEach((doc) => {
-            const application = { ...doc.data(), id: doc.id };
-            html += `
+        await loadPagedGrid({
+            container: applicationsContainer,
+            path: '/api/admin/signups',
+            params: { status: 'pending' },
+            emptyMessage: 'No pending applications found.',
+            buttonClass: 'view-application',
+            onClick: openApplicationModal,
+            renderItem: (application) => `
                 <div class="admin-card">
                     <div class="admin-card-header">
                         <h3 class="admin-card-title">${application.name}</h3>
@@ -289,18 +340,7 @@ const loadPendingApplications = async () => {
                         <button class="btn btn-secondary view-application" data-id="${application.id}">Review</button>
                     </div>
                 </div>
-            `;
-        });
-        
-        applicationsContainer.innerHTML = html;
-        
-        // Add event listeners to view buttons
-        const viewButtons = document.querySelectorAll('.view-application');
-        viewButtons.forEach(button => {
-            button.addEventListener('click', () => {
-                const applicationId = button.dataset.id;
-                openApplicationModal(applicationId);
-            });
+            `
         });
     } catch (error) {
         console.error('Error loading pending applications:', error);
@@ -314,23 +354,14 @@ const loadEliminatedContestants = async () => {
         const contestantsContainer = document.getElementById('eliminated-contestants-grid');
         contestantsContainer.innerHTML = '<div class="loading">Loading eliminated contestants...</div>';
         
-        const contestantsRef = collection(db, 'contestants');
-        const q = query(
-            contestantsRef,
-            where('eliminated', '==', true)
-        );
-        
-        const querySnapshot = await getDocs(q);
-        
-        if (querySnapshot.empty) {
-            contestantsContainer.innerHTML = '<div class="empty-message">No eliminated contestants found.</div>';
-            return;
-        }
-        
-        let html = '';
-        querySnapshot.forEach((doc) => {
-            const contestant = doc.data();
-            html += `
+        await loadPagedGrid({
+            container: contestantsContainer,
+            path: '/api/admin/contestants',
+            params: { eliminated: 'true', order: 'asc' },
+            emptyMessage: 'No eliminated contestants found.',
+            buttonClass: 'view-contestant',
+            onClick: openContestantModal,
+            renderItem: (contestant) => `
                 <div class="admin-card">
                     <div class="admin-card-header">
                         <h3 class="admin-card-title">${contestant.name}</h3>
@@ -346,18 +377,7 @@ const loadEliminatedContestants = async () => {
                         <button class="btn btn-secondary view-contestant" data-id="${contestant.id}">Manage</button>
                     </div>
                 </div>
-            `;
-        });
-        
-        contestantsContainer.innerHTML = html;
-        
-        // Add event listeners to view buttons
-        const viewButtons = document.querySelectorAll('.view-contestant');
-        viewButtons.forEach(button => {
-            button.addEventListener('click', () => {
-                const contestantId = button.dataset.id;
-                openContestantModal(contestantId);
-            });
+            `
         });
     } catch (error) {
         console.error('Error loading eliminated contestants:', error);
@@ -906,552 +926,185 @@ const deleteTask = async (taskId) => {
 };
 
 // Payout Management
+// All payout figures come from the server-side payout ledger as exact decimal
+// strings (USD, NGN and SOL); the browser only formats them for display.
+const fetchPayouts = async (type) => {
+    let path = '/api/payouts/final';
+    if (type === 'daily') {
+        const clockResponse = await fetch('/api/clock');
+        if (!clockResponse.ok) {
+            throw new Error(`Clock API returned ${clockResponse.status}`);
+        }
+        const clock = await clockResponse.json();
+        path = `/api/payouts/daily/${clock.day}`;
+    }
+    
+    return fetchAdmin(path);
+};
+
+const PLACE_NAMES = ['1st', '2nd', '3rd'];
+
+const renderPayoutCards = (winners, votesLabel) => {
+    return winners.map((winner) => `
+        <div class="payout-card">
+            <div class="payout-rank">${winner.place}</div>
+            <div class="payout-details">
+                <div class="payout-contestant">${winner.name || 'Contestant ' + winner.id}</div>
+                <div class="payout-votes">${winner.votes} ${votesLabel}</div>
+                <div class="payout-status status-pending-payment">Pending Payment</div>
+            </div>
+            <div class="payout-amount">${formatCurrency(winner.usd)}</div>
+        </div>
+    `).join('');
+};
+
 const loadDailyPayouts = async () => {
     try {
-        // Calculate today's statistics
-        const today = new Date();
-        today.setHours(0, 0, 0, 0);
-        
-        const startOfDay = Timestamp.fromDate(today);
-        const endOfDay = Timestamp.fromDate(new Date(today.setHours(23, 59, 59, 999)));
-        
-        // Get today's votes
-        const votesRef = collection(db, 'votes');
-        const q = query(
-            votesRef,
-            where('timestamp', '>=', startOfDay),
-            where('timestamp', '<=', endOfDay)
-        );
-        
-        const querySnapshot = await getDocs(q);
-        
-        let todayVotes = 0;
-        querySnapshot.forEach((doc) => {
-            const vote = doc.data();
-            todayVotes += vote.count || 1;
-        });
-        
-        // Calculate revenue and payout
-        const revenue = todayVotes * 0.5; // $0.50 per vote
-        const dailyPayout = revenue * 0.09; // 9% for daily payouts
+        // Get today's revenue and payout from the payout ledger
+        const payouts = await fetchPayouts('daily');
         
         // Update stats in UI
-        document.getElementById('today-votes').textContent = todayVotes;
-        document.getElementById('today-revenue').textContent = formatCurrency(revenue);
-        document.getElementById('daily-payout').textContent = formatCurrency(dailyPayout);
+        document.getElementById('today-votes').textContent = payouts.votes;
+        document.getElementById('today-revenue').textContent = formatCurrency(payouts.revenue.usd);
+        document.getElementById('daily-payout').textContent = formatCurrency(payouts.pool.usd);
         
         // Load daily winners
-        await loadDailyWinners();
+        loadDailyWinners(payouts);
     } catch (error) {
         console.error('Error loading daily payouts:', error);
     }
 };
 
-const loadDailyWinners = async () => {
-    try {
-        const winnersContainer = document.getElementById('daily-winners-grid');
-        winnersContainer.innerHTML = '<div class="loading">Calculating daily winners...</div>';
-        
-        // Get all active contestants
-        const contestantsRef = collection(db, 'contestants');
-        const q = query(
-            contestantsRef,
-            where('eliminated', '==', false)
-        );
-        
-        const querySnapshot = await getDocs(q);
-        
-        if (querySnapshot.empty) {
-            winnersContainer.innerHTML = '<div class="empty-message">No active contestants found.</div>';
-            return;
-        }
-        
-        // Calculate daily votes for each contestant (this would normally come from the votes collection)
-        // For demo purposes, we'll use a random number for each contestant
-        const contestants = [];
-        querySnapshot.forEach((doc) => {
-            const contestant = doc.data();
-            const dailyVotes = Math.floor(Math.random() * 100); // Random number for demo
-            contestants.push({
-                ...contestant,
-                daily_votes: dailyVotes,
-                daily_payout: dailyVotes * 0.5 * 0.09 // 9% of revenue from votes
-            });
-        });
-        
-        // Sort by daily votes
-        contestants.sort((a, b) => b.daily_votes - a.daily_votes);
-        
-        // Get top 3
-        const topContestants = contestants.slice(0, 3);
-        
-        // Generate HTML
-        let html = '';
-        topContestants.forEach((contestant, index) => {
-            html += `
-                <div class="payout-card">
-                    <div class="payout-rank">${index + 1}</div>
-                    <div class="payout-details">
-                        <div class="payout-contestant">${contestant.name}</div>
-                        <div class="payout-votes">${contestant.daily_votes} votes today</div>
-                        <div class="payout-status status-pending-payment">Pending Payment</div>
-                    </div>
-                    <div class="payout-amount">${formatCurrency(contestant.daily_payout)}</div>
-                </div>
-            `;
-        });
-        
-        winnersContainer.innerHTML = html;
-    } catch (error) {
-        console.error('Error loading daily winners:', error);
-        document.getElementById('daily-winners-grid').innerHTML = 
-            '<div class="error-message">Error calculating daily winners. Please try again.</div>';
+const loadDailyWinners = (payouts) => {
+    const winnersContainer = document.getElementById('daily-winners-grid');
+    if (!payouts.winners.length) {
+        winnersContainer.innerHTML = '<div class="empty-message">No votes recorded today.</div>';
+        return;
     }
+    winnersContainer.innerHTML = renderPayoutCards(payouts.winners, 'votes today');
 };
 
 const loadFinalPayouts = async () => {
     try {
-        // Calculate total votes and revenue
-        const votesRef = collection(db, 'votes');
-        const votesSnapshot = await getDocs(votesRef);
-        
-        let totalVotes = 0;
-        votesSnapshot.forEach((doc) => {
-            const vote = doc.data();
-            totalVotes += vote.count || 1;
-        });
-        
-        // Calculate revenue and prize pool
-        const totalRevenue = totalVotes * 0.5; // $0.50 per vote
-        const prizePool = totalRevenue * 0.9; // 90% for final prize pool
+        // Get total votes, revenue and prize pool from the payout ledger
+        const payouts = await fetchPayouts('final');
         
         // Update stats in UI
-        document.getElementById('total-votes').textContent = totalVotes;
-        document.getElementById('total-revenue').textContent = formatCurrency(totalRevenue);
-        document.getElementById('final-prize-pool').textContent = formatCurrency(prizePool);
+        document.getElementById('total-votes').textContent = payouts.votes;
+        document.getElementById('total-revenue').textContent = formatCurrency(payouts.revenue.usd);
+        document.getElementById('final-prize-pool').textContent = formatCurrency(payouts.pool.usd);
         
         // Load final rankings
-        await loadFinalRankings();
+        loadFinalRankings(payouts);
     } catch (error) {
         console.error('Error loading final payouts:', error);
+        document.getElementById('final-rankings-grid').innerHTML = 
+            '<div class="error-message">Error calculating final rankings. Please try again.</div>';
     }
 };
 
-const loadFinalRankings = async () => {
-    try {
-        const rankingsContainer = document.getElementById('final-rankings-grid');
-        rankingsContainer.innerHTML = '<div class="loading">Calculating final rankings...</div>';
-        
-        // Get all contestants
-        const contestantsRef = collection(db, 'contestants');
-        const contestantsSnapshot = await getDocs(contestantsRef);
-        
-        if (contestantsSnapshot.empty) {
-            rankingsContainer.innerHTML = '<div class="empty-message">No contestants found.</div>';
-            return;
-        }
-        
-        // Prepare contestants list
-        const contestants = [];
-        contestantsSnapshot.forEach((doc) => {
-            const contestant = doc.data();
-            contestants.push(contestant);
-        });
-        
-        // Sort by votes
-        contestants.sort((a, b) => (b.votes || 0) - (a.votes || 0));
-        
-        // Calculate total votes and prize pool
-        const totalVotes = contestants.reduce((sum, contestant) => sum + (contestant.votes || 0), 0);
-        const totalRevenue = totalVotes * 0.5; // $0.50 per vote
-        const prizePool = totalRevenue * 0.9; // 90% for final prize pool
-        
-        // Calculate payouts
-        // 1st place: 50% of prize pool
-        // 2nd place: 30% of prize pool
-        // 3rd place: 20% of prize pool
-        const firstPlacePayout = prizePool * 0.5;
-        const secondPlacePayout = prizePool * 0.3;
-        const thirdPlacePayout = prizePool * 0.2;
-        
-        // Generate HTML
-        let html = '';
-        
-        if (contestants.length > 0) {
-            html += `
-                <div class="payout-card">
-                    <div class="payout-rank">1</div>
-                    <div class="payout-details">
-                        <div class="payout-contestant">${contestants[0].name}</div>
-                        <div class="payout-votes">${contestants[0].votes || 0} total votes</div>
-                        <div class="payout-status status-pending-payment">Pending Payment</div>
-                    </div>
-                    <div class="payout-amount">${formatCurrency(firstPlacePayout)}</div>
-                </div>
-            `;
-        }
-        
-        if (contestants.length > 1) {
-            html += `
-                <div class="payout-card">
-                    <div class="payout-rank">2</div>
-                    <div class="payout-details">
-                        <div class="payout-contestant">${contestants[1].name}</div>
-                        <div class="payout-votes">${contestants[1].votes || 0} total votes</div>
-                        <div class="payout-status status-pending-payment">Pending Payment</div>
-                    </div>
-                    <div class="payout-amount">${formatCurrency(secondPlacePayout)}</div>
-                </div>
-            `;
-        }
-        
-        if (contestants.length > 2) {
-            html += `
-                <div class="payout-card">
-                    <div class="payout-rank">3</div>
-                    <div class="payout-details">
-                        <div class="payout-contestant">${contestants[2].name}</div>
-                        <div class="payout-votes">${contestants[2].votes || 0} total votes</div>
-                        <div class="payout-status status-pending-payment">Pending Payment</div>
-                    </div>
-                    <div class="payout-amount">${formatCurrency(thirdPlacePayout)}</div>
-                </div>
-            `;
-        }
-        
-        rankingsContainer.innerHTML = html;
-    } catch (error) {
-        console.error('Error loading final rankings:', error);
-        document.getElementById('final-rankings-grid').innerHTML = 
-            '<div class="error-message">Error calculating final rankings. Please try again.</div>';
+const loadFinalRankings = (payouts) => {
+    const rankingsContainer = document.getElementById('final-rankings-grid');
+    if (!payouts.winners.length) {
+        rankingsContainer.innerHTML = '<div class="empty-message">No contestants found.</div>';
+        return;
     }
+    rankingsContainer.innerHTML = renderPayoutCards(payouts.winners, 'total votes');
 };
 
 const openPayoutModal = async (type) => {
     try {
         showLoading('Preparing payout details...');
         
-        let title, details;
-        let recipientInfo = {};
-        
-        if (type === 'daily') {
-            title = 'Process Daily Payout';
-            
-            // Calculate today's statistics and identify winners
-            const today = new Date();
-            today.setHours(0, 0, 0, 0);
-            
-            const startOfDay = Timestamp.fromDate(today);
-            const endOfDay = Timestamp.fromDate(new Date(today.setHours(23, 59, 59, 999)));
-            
-            // Get today's votes
-            const votesRef = collection(db, 'votes');
-            const q = query(
-                votesRef,
-                where('timestamp', '>=', startOfDay),
-                where('timestamp', '<=', endOfDay)
-            );
-            
-            const querySnapshot = await getDocs(q);
-            
-            // Track today's votes and votes per contestant
-            let todayVotes = 0;
-            const contestantVotes = {};
-            
-            querySnapshot.forEach((doc) => {
-                const vote = doc.data();
-                const voteCount = vote.count || 1;
-                todayVotes += voteCount;
-                
-                // Track votes by contestant
-                const contestantId = vote.contestantId;
-                if (contestantId) {
-                    contestantVotes[contestantId] = (contestantVotes[contestantId] || 0) + voteCount;
-                }
-            });
-            
-            // Find top 3 contestants by votes
-            const sortedContestants = Object.entries(contestantVotes)
-                .sort((a, b) => b[1] - a[1])
-                .slice(0, 3);
-            
-            // Calculate revenue and payout
-            const revenue = todayVotes * 0.5; // $0.50 per vote
-            const dailyPayout = revenue * 0.09; // 9% for daily payouts
-            
-            // Calculate in Naira
-            const revenueNaira = revenue * 480; // Approximate NGN conversion
-            const payoutNaira = dailyPayout * 480; // Approximate NGN conversion
-            
-            // Create winner details HTML
-            let winnersList = '';
-            const totalWinners = sortedContestants.length;
-            
-            if (totalWinners > 0) {
-                // Calculate payout distribution
-                const firstPlaceAmount = payoutNaira * 0.5;
-                const secondPlaceAmount = totalWinners >= 2 ? payoutNaira * 0.3 : 0;
-                const thirdPlaceAmount = totalWinners >= 3 ? payoutNaira * 0.2 : 0;
-                
-                // Get details for top contestants
-                const topContestantPromises = sortedContestants.map(async ([id, votes], index) => {
-                    try {
-                        // Get contestant details
-                        const contestantDoc = await getDoc(doc(db, 'contestants', id));
-                        if (contestantDoc.exists()) {
-                            const contestant = contestantDoc.data();
-                            let amount;
-                            let place;
-                            
-                            // Determine payout amount based on place
-                            if (index === 0) {
-                                amount = firstPlaceAmount;
-                                place = '1st';
-                                
-                                // Store first place recipient info for payment
-                                recipientInfo = {
-                                    id: id,
-                                    name: contestant.name || 'Contestant ' + id,
-                                    email: contestant.email || 'contestant@smallie.app',
-                                    wallet: contestant.walletAddress || '',
-                                    place: 'First Place',
-                                    payout: firstPlaceAmount,
-                                    votes: votes
-                                };
-                            } else if (index === 1) {
-                                amount = secondPlaceAmount;
-                                place = '2nd';
-                            } else {
-                                amount = thirdPlaceAmount;
-                                place = '3rd';
-                            }
-                            
-                            return `
-                                <div class="winner-item">
-                                    <div class="winner-place">${place} Place</div>
-                                    <div class="winner-name">${contestant.name || 'Contestant ' + id}</div>
-                                    <div class="winner-votes">${votes} votes</div>
-                                    <div class="winner-payout">${formatNaira(amount)}</div>
-                                </div>
-                            `;
-                        }
-                        return '';
-                    } catch (err) {
-                        console.error('Error fetching contestant details:', err);
-                        return '';
-                    }
-                });
-                
-                // Wait for all contestant details to be fetched
-                const winnerDetails = await Promise.all(topContestantPromises);
-                winnersList = winnerDetails.join('');
-            } else {
-                winnersList = '<div class="no-winners">No votes recorded today</div>';
-                
-                // Default recipient info
-                recipientInfo = {
-                    id: 'default',
-                    name: 'No Winner',
-                    email: 'admin@smallie.app',
-                    wallet: '',
-                    place: 'No Winner',
-                    payout: 0,
-                    votes: 0
-                };
-            }
+        const payouts = await fetchPayouts(type);
+        const isDaily = type === 'daily';
+        const title = isDaily ? 'Process Daily Payout' : 'Process Final Payout';
+        const winners = payouts.winners;
+        
+        // First place is paid from this modal
+        let recipientInfo = {
+            id: 'default',
+            name: 'No Winner',
+            email: 'admin@smallie.app',
+            wallet: '',
+            place: 'No Winner',
+            payout: 0,
+            votes: 0
+        };
+        let payoutSol = '0';
+        
+        let winnersList;
+        if (winners.length > 0) {
+            const first = winners[0];
+            const contestantDoc = await getDoc(doc(db, 'contestants', first.id));
+            const contestant = contestantDoc.exists() ? contestantDoc.data() : {};
+            recipientInfo = {
+                id: first.id,
+                name: first.name || 'Contestant ' + first.id,
+                email: contestant.email || 'contestant@smallie.app',
+                wallet: contestant.walletAddress || '',
+                place: isDaily ? 'First Place' : 'Grand Prize Winner',
+                payout: first.ngn,
+                votes: first.votes
+            };
+            payoutSol = first.sol;
             
-            details = `
-                <div class="payout-summary">
-                    <div class="payout-stats">
-                        <div class="payout-stat">
-                            <div class="stat-label">Today's Votes:</div>
-                            <div class="stat-value">${todayVotes}</div>
-                        </div>
-                        <div class="payout-stat">
-                            <div class="stat-label">Today's Revenue:</div>
-                            <div class="stat-value">${formatCurrency(revenue)} (${formatNaira(revenueNaira)})</div>
-                        </div>
-                        <div class="payout-stat">
-                            <div class="stat-label">Daily Payout (9%):</div>
-                            <div class="stat-value">${formatCurrency(dailyPayout)} (${formatNaira(payoutNaira)})</div>
-                        </div>
+            winnersList = winners.map((winner) => `
+                <div class="winner-item">
+                    <div class="winner-place">${PLACE_NAMES[winner.place - 1]} Place</div>
+                    <div class="winner-name">${winner.name || 'Contestant ' + winner.id}</div>
+                    <div class="winner-votes">${winner.votes} votes</div>
+                    <div class="winner-payout">${formatNaira(winner.ngn)}</div>
+                </div>
+            `).join('');
+        } else {
+            winnersList = `<div class="no-winners">${isDaily ? 'No votes recorded today' : 'No contestants found'}</div>`;
+        }
+        
+        const details = `
+            <div class="payout-summary">
+                <div class="payout-stats">
+                    <div class="payout-stat">
+                        <div class="stat-label">${isDaily ? "Today's Votes" : 'Total Votes'}:</div>
+                        <div class="stat-value">${payouts.votes}</div>
                     </div>
-                    
-                    <div class="winners-section">
-                        <h3>Today's Winners</h3>
-                        <div class="winners-list">
-                            ${winnersList}
-                        </div>
+                    <div class="payout-stat">
+                        <div class="stat-label">${isDaily ? "Today's Revenue" : 'Total Revenue'}:</div>
+                        <div class="stat-value">${formatCurrency(payouts.revenue.usd)} (${formatNaira(payouts.revenue.ngn)})</div>
+                    </div>
+                    <div class="payout-stat">
+                        <div class="stat-label">${isDaily ? 'Daily Payout (9%)' : 'Final Prize Pool (90%)'}:</div>
+                        <div class="stat-value">${formatCurrency(payouts.pool.usd)} (${formatNaira(payouts.pool.ngn)})</div>
                     </div>
                 </div>
-                <p>This will process payouts for today's top ${totalWinners > 0 ? totalWinners : 'contestants'} based on votes received today.</p>
-                <p>Payments will be sent via your selected payment method to the first place winner.</p>
-            `;
-            
-            // Set payment data attributes
-            payoutModal.dataset.amount = (dailyPayout * 0.5 / 240).toFixed(4); // Convert to SOL (approximate)
-            payoutModal.dataset.amountNaira = payoutNaira * 0.5; // First place gets 50%
-            payoutModal.dataset.recipientName = recipientInfo.name;
-            payoutModal.dataset.recipientEmail = recipientInfo.email;
-            payoutModal.dataset.recipientWallet = recipientInfo.wallet;
-            payoutModal.dataset.recipientId = recipientInfo.id;
-        } else if (type === 'final') {
-            title = 'Process Final Payout';
-            
-            // Calculate total votes and identify overall winners
-            const votesRef = collection(db, 'votes');
-            const votesSnapshot = await getDocs(votesRef);
-            
-            // Track total votes and votes per contestant
-            let totalVotes = 0;
-            const contestantVotes = {};
-            
-            votesSnapshot.forEach((doc) => {
-                const vote = doc.data();
-                const voteCount = vote.count || 1;
-                totalVotes += voteCount;
                 
-                // Track votes by contestant
-                const contestantId = vote.contestantId;
-                if (contestantId) {
-                    contestantVotes[contestantId] = (contestantVotes[contestantId] || 0) + voteCount;
-                }
-            });
-            
-            // Find top 3 contestants by votes
-            const sortedContestants = Object.entries(contestantVotes)
-                .sort((a, b) => b[1] - a[1])
-                .slice(0, 3);
-            
-            // Calculate revenue and prize pool
-            const totalRevenue = totalVotes * 0.5; // $0.50 per vote
-            const prizePool = totalRevenue * 0.9; // 90% for final prize pool
-            
-            // Calculate in Naira
-            const revenueNaira = totalRevenue * 480; // Approximate NGN conversion
-            const prizePoolNaira = prizePool * 480; // Approximate NGN conversion
-            
-            // Create winner details HTML
-            let winnersList = '';
-            const totalWinners = sortedContestants.length;
-            
-            if (totalWinners > 0) {
-                // Calculate payout distribution
-                const firstPlaceAmount = prizePoolNaira * 0.5;
-                const secondPlaceAmount = totalWinners >= 2 ? prizePoolNaira * 0.3 : 0;
-                const thirdPlaceAmount = totalWinners >= 3 ? prizePoolNaira * 0.2 : 0;
-                
-                // Get details for top contestants
-                const topContestantPromises = sortedContestants.map(async ([id, votes], index) => {
-                    try {
-                        // Get contestant details
-                        const contestantDoc = await getDoc(doc(db, 'contestants', id));
-                        if (contestantDoc.exists()) {
-                            const contestant = contestantDoc.data();
-                            let amount;
-                            let place;
-                            
-                            // Determine payout amount based on place
-                            if (index === 0) {
-                                amount = firstPlaceAmount;
-                                place = '1st';
-                                
-                                // Store first place recipient info for payment
-                                recipientInfo = {
-                                    id: id,
-                                    name: contestant.name || 'Contestant ' + id,
-                                    email: contestant.email || 'contestant@smallie.app',
-                                    wallet: contestant.walletAddress || '',
-                                    place: 'Grand Prize Winner',
-                                    payout: firstPlaceAmount,
-                                    votes: votes
-                                };
-                            } else if (index === 1) {
-                                amount = secondPlaceAmount;
-                                place = '2nd';
-                            } else {
-                                amount = thirdPlaceAmount;
-                                place = '3rd';
-                            }
-                            
-                            return `
-                                <div class="winner-item">
-                                    <div class="winner-place">${place} Place</div>
-                                    <div class="winner-name">${contestant.name || 'Contestant ' + id}</div>
-                                    <div class="winner-votes">${votes} votes</div>
-                                    <div class="winner-payout">${formatNaira(amount)}</div>
-                                </div>
-                            `;
-                        }
-                        return '';
-                    } catch (err) {
-                        console.error('Error fetching contestant details:', err);
-                        return '';
-                    }
-                });
-                
-                // Wait for all contestant details to be fetched
-                const winnerDetails = await Promise.all(topContestantPromises);
-                winnersList = winnerDetails.join('');
-            } else {
-                winnersList = '<div class="no-winners">No contestants found</div>';
-                
-                // Default recipient info
-                recipientInfo = {
-                    id: 'default',
-                    name: 'No Winner',
-                    email: 'admin@smallie.app',
-                    wallet: '',
-                    place: 'No Winner',
-                    payout: 0,
-                    votes: 0
-                };
-            }
-            
-            details = `
-                <div class="payout-summary">
-                    <div class="payout-stats">
-                        <div class="payout-stat">
-                            <div class="stat-label">Total Votes:</div>
-                            <div class="stat-value">${totalVotes}</div>
-                        </div>
-                        <div class="payout-stat">
-                            <div class="stat-label">Total Revenue:</div>
-                            <div class="stat-value">${formatCurrency(totalRevenue)} (${formatNaira(revenueNaira)})</div>
-                        </div>
-                        <div class="payout-stat">
-                            <div class="stat-label">Final Prize Pool (90%):</div>
-                            <div class="stat-value">${formatCurrency(prizePool)} (${formatNaira(prizePoolNaira)})</div>
-                        </div>
-                    </div>
-                    
-                    <div class="winners-section">
-                        <h3>Final Winners</h3>
-                        <div class="winners-list">
-                            ${winnersList}
-                        </div>
+                <div class="winners-section">
+                    <h3>${isDaily ? "Today's Winners" : 'Final Winners'}</h3>
+                    <div class="winners-list">
+                        ${winnersList}
                     </div>
                 </div>
-                <p>This will process the final payouts to the top ${totalWinners > 0 ? totalWinners : 'contestants'}.</p>
-                <p>Payments will be sent via your selected payment method to the first place winner.</p>
-            `;
-            
-            // Set payment data attributes
-            payoutModal.dataset.amount = (prizePool * 0.5 / 240).toFixed(4); // Convert to SOL (approximate)
-            payoutModal.dataset.amountNaira = prizePoolNaira * 0.5; // First place gets 50%
-            payoutModal.dataset.recipientName = recipientInfo.name;
-            payoutModal.dataset.recipientEmail = recipientInfo.email;
-            payoutModal.dataset.recipientWallet = recipientInfo.wallet;
-            payoutModal.dataset.recipientId = recipientInfo.id;
-        }
+            </div>
+            <p>This will process ${isDaily ? "payouts for today's" : 'the final payouts to the'} top ${winners.length > 0 ? winners.length : 'contestants'}${isDaily ? ' based on votes received today' : ''}.</p>
+            <p>Payments will be sent via your selected payment method to the first place winner.</p>
+        `;
+        
+        // Set payment data attributes
+        payoutModal.dataset.amount = payoutSol;
+        payoutModal.dataset.amountNaira = recipientInfo.payout;
+        payoutModal.dataset.recipientName = recipientInfo.name;
+        payoutModal.dataset.recipientEmail = recipientInfo.email;
+        payoutModal.dataset.recipientWallet = recipientInfo.wallet;
+        payoutModal.dataset.recipientId = recipientInfo.id;
         
         // Create additional record in Firebase for this payout
         try {
             await addDoc(collection(db, 'payoutRequests'), {
                 type: type,
-                amount: parseFloat(payoutModal.dataset.amountNaira),
-                amountSol: parseFloat(payoutModal.dataset.amount),
+                amount: payoutModal.dataset.amountNaira,
+                amountSol: payoutModal.dataset.amount,
                 recipient: recipientInfo,
+                ledgerAsOf: payouts.as_of,
                 status: 'pending',
                 createdAt: serverTimestamp()
             });
@@ -1478,28 +1131,12 @@ const openPayoutModal = async (type) => {
 // Stats Dashboard
 const loadStatsDashboard = async () => {
     try {
-        // Calculate total votes, revenue, and prize pool
-        const votesRef = collection(db, 'votes');
-        const votesSnapshot = await getDocs(votesRef);
-        
-        let totalVotes = 0;
-        votesSnapshot.forEach((doc) => {
-            const vote = doc.data();
-            totalVotes += vote.count || 1;
-        });
-        
-        // Calculate revenue and prize pool
-        const totalRevenue = totalVotes * 0.5; // $0.50 per vote
-        const prizePool = totalRevenue * 0.9; // 90% for final prize pool
-        
-        // Count active contestants
-        const contestantsRef = collection(db, 'contestants');
-        const activeContestantsQuery = query(
-            contestantsRef,
-            where('eliminated', '==', false)
-        );
-        const activeContestantsSnapshot = await getDocs(activeContestantsQuery);
-        const activeContestantsCount = activeContestantsSnapshot.size;
+        // Get total votes, revenue, prize pool and active contestants in one request
+        const stats = await fetchVoteStats();
+        const totalVotes = stats.total_votes;
+        const totalRevenue = stats.total_revenue;
+        const prizePool = stats.prize_pool;
+        const activeContestantsCount = stats.active_contestants;
         
         // Update stats in UI
         document.getElementById('stats-total-votes').textContent = totalVotes;
@@ -1508,7 +1145,7 @@ const loadStatsDashboard = async () => {
         document.getElementById('stats-contestants').textContent = activeContestantsCount;
         
         // Load charts
-        loadVotesChart();
+        loadVotesChart(stats);
         loadContestantVotesChart();
         
         // Load stats table
@@ -1518,25 +1155,17 @@ const loadStatsDashboard = async () => {
     }
 };
 
-const loadVotesChart = async () => {
+const loadVotesChart = async (stats) => {
     try {
-        // Generate date labels for the past 7 days
+        // One point per competition day from the per-day aggregates
         const labels = [];
         const data = [];
         
-        for (let i = 6; i >= 0; i--) {
-            const date = new Date();
-            date.setDate(date.getDate() - i);
+        for (let day = 1; day <= 7; day++) {
+            labels.push(`Day ${day}`);
             
-            const formattedDate = date.toLocaleDateString('en-US', {
-                month: 'short',
-                day: 'numeric'
-            });
-            
-            labels.push(formattedDate);
-            
-            // Generate random data for demo
-            data.push(Math.floor(Math.random() * 500) + 100);
+            const dayStats = stats ? stats.days[String(day)] : null;
+            data.push(dayStats ? dayStats.votes : 0);
         }
         
         // Create chart
@@ -2022,11 +1651,11 @@ document.addEventListener('DOMContentLoaded', () => {
     });
     
     // Set up modal event listeners
-    adminLoginForm.addEventListener('submit', (e) => {
+    adminLoginForm.addEventListener('submit', async (e) => {
         e.preventDefault();
         const password = adminPassword.value;
         
-        if (login(password)) {
+        if (await login(password)) {
             // Load initial data after login
             loadActiveContestants();
             loadTasks();
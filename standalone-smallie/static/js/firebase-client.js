@@ -347,15 +347,26 @@ if (voteForm) {
         voteModal.dataset.contestantId = contestantId;
         voteModal.dataset.voteCount = voteCount;
         voteModal.dataset.email = email;
+        // One key per vote, so double-clicks and retries are recorded once
+        voteModal.dataset.idempotencyKey = newIdempotencyKey();
     });
 }
 
+// Random idempotency key for a vote (letters, digits and dashes)
+function newIdempotencyKey() {
+    if (window.crypto && typeof window.crypto.randomUUID === 'function') {
+        return 'vote-' + window.crypto.randomUUID();
+    }
+    return 'vote-' + Date.now().toString(36) + '-' + Math.random().toString(36).substring(2, 12);
+}
+
 // Confirm vote button
 if (confirmVoteButton) {
     confirmVoteButton.addEventListener('click', async function() {
         const contestantId = voteModal.dataset.contestantId;
         const voteCount = parseInt(voteModal.dataset.voteCount);
         const email = voteModal.dataset.email;
+        const idempotencyKey = voteModal.dataset.idempotencyKey || newIdempotencyKey();
         
         try {
             // Get current day
@@ -376,43 +387,75 @@ if (confirmVoteButton) {
             const amount = parseFloat(modalVoteTotal.textContent);
             
             // Process payment for the votes
-            const processVote = function() {
+            const processVote = async function(payment) {
+                // Total returned by the server, if the vote was recorded there
+                let newTotal = null;
+                // Prefer the provider's transaction id, unique per payment, so a replayed
+                // payment callback maps to the same vote; otherwise this vote's random key
+                // (tx_ref is only a timestamp and can repeat across users)
+                const transactionId = payment && (payment.transaction_id || payment.tx_id);
+                const voteKey = transactionId ? `${payment.provider || 'payment'}-${transactionId}` : idempotencyKey;
+
                 try {
-                    // For demo mode, just update the UI
-                    if (typeof firebase.firestore.FieldValue === 'undefined') {
-                        throw new Error('Demo mode - using local data only');
+                    // Signed-in voters send their ID token so the server can rate limit per voter
+                    const headers = { 'Content-Type': 'application/json' };
+                    if (user) {
+                        headers['Authorization'] = `Bearer ${await user.getIdToken()}`;
                     }
-                    
-                    // Get the contestant reference
-                    const contestantRef = db.collection('contestants').doc(contestantId);
-                    
-                    // Record the vote in Firestore
-                    contestantRef.update({
-                        votes: firebase.firestore.FieldValue.increment(voteCount)
-                    });
-                    
-                    // Also record the vote in the votes collection for tracking
-                    db.collection('votes').add({
-                        contestantId: contestantId,
-                        userId: user ? user.uid : null,
-                        email: user ? user.email : email,
-                        count: voteCount,
-                        day: currentDay,
-                        timestamp: new Date(),
-                        amount: voteCount * 0.5 // $0.50 per vote
+
+                    // Record the vote through the server so it lands on the sharded counters
+                    const response = await fetch('/api/votes', {
+                        method: 'POST',
+                        headers: headers,
+                        body: JSON.stringify({
+                            contestantId: contestantId,
+                            userId: user ? user.uid : null,
+                            email: user ? user.email : email,
+                            count: voteCount,
+                            day: currentDay,
+                            idempotencyKey: String(voteKey)
+                        })
                     });
+                    const result = await response.json();
+
+                    if (response.ok && result.duplicate) {
+                        // Already counted (double-click or retried callback); nothing to update
+                        voteModal.style.display = 'none';
+                        return;
+                    } else if (result.code === 'voting_closed') {
+                        // Outside the day's voting window; the vote wasn't counted
+                        alert(result.message || 'Voting is closed right now.');
+                        voteModal.style.display = 'none';
+                        return;
+                    } else if (response.status === 409) {
+                        // The first submission of this vote is still in flight
+                        return;
+                    } else if (response.status === 429) {
+                        // Rate limited; the server says when to try again
+                        alert(result.message || 'Too many votes, please wait a moment and try again.');
+                        return;
+                    } else if (response.ok) {
+                        newTotal = result.votes;
+                    } else if (response.status === 400) {
+                        alert(result.message || 'Your vote could not be recorded.');
+                        voteModal.style.display = 'none';
+                        return;
+                    } else {
+                        throw new Error(result.message || `Vote API returned ${response.status}`);
+                    }
                 } catch (error) {
                     console.warn('Using local mode for vote processing:', error);
                     // In demo mode, just update the UI
                 }
-                
+
                 // Update the UI to reflect the new vote count
                 const contestantCard = document.querySelector(`.contestant-card[data-contestant-id="${contestantId}"]`);
                 if (contestantCard) {
                     const votesBadge = contestantCard.querySelector('.votes-badge');
                     if (votesBadge) {
                         const currentVotes = parseInt(votesBadge.textContent) || 0;
-                        votesBadge.textContent = `${currentVotes + voteCount} votes`;
+                        const votes = newTotal !== null ? newTotal : currentVotes + voteCount;
+                        votesBadge.textContent = `${votes} votes`;
                     }
                 }
                 
@@ -48,7 +48,7 @@ function processFlutterwavePayment(paymentData, onSuccess) {
         // Configure payment
         const config = {
             public_key: FLUTTERWAVE_PUBLIC_KEY,
-            tx_ref: 'smallie-' + Date.now(),
+            tx_ref: 'smallie-' + Date.now() + '-' + Math.random().toString(36).substring(2, 10),
             amount: paymentData.amount,
             currency: 'USD',
             payment_options: 'card,mobilemoney,ussd',
@@ -82,9 +82,13 @@ function processFlutterwavePayment(paymentData, onSuccess) {
                         timestamp: new Date().toISOString()
                     });
                     
-                    // Call the success callback
+                    // Call the success callback with the payment reference (used as the vote's idempotency key)
                     if (paymentSuccessCallback) {
-                        paymentSuccessCallback();
+                        paymentSuccessCallback({
+                            provider: 'flutterwave',
+                            tx_ref: response.tx_ref,
+                            transaction_id: response.transaction_id
+                        });
                     }
                 } else {
                     console.error("Payment failed:", response);
@@ -168,9 +172,9 @@ async function processSolanaPayment(paymentData, onSuccess) {
             
             paymentInProgress = false;
             
-            // Call the success callback
+            // Call the success callback with the payment reference
             if (paymentSuccessCallback) {
-                paymentSuccessCallback();
+                paymentSuccessCallback({ provider: 'solana', tx_id: mockTxId });
             }
         }, 2000);
     } catch (error) {
@@ -1,19 +1,11 @@
 /**
  * Smallie - Contestant Signup Module
- * Handles contestant application form and submission to Firebase
+ * Handles contestant application form and submission to the server
  */
 
-import {
-    getFirestore,
-    collection,
-    addDoc,
-    serverTimestamp
-} from 'https://www.gstatic.com/firebasejs/11.0.2/firebase-firestore.js';
-
 import { getAuth, onAuthStateChanged } from 'https://www.gstatic.com/firebasejs/11.0.2/firebase-auth.js';
 
 // Get Firebase instances
-const db = getFirestore();
 const auth = getAuth();
 
 // DOM elements
@@ -26,7 +18,7 @@ const closeModalButtons = document.querySelectorAll('.close');
 function validateFormData(formData) {
     const nameRegex = /^[a-zA-Z\s]{2,50}$/;
     const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
-    const urlRegex = /^(https?:\/\/)?([\da-z\.-]+)\.([a-z\.]{2,6})([\/\w \.-]*)*\/?$/;
+    const urlRegex = /^(https?:\/\/)?([\da-z\.-]+)\.([a-z\.]{2,6})([\/\w \.-]*)\/?$/;
     
     if (!nameRegex.test(formData.name)) {
         return 'Please enter a valid name (2-50 characters, letters only)';
@@ -47,7 +39,7 @@ function validateFormData(formData) {
     return null; // No errors
 }
 
-// Function to submit application to Firebase
+// Function to submit application through the server (validated and rate limited there)
 async function submitApplication(formData) {
     try {
         // Get current user if logged in
@@ -58,15 +50,23 @@ async function submitApplication(formData) {
             formData.userId = user.uid;
         }
         
-        // Add additional metadata
-        formData.status = 'pending';
-        formData.createdAt = serverTimestamp();
+        const response = await fetch('/api/signups', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(formData)
+        });
+        const result = await response.json();
         
-        // Submit to Firebase
-        const signupsCollection = collection(db, 'signups');
-        const docRef = await addDoc(signupsCollection, formData);
+        if (!response.ok) {
+            console.error('Application rejected:', result.message);
+            if (response.status === 400 || response.status === 429) {
+                alert(result.message);
+                return null;
+            }
+            return false;
+        }
         
-        console.log('Application submitted with ID:', docRef.id);
+        console.log('Application submitted with ID:', result.id);
         return true;
     } catch (error) {
         console.error('Error submitting application:', error);
@@ -116,7 +116,7 @@ if (applicationForm) {
             alert('Your application has been submitted successfully! It is now pending approval.');
             applicationModal.style.display = 'none';
             applicationForm.reset();
-        } else {
+        } else if (success === false) {
             alert('There was an error submitting your application. Please try again.');
         }
     });
@@ -12,14 +12,48 @@ const taskTitleElement = document.getElementById('current-task-title');
 const taskDescriptionElement = document.getElementById('current-task-description');
 const taskDateElement = document.getElementById('current-task-date');
 
+// Server clock state from /api/clock (null until the first sync succeeds)
+let serverClock = null;
+
+// Milliseconds to add to the client clock to get server time
+let serverOffsetMs = 0;
+
+// How often to re-sync with the server clock
+const CLOCK_SYNC_INTERVAL = 10 * 60 * 1000;
+
+// Sync against the server's competition clock instead of trusting the client clock
+async function syncServerClock() {
+    try {
+        const requestedAt = Date.now();
+        const response = await fetch('/api/clock');
+        if (!response.ok) {
+            throw new Error(`Clock API returned ${response.status}`);
+        }
+        const state = await response.json();
+        const receivedAt = Date.now();
+
+        // Assume the server read its clock halfway through the round trip
+        serverOffsetMs = state.server_time * 1000 - (requestedAt + receivedAt) / 2;
+        serverClock = state;
+        updateTaskDisplay();
+    } catch (error) {
+        console.warn('Could not sync with server clock, using local time:', error);
+    }
+}
+
+// Current time corrected by the server offset
+function serverNow() {
+    return new Date(Date.now() + serverOffsetMs);
+}
+
 // Function to update the countdown to 9 PM WAT (West Africa Time)
 function updateVotingCountdown() {
     // Get current date and time
-    const now = new Date();
+    const now = serverNow();
     
     // Create target date (today at 9 PM WAT)
     // WAT is UTC+1
-    const target = new Date();
+    const target = new Date(now.getTime());
     target.setUTCHours(20, 0, 0, 0); // 9 PM WAT = 8 PM UTC
     
     // If it's already past 9 PM WAT, set target to next day
@@ -27,8 +61,16 @@ function updateVotingCountdown() {
         target.setDate(target.getDate() + 1);
     }
     
+    // Prefer the server's schedule when we have it
+    if (serverClock) {
+        const closeAt = serverClock.close_at || serverClock.next_release_at;
+        if (closeAt && closeAt * 1000 > now.getTime()) {
+            target.setTime(closeAt * 1000);
+        }
+    }
+    
     // Calculate time difference in milliseconds
-    const timeDiff = target - now;
+    const timeDiff = Math.max(target - now, 0);
     
     // Calculate hours, minutes, seconds
     const hours = Math.floor(timeDiff / (1000 * 60 * 60));
@@ -48,7 +90,7 @@ function updateVotingCountdown() {
 function updateProgressBar(now, target) {
     // If it's past 9 PM, we're showing progress toward the next day
     // We define new task time at 9 AM WAT
-    const newTaskTime = new Date();
+    const newTaskTime = new Date(now.getTime());
     newTaskTime.setUTCHours(8, 0, 0, 0); // 9 AM WAT = 8 AM UTC
     
     // If it's already past 9 AM, new task time is today at 9 AM
@@ -95,6 +137,14 @@ const getTodayDate = () => {
 // Fetch task for today (using hardcoded tasks instead of Firebase for reliability)
 const fetchCurrentTask = async () => {
     try {
+        // Use the server's task once the clock has synced
+        if (serverClock && serverClock.task) {
+            return {
+                ...serverClock.task,
+                date: serverClock.task.date ? new Date(`${serverClock.task.date}T00:00:00+01:00`) : null
+            };
+        }
+        
         const dayNumber = getTodayDate();
         
         if (!dayNumber) {
@@ -199,4 +249,8 @@ updateVotingCountdown();
 setInterval(updateVotingCountdown, 1000);
 
 // Update task display (fetch from Firebase or use hardcoded)
-updateTaskDisplay();
\ No newline at end of file
+updateTaskDisplay();
+
+// Sync with the server clock now and periodically after that
+syncServerClock();
+setInterval(syncServerClock, CLOCK_SYNC_INTERVAL);
\ No newline at end of file
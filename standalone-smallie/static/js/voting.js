@@ -3,21 +3,11 @@
  * Handles voting area functionality, vote selection, and payment initiation
  */
 
-import {
-    getFirestore,
-    collection,
-    getDocs,
-    query,
-    where,
-    orderBy,
-    limit
-} from 'https://www.gstatic.com/firebasejs/11.0.2/firebase-firestore.js';
-
 // Import updatePrizeFund from payments module
 import { updatePrizeFund } from './payments.js';
 
-// Get Firebase instances
-const db = getFirestore();
+// Leaderboard entries by contestant id, kept current by the server's SSE stream
+const leaderboardEntries = new Map();
 
 // DOM Elements
 const votingForm = document.getElementById('voting-form');
@@ -42,19 +32,11 @@ export async function showTopContestants() {
         // Get contestant data sorted by votes
         let contestants = [];
         
-        try {
-            // Try to get from Firestore
-            const contestantsRef = collection(db, 'contestants');
-            const contestantsSnapshot = await getDocs(contestantsRef);
-            
-            if (!contestantsSnapshot.empty) {
-                contestantsSnapshot.forEach(doc => {
-                    contestants.push(doc.data());
-                });
-            }
-        } catch (error) {
-            console.error('Error fetching contestants:', error);
-            // If Firestore fails, get from DOM
+        if (leaderboardEntries.size > 0) {
+            // Use the leaderboard pushed by the server
+            contestants = Array.from(leaderboardEntries.values());
+        } else {
+            // Until the stream connects, get from DOM
             document.querySelectorAll('.contestant-card').forEach(card => {
                 const id = card.dataset.contestantId;
                 const name = card.querySelector('h3').textContent;
@@ -102,6 +84,69 @@ export async function showTopContestants() {
     }
 }
 
+// Apply leaderboard entries from the server and re-render
+function applyLeaderboardEntries(entries, removed = []) {
+    entries.forEach(entry => leaderboardEntries.set(entry.id, entry));
+    removed.forEach(id => leaderboardEntries.delete(id));
+    
+    showTopContestants();
+    showVotesLeaderboard();
+    
+    // Keep the vote badges on the contestant cards in step
+    entries.forEach(entry => {
+        const badge = document.querySelector(`.contestant-card[data-contestant-id="${entry.id}"] .votes-badge`);
+        if (badge) {
+            badge.textContent = `${entry.votes} votes`;
+        }
+    });
+}
+
+// Milliseconds between leaderboard polls when the stream isn't available
+const LEADERBOARD_POLL_INTERVAL = 10000;
+
+// Poll the leaderboard snapshot (old browsers, or servers that don't stream)
+function pollLeaderboard() {
+    fetch('/api/leaderboard')
+        .then(response => response.json())
+        .then(board => {
+            leaderboardEntries.clear();
+            applyLeaderboardEntries(board.entries);
+        })
+        .catch(error => console.error('Error fetching leaderboard:', error))
+        .finally(() => setTimeout(pollLeaderboard, LEADERBOARD_POLL_INTERVAL));
+}
+
+// Subscribe to the server's leaderboard stream (one shared board, changes only)
+function connectLeaderboardStream() {
+    if (typeof EventSource === 'undefined') {
+        pollLeaderboard();
+        return;
+    }
+    
+    const source = new EventSource('/api/leaderboard/stream');
+    
+    source.addEventListener('snapshot', (event) => {
+        const board = JSON.parse(event.data);
+        leaderboardEntries.clear();
+        applyLeaderboardEntries(board.entries);
+    });
+    
+    source.addEventListener('update', (event) => {
+        const changes = JSON.parse(event.data);
+        applyLeaderboardEntries(changes.entries, changes.removed);
+    });
+    
+    source.onerror = (error) => {
+        if (source.readyState === EventSource.CLOSED) {
+            // The server turned streaming down (204, e.g. on Vercel): poll instead
+            pollLeaderboard();
+            return;
+        }
+        // EventSource reconnects on its own and gets a fresh snapshot
+        console.warn('Leaderboard stream interrupted, reconnecting:', error);
+    };
+}
+
 // Function to select contestant in the form
 function selectContestantInForm(contestantId) {
     if (contestantSelect) {
@@ -158,19 +203,11 @@ export async function showVotesLeaderboard() {
         // Get contestant data sorted by votes
         let contestants = [];
         
-        try {
-            // Try to get from Firestore
-            const contestantsRef = collection(db, 'contestants');
-            const contestantsSnapshot = await getDocs(contestantsRef);
-            
-            if (!contestantsSnapshot.empty) {
-                contestantsSnapshot.forEach(doc => {
-                    contestants.push(doc.data());
-                });
-            }
-        } catch (error) {
-            console.error('Error fetching contestants:', error);
-            // If Firestore fails, get from DOM
+        if (leaderboardEntries.size > 0) {
+            // Use the leaderboard pushed by the server
+            contestants = Array.from(leaderboardEntries.values());
+        } else {
+            // Until the stream connects, get from DOM
             document.querySelectorAll('.contestant-card').forEach(card => {
                 const id = card.dataset.contestantId;
                 const name = card.querySelector('h3').textContent;
@@ -298,10 +335,11 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
     
-    // Refresh voting data every 5 minutes
+    // Keep the leaderboard live from the server stream
+    connectLeaderboardStream();
+    
+    // Refresh the prize fund every 5 minutes
     setInterval(() => {
-        showTopContestants();
-        showVotesLeaderboard();
         updatePrizeFund();
     }, 5 * 60 * 1000);
 });
\ No newline at end of file
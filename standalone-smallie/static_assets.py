@@ -0,0 +1,99 @@
+"""
+Fingerprinted static assets for Smallie
+
+build_assets.py minifies the CSS and JavaScript under static/, bundles the
+classic scripts listed in BUNDLES, and writes every output under
+static/dist/ with a content hash in its name, next to precompressed .gz
+(and, with the optional brotli package, .br) variants. static/dist/
+manifest.json maps each logical name (e.g. "css/styles.css") to its
+hashed file.
+
+Templates reference assets by logical name through asset_url() and
+asset_urls(). With a manifest those resolve to the hashed files, which
+/static/dist/ serves precompressed with a one-year immutable
+Cache-Control, so repeat visits don't request them again. Without one
+(a checkout that hasn't run the build) they resolve to the source files,
+which keep their usual caching.
+"""
+
+import os
+import json
+import logging
+import mimetypes
+import functools
+
+from flask import request, send_from_directory, abort
+
+from prerendered import _parse_accept_encoding
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+
+# Classic (non-module) scripts concatenated into one file, in load order.
+# ES modules keep one file each, since each has its own scope.
+BUNDLES = {
+    "js/site.js": ("js/script.js", "js/timer.js"),
+}
+
+# Where Flask (and Vercel's static route) serve static/
+STATIC_URL = "/static/"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Precompressed variants, best first: (Accept-Encoding token, file suffix)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@functools.lru_cache(maxsize=1)
+def load_manifest():
+    """{logical name: path under static/} from the last build, or {} if there's none"""
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logging.error(f"Ignoring unreadable asset manifest {MANIFEST_PATH}: {e}")
+        return {}
+
+
+def asset_urls(name):
+    """URLs to include for a logical asset: its built file, or its sources without a build"""
+    built = load_manifest().get(name)
+    if built:
+        return [STATIC_URL + built]
+    return [STATIC_URL + source for source in BUNDLES.get(name, (name,))]
+
+
+def asset_url(name):
+    """URL of a single-file asset (see asset_urls())"""
+    return asset_urls(name)[0]
+
+
+def serve_built(filename):
+    """Send a file from static/dist/, precompressed when the client allows it"""
+    path = os.path.join(DIST_DIR, filename)
+    if filename.endswith((".gz", ".br")) or path == MANIFEST_PATH or not os.path.isfile(path):
+        abort(404)
+
+    accepted = _parse_accept_encoding(request.headers.get("Accept-Encoding"))
+    encoding = None
+    for token, suffix in ENCODINGS:
+        if token in accepted and os.path.isfile(path + suffix):
+            encoding, filename = token, filename + suffix
+            break
+
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    response = send_from_directory(DIST_DIR, filename, mimetype=mimetype, max_age=31536000)
+    response.headers["Cache-Control"] = IMMUTABLE
+    response.headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def install(app):
+    """Expose asset_url()/asset_urls() to templates and serve static/dist/"""
+    app.jinja_env.globals.update(asset_url=asset_url, asset_urls=asset_urls)
+    app.add_url_rule("/static/dist/<path:filename>", "static_dist", serve_built)
@@ -0,0 +1,32 @@
+import pytest
+
+from fake_firestore import FakeFirestore
+
+
+@pytest.fixture
+def db():
+    """An empty in-memory Firestore (benchmarks/fake_firestore.py)"""
+    return FakeFirestore()
+
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """A test client for app.py backed by `db`, with the seed data written"""
+    import app
+    import seed
+    import rate_limit
+    import firebase_init
+    import competition_clock
+    from idempotency import IdempotencyGuard
+    from contestants_cache import ContestantsCache
+
+    seed.seed(db)
+    firebase_init.set_client(db)
+    competition_clock.reset()
+    monkeypatch.setattr(rate_limit, "ENABLED", False)
+    monkeypatch.setattr(app, "contestants_cache", ContestantsCache(listen=False))
+    monkeypatch.setattr(app, "vote_keys", IdempotencyGuard())
+    yield app.app.test_client()
+    firebase_init.set_client(None)
+    competition_clock.reset()
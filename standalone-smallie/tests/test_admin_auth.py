@@ -0,0 +1,86 @@
+import pytest
+from flask import Flask
+
+import admin_auth
+import rate_limit
+from admin_auth import admin_required
+
+
+@pytest.fixture
+def secret_app():
+    app = Flask(__name__)
+    app.secret_key = "test-secret"
+
+    @app.route("/secret")
+    @admin_required
+    def secret():
+        return "ok"
+
+    return app
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def sign_in(client, password):
+    return client.post("/api/admin/session", json={"password": password})
+
+
+def test_closed_without_a_password(secret_app, monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_PASSWORD", "")
+    client = secret_app.test_client()
+    assert client.get("/secret").status_code == 503
+    assert client.get("/secret", headers=bearer("")).status_code == 503
+
+
+def test_requires_a_session_token_not_the_password(secret_app, monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_PASSWORD", "s3cret")
+    client = secret_app.test_client()
+    with secret_app.test_request_context():
+        token = admin_auth.issue_token()
+    assert client.get("/secret").status_code == 401
+    assert client.get("/secret", headers=bearer("s3cret")).status_code == 401
+    assert client.get("/secret", headers=bearer(token + "x")).status_code == 401
+    assert client.get("/secret", headers=bearer(token)).status_code == 200
+
+    # Changing the password revokes tokens issued under the old one
+    monkeypatch.setattr(admin_auth, "ADMIN_PASSWORD", "n3w")
+    assert client.get("/secret", headers=bearer(token)).status_code == 401
+
+
+def test_tokens_expire(secret_app, monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_PASSWORD", "s3cret")
+    with secret_app.test_request_context():
+        token = admin_auth.issue_token()
+    monkeypatch.setattr(admin_auth, "SESSION_TTL", -1)
+    assert secret_app.test_client().get("/secret", headers=bearer(token)).status_code == 401
+
+
+def test_session_exchanges_the_password_for_a_token(client, monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_PASSWORD", "s3cret")
+    assert sign_in(client, "guess").status_code == 401
+    response = sign_in(client, "s3cret")
+    assert response.status_code == 200
+    assert response.get_json()["token"] != "s3cret"
+
+
+def test_session_is_rate_limited(client, monkeypatch):
+    import app
+
+    monkeypatch.setattr(admin_auth, "ADMIN_PASSWORD", "s3cret")
+    monkeypatch.setattr(rate_limit, "ENABLED", True)
+    monkeypatch.setattr(app.admin_login_limit, "_buckets", {})
+    statuses = [sign_in(client, f"guess-{n}").status_code for n in range(int(app.admin_login_limit.burst) + 1)]
+    assert statuses[-1] == 429
+    assert sign_in(client, "s3cret").status_code == 429
+
+
+@pytest.mark.parametrize("path", ["/api/stats", "/api/cache/stats", "/api/payouts/final", "/api/payouts/daily/1",
+                                  "/api/admin/signups", "/api/admin/votes"])
+def test_admin_data_needs_a_session(client, monkeypatch, path):
+    monkeypatch.setattr(admin_auth, "ADMIN_PASSWORD", "s3cret")
+    token = sign_in(client, "s3cret").get_json()["token"]
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=bearer("s3cret")).status_code == 401
+    assert client.get(path, headers=bearer(token)).status_code == 200
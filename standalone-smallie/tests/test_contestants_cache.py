@@ -0,0 +1,90 @@
+import threading
+
+import vote_counters
+from contestants_cache import ContestantsCache
+
+
+def seed(db):
+    for contestant_id in ("1", "2"):
+        db.collection("contestants").document(contestant_id).set({"id": int(contestant_id), "name": f"C{contestant_id}"})
+
+
+def add_votes(db, contestant_id, count):
+    batch = db.batch()
+    vote_counters.add_increment(batch, db, contestant_id, count)
+    batch.commit()
+
+
+def test_listeners_keep_counts_fresh_without_bumping_the_version(db):
+    seed(db)
+    cache = ContestantsCache(listen=True)
+    contestants, version = cache.get_with_version(db)
+    assert [c["votes"] for c in contestants] == [0, 0]
+
+    add_votes(db, "1", 5)
+    contestants, after_votes = cache.get_with_version(db)
+    assert contestants[0]["votes"] == 5
+    assert after_votes == version
+
+    db.collection("contestants").document("2").update({"eliminated": True})
+    contestants, after_edit = cache.get_with_version(db)
+    assert contestants[1]["eliminated"] is True
+    assert after_edit > version
+    cache.close()
+
+
+def test_concurrent_misses_register_listeners_once(db):
+    seed(db)
+    cache = ContestantsCache(listen=True)
+    start = threading.Barrier(8)
+
+    def miss():
+        start.wait()
+        cache.get(db)
+
+    threads = [threading.Thread(target=miss) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache._watches) == 2
+    cache.close()
+
+
+def test_ttl_reload_without_listeners(db):
+    seed(db)
+    cache = ContestantsCache(listen=False, ttl=0)
+    _, version = cache.get_with_version(db)
+    add_votes(db, "2", 3)
+    contestants, again = cache.get_with_version(db)
+    assert contestants[1]["votes"] == 3
+    assert again == version
+
+
+def test_ttl_still_applies_when_listeners_stall(db):
+    seed(db)
+    cache = ContestantsCache(listen=True, ttl=0, listen_ttl=0)
+    cache.get(db)
+    # The watches stop delivering but still look registered
+    for watch in cache._watches:
+        watch.unsubscribe()
+    add_votes(db, "1", 4)
+
+    contestants = cache.get(db)
+    assert contestants[0]["votes"] == 4
+    cache.close()
+
+
+def test_invalidate_reloads_without_rereading_shards(db, monkeypatch):
+    seed(db)
+    cache = ContestantsCache(listen=False, ttl=3600)
+    group_reads = []
+    collection_group = db.collection_group
+    monkeypatch.setattr(db, "collection_group", lambda name: group_reads.append(name) or collection_group(name))
+    cache.get(db)
+
+    db.collection("contestants").document("2").update({"eliminated": True})
+    cache.invalidate()
+    contestants = cache.get(db)
+    assert contestants[1]["eliminated"] is True
+    assert group_reads == ["vote_shards"]
@@ -0,0 +1,104 @@
+import elimination
+import vote_stats
+from elimination import DailyStandings
+
+
+def test_bottom_and_top():
+    standings = DailyStandings({"a": 5, "b": 2, "c": 9, "d": 7})
+    assert standings.bottom(1) == [("b", 2)]
+    assert standings.top(3) == [("c", 9), ("d", 7), ("a", 5)]
+
+
+def test_updates_reorder_the_heaps():
+    standings = DailyStandings({"a": 5, "b": 2, "c": 9})
+    standings.add("b", 10)
+    assert standings.bottom(1) == [("a", 5)]
+    assert standings.top(1) == [("b", 12)]
+    # Many updates leave stale heap entries behind; results stay correct
+    for _ in range(100):
+        standings.add("a")
+    assert standings.top(1) == [("a", 105)]
+    assert standings.bottom(1) == [("c", 9)]
+
+
+def test_removed_contestants_drop_out_and_stay_out():
+    standings = DailyStandings({"a": 1, "b": 2, "c": 3})
+    standings.remove("a")
+    standings.add("a", 50)
+    assert standings.bottom(1) == [("b", 2)]
+    assert standings.top(1) == [("c", 3)]
+    standings.join("d", 0)
+    assert standings.bottom(1) == [("d", 0)]
+    assert len(standings) == 3
+
+
+def test_ties_for_last_break_by_id():
+    standings = DailyStandings({"b": 1, "a": 1, "c": 4})
+    assert standings.tied_for_last() == ["a", "b"]
+    assert standings.bottom(1) == [("a", 1)]
+
+
+def test_ties_compare_numeric_ids_as_numbers():
+    standings = DailyStandings({"10": 1, "2": 1, "3": 5, "12": 5})
+    assert standings.tied_for_last() == ["2", "10"]
+    assert standings.bottom(1) == [("2", 1)]
+    assert standings.top(2) == [("3", 5), ("12", 5)]
+
+
+def test_empty_standings():
+    standings = DailyStandings()
+    assert standings.bottom(1) == []
+    assert standings.tied_for_last() == []
+
+
+def seed_day(db, day, tallies):
+    for contestant_id in ("1", "2", "3"):
+        db.collection("contestants").document(contestant_id).set({"name": f"C{contestant_id}", "eliminated": False})
+    batch = db.batch()
+    for contestant_id, count in tallies.items():
+        vote_stats.add_vote(batch, db, {"contestantId": contestant_id, "count": count, "day": day})
+    batch.commit()
+
+
+def test_close_day_eliminates_the_lowest_once(db):
+    seed_day(db, 2, {"1": 10, "2": 3, "3": 7})
+
+    result = elimination.close_day(db, 2)
+    assert result["eliminated"] == {"id": "2", "name": "C2", "votes": 3}
+    assert [entry["id"] for entry in result["top"]] == ["1", "3", "2"]
+    assert db.collection("contestants").document("2").get().to_dict()["eliminated"] is True
+
+    again = elimination.close_day(db, 2)
+    assert again["alreadyClosed"] is True
+    assert again["eliminated"]["id"] == "2"
+
+
+def test_close_day_dry_run_writes_nothing(db):
+    seed_day(db, 1, {"1": 1, "2": 2, "3": 3})
+    result = elimination.close_day(db, 1, dry_run=True)
+    assert result["eliminated"]["id"] == "1"
+    assert elimination.get_result(db, 1) is None
+    assert not db.collection("contestants").document("1").get().to_dict()["eliminated"]
+
+
+def test_cron_closes_every_missed_day_in_order(client, db, monkeypatch):
+    import competition_clock
+
+    monkeypatch.setenv("CRON_SECRET", "cron")
+    # Just the three contestants seed_day writes
+    for snap in db.collection("contestants").get():
+        snap.reference.delete()
+    seed_day(db, 1, {"1": 1, "2": 5, "3": 9})
+    seed_day(db, 2, {"2": 2, "3": 4})
+    # The run after day 2 closed, with day 1's run missed
+    day_two_closed = competition_clock.get_clock(db).close_at[1] + 60
+    monkeypatch.setattr(competition_clock.CompetitionClock, "state",
+                        lambda self, now=None, state=competition_clock.CompetitionClock.state: state(self, day_two_closed))
+
+    response = client.get("/api/eliminations/close", headers={"Authorization": "Bearer cron"})
+    assert response.get_json()["closedDays"] == [1, 2]
+    assert elimination.get_result(db, 1)["eliminated"]["id"] == "1"
+    assert elimination.get_result(db, 2)["eliminated"]["id"] == "2"
+
+    again = client.get("/api/eliminations/close", headers={"Authorization": "Bearer cron"})
+    assert again.get_json()["closedDays"] == []
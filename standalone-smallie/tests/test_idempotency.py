@@ -0,0 +1,34 @@
+from idempotency import DUPLICATE, IN_PROGRESS, NEW, IdempotencyGuard
+
+
+def test_claim_release_and_replay():
+    guard = IdempotencyGuard()
+    assert guard.claim("k") == (NEW, None)
+    assert guard.claim("k") == (IN_PROGRESS, None)
+    guard.release("k", {"votes": 3})
+    assert guard.claim("k") == (DUPLICATE, {"votes": 3})
+
+
+def test_failed_attempts_can_be_retried():
+    guard = IdempotencyGuard()
+    guard.claim("k")
+    guard.release("k")
+    assert guard.claim("k") == (NEW, None)
+
+
+def test_lru_evicts_oldest():
+    guard = IdempotencyGuard(lru_size=2)
+    for key in ("a", "b", "c"):
+        guard.claim(key)
+        guard.release(key, {"key": key})
+    assert guard.claim("a") == (NEW, None)
+    assert guard.claim("c") == (DUPLICATE, {"key": "c"})
+
+
+def test_durable_record_answers_unknown_keys():
+    guard = IdempotencyGuard()
+    records = {"old": {"votes": 9}}
+    assert guard.claim("old", records.get) == (DUPLICATE, {"votes": 9})
+    # Remembered from then on
+    assert guard.claim("old") == (DUPLICATE, {"votes": 9})
+    assert guard.claim("new", records.get) == (NEW, None)
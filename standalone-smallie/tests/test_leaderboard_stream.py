@@ -0,0 +1,28 @@
+import leaderboard_stream
+from leaderboard_stream import LeaderboardBroadcaster
+
+
+def test_stream_ends_after_its_lifetime():
+    broadcaster = LeaderboardBroadcaster(lambda: [{"id": "1", "name": "Ada", "votes": 3}], interval=3600)
+    subscriber = broadcaster.subscribe()
+
+    messages = list(broadcaster.stream(subscriber, max_seconds=0.05))
+    assert messages[0] == f"retry: {leaderboard_stream.RETRY_MS}\n\n"
+    assert messages[1].startswith("event: snapshot\n")
+    assert broadcaster.subscriber_count() == 0
+
+
+def test_snapshot_refreshes_without_subscribers():
+    contestants = [{"id": "1", "name": "Ada", "votes": 3}]
+    broadcaster = LeaderboardBroadcaster(lambda: contestants, interval=0)
+    broadcaster.refresh_if_stale()
+    contestants[0]["votes"] = 5
+
+    broadcaster.refresh_if_stale()
+    assert broadcaster.snapshot()[0]["votes"] == 5
+
+
+def test_stream_is_off_when_disabled(client, monkeypatch):
+    monkeypatch.setattr(leaderboard_stream, "STREAM_ENABLED", False)
+    assert client.get("/api/leaderboard/stream").status_code == 204
+    assert client.get("/api/leaderboard").get_json()["entries"]
@@ -0,0 +1,30 @@
+import threading
+
+from metrics import RequestMetrics
+
+
+def record(metrics, status=200):
+    metrics.start("GET", "/")
+    metrics.finish("GET", "/", status, 0.02)
+
+
+def test_render_counts_requests_and_latency():
+    metrics = RequestMetrics()
+    record(metrics)
+    record(metrics, 404)
+    text = metrics.render()
+    assert 'smallie_http_requests_total{method="GET",route="/",status="200"} 1' in text
+    assert 'smallie_http_requests_total{method="GET",route="/",status="404"} 1' in text
+    assert 'smallie_http_request_duration_seconds_bucket{method="GET",route="/",le="0.025"} 2' in text
+    assert 'smallie_http_requests_in_flight{method="GET",route="/"} 0' in text
+
+
+def test_finished_threads_are_folded_into_one_aggregate():
+    metrics = RequestMetrics()
+    for _ in range(50):
+        thread = threading.Thread(target=record, args=(metrics,))
+        thread.start()
+        thread.join()
+
+    assert len(metrics._shards) == 0
+    assert 'status="200"} 50' in metrics.render()
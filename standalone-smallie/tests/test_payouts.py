@@ -0,0 +1,101 @@
+import datetime
+from decimal import Decimal
+
+import payouts
+from payouts import distribute, summarize
+
+
+def test_distribute_splits_50_30_20_rounding_down():
+    contestants = {"1": {"votes": 10}, "2": {"votes": 30}, "3": {"votes": 20}, "4": {"votes": 5}}
+    winners, unallocated = distribute(Decimal("100.01"), contestants, {"2": "Bola"})
+    assert [(w["place"], w["id"], w["usd"]) for w in winners] == [(1, "2", "50.00"), (2, "3", "30.00"), (3, "1", "20.00")]
+    assert winners[0]["name"] == "Bola"
+    assert unallocated == Decimal("0.01")
+
+
+def test_distribute_ties_go_to_the_lower_id_and_skip_zero_votes():
+    winners, unallocated = distribute(Decimal("10"), {"b": {"votes": 4}, "a": {"votes": 4}, "c": {"votes": 0}}, {})
+    assert [w["id"] for w in winners] == ["a", "b"]
+    assert unallocated == Decimal("2.00")
+
+    # Numeric ids compare as numbers, as in the elimination
+    winners, _ = distribute(Decimal("10"), {"10": {"votes": 4}, "2": {"votes": 4}}, {})
+    assert [w["id"] for w in winners] == ["2", "10"]
+
+
+def test_amounts_never_exceed_the_pool():
+    for cents in range(1, 500, 7):
+        pool = Decimal(cents) / 100
+        winners, unallocated = distribute(pool, {"1": {"votes": 3}, "2": {"votes": 2}, "3": {"votes": 1}}, {})
+        assert sum(Decimal(w["usd"]) for w in winners) + unallocated == pool
+        assert unallocated >= 0
+
+
+def test_summarize_empty_row():
+    summary = summarize(None, payouts.DAILY_SHARE, {}, None)
+    assert summary["votes"] == 0
+    assert summary["pool"]["usd"] == "0.00"
+    assert summary["winners"] == []
+
+
+def add_vote(db, vote_id, contestant_id, day, count=1, minute=0):
+    vote = {"contestantId": contestant_id, "count": count,
+            "timestamp": datetime.datetime(2025, 4, 15, 10, minute, tzinfo=datetime.timezone.utc)}
+    if day:
+        vote["day"] = day
+    db.collection("votes").document(vote_id).set(vote)
+
+
+def row(db, row_id):
+    return db.collection(payouts.LEDGER_COLLECTION).document(row_id).get().to_dict() or {}
+
+
+def test_rollup_is_incremental(db):
+    add_vote(db, "v1", "1", 1, count=2, minute=1)
+    add_vote(db, "v2", "2", 1, minute=2)
+    assert payouts.rollup(db) == 2
+    assert payouts.rollup(db) == 0
+
+    add_vote(db, "v3", "1", 2, minute=3)
+    assert payouts.rollup(db) == 1
+    assert row(db, "day_1")["votes"] == 3
+    assert row(db, "day_2")["votes"] == 1
+    assert row(db, "total")["votes"] == 4
+    assert row(db, "total")["revenue_cents"] == 4 * payouts.vote_cents({"count": 1})
+
+
+def test_undated_votes_count_toward_the_total_until_reset(db):
+    add_vote(db, "old", "1", None, minute=1)
+    add_vote(db, "new", "1", 2, minute=2)
+    payouts.rollup(db)
+    assert not row(db, "day_0")
+    assert row(db, "total")["votes"] == 2
+    assert row(db, "total")["undated_votes"] == 1
+
+    # The bucket migration backfills the day, then resets the ledger
+    db.collection("votes").document("old").update({"day": 1})
+    payouts.reset(db)
+    payouts.rollup(db)
+    assert row(db, "day_1")["votes"] == 1
+    assert row(db, "day_2")["votes"] == 1
+    assert row(db, "total")["votes"] == 2
+    assert "undated_votes" not in row(db, "total")
+
+
+def test_stats_take_revenue_from_the_ledger(client, db, monkeypatch):
+    import admin_auth
+    import vote_stats
+    import vote_counters
+
+    monkeypatch.setattr(admin_auth, "ADMIN_PASSWORD", "s3cret")
+    monkeypatch.setattr(vote_stats, "STATS_TTL", 0)
+    monkeypatch.setattr(payouts, "ledger", payouts.PayoutLedger(interval=0))
+    vote = dict(vote_counters.validate_vote({"contestantId": "1", "email": "a@b.co", "count": 3}), day=1)
+    vote_counters.record_vote(db, vote, extra_writes=(vote_stats.add_vote,))
+
+    token = client.post("/api/admin/session", json={"password": "s3cret"}).get_json()["token"]
+    stats = client.get("/api/stats", headers={"Authorization": f"Bearer {token}"}).get_json()
+    assert stats["total_votes"] == 3
+    assert stats["total_revenue"] == "1.50"
+    assert stats["prize_pool"] == "1.35"
+    assert "daily_payout" not in stats["days"]["1"]
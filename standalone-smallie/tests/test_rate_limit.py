@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+from flask import Flask
+
+import firebase_init
+import rate_limit
+import wsgi_adapter
+from rate_limit import TokenBucketLimiter, client_ip, forwarded_client, rate_limited, verified_uid
+
+
+def test_bucket_allows_burst_then_refills():
+    bucket = TokenBucketLimiter("test", rate=1, burst=3)
+    assert [bucket.acquire("a", now=0)[0] for _ in range(3)] == [True, True, True]
+    allowed, wait = bucket.acquire("a", now=0)
+    assert not allowed and wait == 1.0
+    assert bucket.acquire("a", now=1)[0]
+    # Other keys have their own bucket
+    assert bucket.acquire("b", now=1)[0]
+
+
+def test_prune_keeps_memory_bounded():
+    bucket = TokenBucketLimiter("test", rate=1, burst=1, max_keys=10)
+    for index in range(100):
+        bucket.acquire(str(index), now=0)
+    assert len(bucket._buckets) <= 10
+
+
+def test_client_ip_ignores_forwarded_for_by_default(monkeypatch):
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", 0)
+    app = Flask(__name__)
+    with app.test_request_context(headers={"X-Forwarded-For": "1.2.3.4"}, environ_base={"REMOTE_ADDR": "10.0.0.9"}):
+        assert client_ip() == "10.0.0.9"
+
+
+def test_client_ip_takes_hop_added_by_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", 1)
+    app = Flask(__name__)
+    headers = {"X-Forwarded-For": "6.6.6.6, 1.2.3.4"}
+    with app.test_request_context(headers=headers, environ_base={"REMOTE_ADDR": "10.0.0.9"}):
+        assert client_ip() == "1.2.3.4"
+
+
+def test_wsgi_adapter_takes_the_same_hop(monkeypatch):
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", 1)
+    request = SimpleNamespace(headers={"x-forwarded-for": "6.6.6.6, 1.2.3.4"}, path="/", method="GET")
+    assert wsgi_adapter.build_environ(request)["REMOTE_ADDR"] == "1.2.3.4"
+    assert forwarded_client("6.6.6.6, 1.2.3.4", "127.0.0.1", trusted_proxies=0) == "127.0.0.1"
+
+
+def test_voter_bucket_is_keyed_on_the_verified_uid(monkeypatch):
+    monkeypatch.setattr(rate_limit, "ENABLED", True)
+    monkeypatch.setattr(firebase_init, "verify_id_token", lambda token: "uid-1" if token == "good" else None)
+    app = Flask(__name__)
+    voter_limit = TokenBucketLimiter("voter", rate=1 / 60, burst=1)
+
+    @app.route("/vote", methods=["POST"])
+    @rate_limited((voter_limit, verified_uid))
+    def vote():
+        return "ok"
+
+    client = app.test_client()
+    signed_in = {"Authorization": "Bearer good"}
+    assert client.post("/vote", headers=signed_in).status_code == 200
+    assert client.post("/vote", headers=signed_in).status_code == 429
+    # A body field or a forged token doesn't pick the bucket: no voter limit applies
+    assert client.post("/vote", json={"userId": "uid-1"}).status_code == 200
+    assert client.post("/vote", headers={"Authorization": "Bearer forged"}).status_code == 200
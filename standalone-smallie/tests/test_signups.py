@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+from signups import SignupValidationError, URL_PATTERN, validate_signup
+
+VALID = {"name": "Ada Obi", "bio": "I dance and I sing", "email": "ada@example.com"}
+
+
+def test_valid_signup_fills_optional_fields():
+    signup = validate_signup(dict(VALID, streamUrl="https://twitch.tv/ada"))
+    assert signup["streamUrl"] == "https://twitch.tv/ada"
+    assert signup["phone"] == ""
+
+
+@pytest.mark.parametrize("changes", [
+    {"name": "A"},
+    {"name": "Ada 2"},
+    {"bio": "short"},
+    {"email": "not-an-email"},
+    {"streamUrl": "not a url"},
+    {"experience": "x" * 501},
+])
+def test_invalid_signups_are_rejected(changes):
+    with pytest.raises(SignupValidationError):
+        validate_signup(dict(VALID, **changes))
+
+
+def test_rejects_non_objects():
+    with pytest.raises(SignupValidationError):
+        validate_signup(["not", "a", "dict"])
+
+
+def test_url_pattern_fails_fast_on_long_input():
+    started = time.perf_counter()
+    assert not URL_PATTERN.match("http://a.co/" + "a" * 300 + "!")
+    assert time.perf_counter() - started < 0.1
@@ -0,0 +1,164 @@
+import os
+import time
+
+import pytest
+
+import vote_buffer
+import vote_counters
+from vote_buffer import VoteBuffer
+
+
+def make_vote(contestant_id="1", key=None):
+    vote = {"contestantId": contestant_id, "count": 1, "day": 1, "hour": "2025-04-15T10"}
+    if key:
+        vote["idempotencyKey"] = key
+    return vote
+
+
+def open_buffer(db, path):
+    # A long interval so only explicit flush() calls write
+    return VoteBuffer(db, path=str(path), flush_interval=3600).open()
+
+
+def vote_ids(db):
+    return {snap.id for snap in db.collection("votes").get()}
+
+
+def test_flush_writes_votes_and_counters(db, tmp_path):
+    buffer = open_buffer(db, tmp_path / "wal.log")
+    for _ in range(3):
+        buffer.submit(make_vote())
+    assert buffer.pending_votes("1") == 3
+
+    buffer.flush()
+    assert len(vote_ids(db)) == 3
+    assert vote_counters.get_shard_total(db, "1") == 3
+    assert buffer.pending_votes("1") == 0
+    buffer.close()
+
+
+def test_unflushed_votes_are_replayed(db, tmp_path):
+    path = tmp_path / "wal.log"
+    buffer = open_buffer(db, path)
+    buffer.submit(make_vote())
+    buffer.submit(make_vote())
+    # Simulate a crash: the log is closed without flushing
+    buffer._stopped.set()
+    buffer._file.close()
+    buffer._file_lock.close()
+
+    replayed = open_buffer(db, path)
+    assert replayed.replayed_votes == 2
+    replayed.flush()
+    assert len(vote_ids(db)) == 2
+    replayed.close()
+
+
+def test_replay_after_commit_skips_written_votes(db, tmp_path):
+    path = tmp_path / "wal.log"
+    buffer = open_buffer(db, path)
+    buffer.submit(make_vote())
+    buffer.submit(make_vote())
+    # Committed, but the process died before the checkpoint was logged
+    with buffer._lock:
+        chunk = buffer._take_chunk()
+    buffer._commit(chunk)
+    buffer._stopped.set()
+    buffer._file.close()
+    buffer._file_lock.close()
+
+    replayed = open_buffer(db, path)
+    replayed.flush()
+    assert replayed.conflicts == 2
+    assert len(vote_ids(db)) == 2
+    assert vote_counters.get_shard_total(db, "1") == 2
+    replayed.close()
+
+
+def test_sequence_survives_compaction(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(vote_buffer, "COMPACT_BYTES", 1)
+    path = tmp_path / "wal.log"
+    buffer = open_buffer(db, path)
+    for _ in range(3):
+        buffer.submit(make_vote())
+    buffer.flush()
+    buffer.close()
+
+    reopened = open_buffer(db, path)
+    for _ in range(3):
+        reopened.submit(make_vote())
+    reopened.flush()
+    assert reopened.conflicts == 0
+    assert len(vote_ids(db)) == 6
+    assert vote_counters.get_shard_total(db, "1") == 6
+    reopened.close()
+
+
+def test_duplicate_keys_in_one_chunk_are_written_once(db, tmp_path):
+    buffer = open_buffer(db, tmp_path / "wal.log")
+    buffer.submit(make_vote(key="pay-1"))
+    buffer.submit(make_vote(key="pay-1"))
+    buffer.submit(make_vote(key="pay-2"))
+
+    buffer.flush()
+    assert vote_ids(db) == {"pay-1", "pay-2"}
+    assert buffer.stats()["pending"] == 0
+    # Flushing isn't stuck: later votes still go out
+    buffer.submit(make_vote(key="pay-3"))
+    buffer.flush()
+    assert vote_ids(db) == {"pay-1", "pay-2", "pay-3"}
+    buffer.close()
+
+
+@pytest.mark.skipif(vote_buffer.fcntl is None, reason="needs advisory file locks")
+def test_each_buffer_claims_its_own_log(db, tmp_path):
+    path = tmp_path / "wal.log"
+    first = open_buffer(db, path)
+    second = open_buffer(db, path)
+    assert first.path == str(path)
+    assert second.path == str(tmp_path / "wal.1.log")
+    second.close()
+    first.close()
+
+    # Released on close, so the next process takes the first log again
+    again = open_buffer(db, path)
+    assert again.path == str(path)
+    again.close()
+
+
+def test_compaction_during_fsync_does_not_fail_the_vote(db, tmp_path, monkeypatch):
+    buffer = open_buffer(db, tmp_path / "wal.log")
+    fsync = os.fsync
+
+    def fsync_while_compacting(fileno):
+        # A flush compacts the log between the lock being released and the fsync
+        monkeypatch.setattr(os, "fsync", fsync)
+        with buffer._lock:
+            old, buffer._file = buffer._file, open(buffer.path, "a", encoding="utf-8")
+            old.close()
+        fsync(fileno)
+
+    monkeypatch.setattr(os, "fsync", fsync_while_compacting)
+    buffer.submit(make_vote())
+    assert buffer.fsyncs == 1
+    buffer.close()
+
+
+def test_close_waits_for_every_workers_buffer(db, tmp_path):
+    first = open_buffer(db, tmp_path / "first.log")
+    second = open_buffer(db, tmp_path / "second.log")
+    first.submit(make_vote())
+    second.submit(make_vote())
+    voting_closed = time.time()
+    first.drain()
+
+    # The second worker's vote isn't in Firestore yet
+    assert vote_buffer.wait_until_drained(db, voting_closed, timeout=0) == [second.path]
+    second.drain()
+    assert vote_buffer.wait_until_drained(db, voting_closed, timeout=0) == []
+    assert len(vote_ids(db)) == 2
+
+    # A cleanly stopped worker never holds up a later close
+    first.close()
+    assert vote_buffer.wait_until_drained(db, time.time() + 60, timeout=0) == [second.path]
+    second.close()
@@ -0,0 +1,100 @@
+import types
+
+import pytest
+
+import app
+import competition_clock
+import vote_counters
+from vote_counters import VoteValidationError, validate_vote
+
+
+def test_validate_vote_normalises():
+    vote = validate_vote({"contestantId": " 3 ", "email": "a@b.co", "count": "2", "idempotencyKey": "tx-1"})
+    assert vote["contestantId"] == "3"
+    assert vote["count"] == 2
+    assert vote["amount"] == 2 * vote_counters.VOTE_PRICE
+    assert vote["idempotencyKey"] == "tx-1"
+
+
+@pytest.mark.parametrize("payload", [
+    None,
+    {"email": "a@b.co"},
+    {"contestantId": "a/b", "email": "a@b.co"},
+    {"contestantId": "1", "email": "a@b.co", "count": 0},
+    {"contestantId": "1", "email": "a@b.co", "count": vote_counters.MAX_VOTES_PER_REQUEST + 1},
+    {"contestantId": "1"},
+    {"contestantId": "1", "email": "nope"},
+    {"contestantId": "1", "email": "a@b.co", "idempotencyKey": "bad key!"},
+])
+def test_validate_vote_rejects(payload):
+    with pytest.raises(VoteValidationError):
+        validate_vote(payload)
+
+
+def at(monkeypatch, when):
+    # Pin the time cast_vote reads; the clock is the seeded catalog's
+    monkeypatch.setattr(app, "time", types.SimpleNamespace(time=lambda: when))
+
+
+def first_release(db):
+    return competition_clock.get_clock(db).release_at[0]
+
+
+def post_vote(client, **fields):
+    return client.post("/api/votes", json=dict({"contestantId": "1", "email": "fan@example.com"}, **fields))
+
+
+def test_vote_counts_while_voting_is_open(client, db, monkeypatch):
+    at(monkeypatch, first_release(db) + 3600)
+    response = post_vote(client)
+    assert response.status_code == 200
+    assert vote_counters.get_shard_total(db, "1") == 1
+    vote = next(iter(db.collection("votes").get())).to_dict()
+    assert vote["day"] == 1
+
+
+@pytest.mark.parametrize("offset", [-3600, 13 * 3600])
+def test_votes_are_refused_outside_voting(client, db, monkeypatch, offset):
+    # An hour before day 1 opens, and after day 1 closes at 21:00
+    at(monkeypatch, first_release(db) + offset)
+    response = post_vote(client, idempotencyKey="late-1")
+    assert response.status_code == 403
+    assert response.get_json()["code"] == "voting_closed"
+    assert vote_counters.get_shard_total(db, "1") == 0
+
+    # The key isn't burnt: the same vote goes through once voting opens
+    at(monkeypatch, first_release(db) + 3600)
+    assert post_vote(client, idempotencyKey="late-1").status_code == 200
+
+
+def test_record_vote_returns_the_approximate_total_without_reading_shards(db):
+    vote = validate_vote({"contestantId": "7", "email": "a@b.co", "count": 3})
+    total = vote_counters.record_vote(db, vote, contestant={"id": 7, "votes": 40})
+    assert total == 43
+    assert vote_counters.get_shard_total(db, "7") == 3
+
+
+def test_record_vote_rejects_eliminated_contestants(db):
+    db.collection("contestants").document("7").set({"id": 7, "eliminated": True})
+    vote = validate_vote({"contestantId": "7", "email": "a@b.co"})
+    with pytest.raises(VoteValidationError):
+        vote_counters.record_vote(db, vote)
+
+
+def test_replays_answer_the_recorded_outcome(client, db, monkeypatch):
+    at(monkeypatch, first_release(db) + 3600)
+    first = post_vote(client, idempotencyKey="tx-42").get_json()
+    assert first["votes"] is not None
+
+    # Same process: answered from the LRU
+    replay = post_vote(client, idempotencyKey="tx-42").get_json()
+    assert replay["duplicate"] and replay["votes"] == first["votes"]
+
+    # Another instance (or a restart) doesn't remember the key: the vote's
+    # create() fails and the answer comes from the recorded vote
+    from idempotency import IdempotencyGuard
+    monkeypatch.setattr(app, "vote_keys", IdempotencyGuard())
+    for _ in range(2):
+        replay = post_vote(client, idempotencyKey="tx-42").get_json()
+        assert replay["duplicate"] and replay["votes"] is not None
+    assert vote_counters.get_shard_total(db, "1") == 1
@@ -0,0 +1,491 @@
+"""
+Write-behind vote ingestion for Smallie
+
+With VOTE_BUFFER_ENABLED=1, POST /api/votes doesn't write to Firestore in
+the request. Instead each vote is:
+
+1. appended to a local write-ahead log (one JSON line), with fsyncs shared
+   by every request waiting at the same moment (group commit);
+2. added to an in-memory buffer, which a background thread flushes every
+   VOTE_FLUSH_INTERVAL seconds or as soon as VOTE_FLUSH_SIZE votes are
+   waiting.
+
+A flush is one Firestore batch: a single summed shard increment per
+contestant, one summed stats increment per (day, hour, contestant), and the raw
+vote documents. After a successful commit a checkpoint line is appended to
+the log. On startup the log is replayed and every vote after the last
+checkpoint is buffered again.
+
+Every buffered vote has a fixed document id (its idempotency key, or
+<log id>-<sequence>) written with create(). If the process dies between a
+commit and its checkpoint, the replayed votes collide with the documents
+already written; those are dropped and the rest committed, so nothing is
+counted twice.
+
+Each process owns one log file, held with an exclusive lock: the first
+process takes VOTE_WAL_PATH, further workers (gunicorn) take numbered
+siblings (vote-wal.1.log, ...). After a restart the workers claim the same
+files again and replay them, so run at least as many workers as before, or
+a log left over from a larger pool waits until a worker claims it.
+
+Votes waiting in other workers' buffers are invisible to the process that
+closes a day, so each buffer keeps a drain marker in Firestore
+(vote_buffers/{log id}): after a flush leaves it empty, at most every
+VOTE_DRAIN_MARKER_INTERVAL seconds, it records that every vote logged
+before the flush started is in Firestore. wait_until_drained() blocks until
+every marker has passed a given time (a day's voting close). A log whose
+process died with votes in it holds the close up until a worker claims and
+replays it; delete its marker only if the log is truly gone.
+
+The logs must live on a persistent local disk, so this mode is for
+self-hosted deployments (local_server.py, gunicorn), not Vercel.
+"""
+
+import os
+import json
+import time
+import uuid
+import atexit
+import logging
+import datetime
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks (Windows); run a single process
+    fcntl = None
+
+import vote_stats
+import vote_counters
+
+ENABLED = os.environ.get("VOTE_BUFFER_ENABLED", "0") == "1"
+
+WAL_PATH = os.environ.get(
+    "VOTE_WAL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp", "vote-wal.log"))
+
+# Seconds between flushes, and the buffer size that triggers one early
+FLUSH_INTERVAL = float(os.environ.get("VOTE_FLUSH_INTERVAL", "1"))
+FLUSH_SIZE = int(os.environ.get("VOTE_FLUSH_SIZE", "200"))
+
+# Rewrite the log once everything in it is flushed and it has grown past this
+COMPACT_BYTES = int(os.environ.get("VOTE_WAL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+
+# Firestore's limit on writes per batch
+MAX_BATCH_WRITES = 500
+
+# Longest wait between retries after a failed flush
+MAX_RETRY_DELAY = 30
+
+# Log files tried per path before giving up (one per worker process)
+MAX_LOG_FILES = 64
+
+# One drain marker per log: {"drainedThrough": epoch seconds, "path", "closed"}
+MARKERS_COLLECTION = "vote_buffers"
+
+# Seconds between drain marker updates while the flusher runs
+MARKER_INTERVAL = float(os.environ.get("VOTE_DRAIN_MARKER_INTERVAL", "5"))
+
+# Seconds wait_until_drained() waits for the other workers' markers
+DRAIN_TIMEOUT = float(os.environ.get("VOTE_DRAIN_TIMEOUT", "20"))
+
+
+def claim_log(path, max_files=MAX_LOG_FILES):
+    """
+    Lock the first of `path`, path.1, path.2, ... that no other process
+    holds; returns (path, lock file). The lock lasts as long as the lock file
+    stays open.
+    """
+    stem, ext = os.path.splitext(path)
+    for index in range(max_files):
+        candidate = path if index == 0 else f"{stem}.{index}{ext}"
+        lock = open(candidate + ".lock", "a")
+        if fcntl is None:
+            return candidate, lock
+        try:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return candidate, lock
+        except OSError:
+            lock.close()
+    raise RuntimeError(f"All {max_files} vote logs at {path} are in use by other processes")
+
+
+class VoteBuffer:
+    """Write-ahead logged, coalescing buffer in front of the vote counters"""
+
+    def __init__(self, db, path=WAL_PATH, flush_interval=FLUSH_INTERVAL, flush_size=FLUSH_SIZE):
+        self.db = db
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+
+        # Guards the log file, sequence numbers and the pending list together,
+        # so the buffer is always in log order
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_counts = {}
+        self._seq = 0
+        self._checkpoint = 0
+        self._log_id = None
+        self._file = None
+        self._file_lock = None
+
+        # Group commit state
+        self._sync_cond = threading.Condition()
+        self._synced = 0
+        self._syncing = False
+
+        self._flush_lock = threading.Lock()
+        self._marker_at = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.flushes = 0
+        self.flushed_votes = 0
+        self.replayed_votes = 0
+        self.conflicts = 0
+        self.failures = 0
+        self.fsyncs = 0
+
+    # -- log ---------------------------------------------------------------
+
+    def open(self):
+        """Open the log, re-buffer unflushed votes and start the flusher"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.path, self._file_lock = claim_log(self.path)
+        entries = self._read_log()
+        with self._lock:
+            for entry in entries:
+                if entry["seq"] > self._checkpoint:
+                    self._buffer(entry)
+            self.replayed_votes = len(self._pending)
+            self._synced = self._seq
+            self._file = open(self.path, "a", encoding="utf-8")
+            if self._log_id is None:
+                self._log_id = uuid.uuid4().hex[:12]
+                self._write({"log": self._log_id})
+
+        # Nothing from this log is known to be in Firestore until the first flush
+        self._mark_drained(0)
+        if self.replayed_votes:
+            logging.warning(f"Replaying {self.replayed_votes} unflushed votes from {self.path}")
+            self._wake.set()
+        self._thread = threading.Thread(target=self._run, name="vote-buffer-flusher", daemon=True)
+        self._thread.start()
+        return self
+
+    def _read_log(self):
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    continue
+                if "log" in record:
+                    self._log_id = record["log"]
+                elif "checkpoint" in record:
+                    self._checkpoint = max(self._checkpoint, record["checkpoint"])
+                    # A compacted log keeps the last sequence number here
+                    self._seq = max(self._seq, record.get("seq", 0))
+                elif "seq" in record:
+                    entries.append(record)
+                    self._seq = max(self._seq, record["seq"])
+        return entries
+
+    def _write(self, record):
+        # Must be called with the lock held
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def _sync_to(self, seq):
+        """Block until the log is fsynced past `seq`; one fsync serves every waiter"""
+        with self._sync_cond:
+            while self._synced < seq:
+                if self._syncing:
+                    self._sync_cond.wait()
+                    continue
+                self._syncing = True
+                with self._lock:
+                    self._file.flush()
+                    target = self._seq
+                    # Our own descriptor: a flush may compact (close and reopen)
+                    # the log while we fsync outside the lock. The reopened file
+                    # is the same inode and was fsynced by _compact()
+                    fileno = os.dup(self._file.fileno())
+                self._sync_cond.release()
+                try:
+                    os.fsync(fileno)
+                    self.fsyncs += 1
+                finally:
+                    os.close(fileno)
+                    self._sync_cond.acquire()
+                    self._syncing = False
+                    self._synced = max(self._synced, target)
+                    self._sync_cond.notify_all()
+
+    # -- buffer ------------------------------------------------------------
+
+    def _buffer(self, entry):
+        # Must be called with the lock held
+        vote = entry["vote"]
+        self._pending.append(entry)
+        self._pending_counts[vote["contestantId"]] = self._pending_counts.get(vote["contestantId"], 0) + vote["count"]
+
+    def submit(self, vote):
+        """Durably log a validated vote and buffer it; returns its document id"""
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            vote = dict(vote, id=vote.get("idempotencyKey") or f"{self._log_id}-{seq}", timestamp=time.time())
+            entry = {"seq": seq, "vote": vote}
+            self._write(entry)
+            self._buffer(entry)
+            full = len(self._pending) >= self.flush_size
+        if full:
+            self._wake.set()
+        self._sync_to(seq)
+        return vote["id"]
+
+    def pending_votes(self, contestant_id):
+        """Votes for a contestant that are logged but not yet in Firestore"""
+        with self._lock:
+            return self._pending_counts.get(contestant_id, 0)
+
+    # -- flushing ----------------------------------------------------------
+
+    def _run(self):
+        delay = self.flush_interval
+        while not self._stopped.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stopped.is_set():
+                # close() does the final flush
+                return
+            try:
+                self.drain(force=False)
+                delay = self.flush_interval
+            except Exception as e:
+                self.failures += 1
+                delay = min(MAX_RETRY_DELAY, max(delay, self.flush_interval) * 2)
+                logging.error(f"Vote flush failed, retrying in {delay:.0f}s: {e}")
+
+    def drain(self, force=True):
+        """
+        Flush, then record in the drain marker that every vote logged before
+        the flush started is in Firestore (unless `force` is False and the
+        marker was updated in the last MARKER_INTERVAL seconds)
+        """
+        started = time.time()
+        self.flush()
+        if force or self._marker_at is None or time.monotonic() - self._marker_at >= MARKER_INTERVAL:
+            self._mark_drained(started)
+
+    def _mark_drained(self, through, closed=False):
+        try:
+            self.db.collection(MARKERS_COLLECTION).document(self._log_id).set(
+                {"drainedThrough": through, "path": self.path, "closed": closed})
+            self._marker_at = time.monotonic()
+        except Exception as e:
+            # The votes are in Firestore; the next flush retries the marker
+            logging.error(f"Could not update the drain marker for {self.path}: {e}")
+
+    def flush(self):
+        """Write everything buffered to Firestore, one batch per chunk"""
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    chunk = self._take_chunk()
+                if not chunk:
+                    return
+                try:
+                    self._commit(chunk)
+                except Exception:
+                    with self._lock:
+                        # Put the chunk back in front, keeping log order
+                        self._pending[:0] = chunk
+                    raise
+                with self._lock:
+                    for entry in chunk:
+                        contestant_id = entry["vote"]["contestantId"]
+                        self._pending_counts[contestant_id] -= entry["vote"]["count"]
+                        if self._pending_counts[contestant_id] <= 0:
+                            del self._pending_counts[contestant_id]
+                    self._checkpoint = chunk[-1]["seq"]
+                    self._write({"checkpoint": self._checkpoint})
+                    self._compact()
+                self.flushes += 1
+                self.flushed_votes += len(chunk)
+
+    def _take_chunk(self):
+        # Must be called with the lock held. Takes as many votes as fit in one batch
+        ids, contestants, day_contestants, size = set(), set(), set(), 0
+        for entry in self._pending:
+            vote = entry["vote"]
+            if vote["id"] in ids:
+                # The same idempotency key logged twice (e.g. once before a
+                # restart); it's taken with the chunk but written once
+                size += 1
+                continue
+            ids.add(vote["id"])
+            contestants.add(vote["contestantId"])
+            day_contestants.add((vote.get("day"), vote.get("hour"), vote["contestantId"]))
+            if size + 1 + len(contestants) + len(day_contestants) > MAX_BATCH_WRITES:
+                break
+            size += 1
+        chunk = self._pending[:size]
+        del self._pending[:size]
+        return chunk
+
+    def _commit(self, chunk):
+        from google.api_core.exceptions import Conflict
+
+        votes = {}
+        for entry in chunk:
+            votes.setdefault(entry["vote"]["id"], entry["vote"])
+        self.conflicts += len(chunk) - len(votes)
+        votes = list(votes.values())
+
+        try:
+            self._write_batch(votes)
+        except Conflict:
+            # Some votes were committed before a crash (or by a replay); skip those
+            refs = [self.db.collection("votes").document(vote["id"]) for vote in votes]
+            existing = {snap.id for snap in self.db.get_all(refs) if snap.exists}
+            self.conflicts += len(existing)
+            remaining = [vote for vote in votes if vote["id"] not in existing]
+            if remaining:
+                self._write_batch(remaining)
+
+    def _write_batch(self, votes):
+        from firebase_admin import firestore
+
+        totals, day_totals = {}, {}
+        batch = self.db.batch()
+        for vote in votes:
+            totals[vote["contestantId"]] = totals.get(vote["contestantId"], 0) + vote["count"]
+            key = (vote.get("day"), vote.get("hour"), vote["contestantId"])
+            day_totals[key] = day_totals.get(key, 0) + vote["count"]
+
+            # timestamp is the commit time, like directly recorded votes, so the
+            # payout ledger's checkpoint never skips a late flush; votedAt keeps
+            # the time the vote was cast
+            doc = {field: value for field, value in vote.items() if field not in ("id", "timestamp")}
+            doc["timestamp"] = firestore.SERVER_TIMESTAMP
+            doc["votedAt"] = datetime.datetime.fromtimestamp(vote["timestamp"], datetime.timezone.utc)
+            batch.create(self.db.collection("votes").document(vote["id"]), doc)
+
+        for contestant_id, count in totals.items():
+            vote_counters.add_increment(batch, self.db, contestant_id, count)
+        for (day, hour, contestant_id), count in day_totals.items():
+            vote_stats.add_vote(batch, self.db, {"contestantId": contestant_id, "count": count, "day": day, "hour": hour})
+        batch.commit()
+
+    def _compact(self):
+        # Must be called with the lock held, right after a checkpoint
+        if self._pending or self._file.tell() < COMPACT_BYTES:
+            return
+        self._file.close()
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._write({"log": self._log_id})
+        # Keep the sequence so ids after a restart don't reuse flushed ones
+        self._write({"checkpoint": self._checkpoint, "seq": self._seq})
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        """Stop the flusher after a final flush attempt"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            # So a flush it's running can't mark the log open again after us
+            self._thread.join(MAX_RETRY_DELAY)
+        try:
+            started = time.time()
+            self.flush()
+            # Nothing left behind: this log no longer holds up a close
+            self._mark_drained(started, closed=True)
+        except Exception as e:
+            logging.error(f"Final vote flush failed; votes stay in {self.path}: {e}")
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._file.close()
+                self._file = None
+            if self._file_lock is not None:
+                self._file_lock.close()
+                self._file_lock = None
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "flushes": self.flushes,
+            "flushed_votes": self.flushed_votes,
+            "replayed_votes": self.replayed_votes,
+            "conflicts": self.conflicts,
+            "failures": self.failures,
+            "fsyncs": self.fsyncs,
+        }
+
+
+_lock = threading.Lock()
+_buffer = None
+
+
+def get_buffer(db):
+    """Return the process-wide buffer, opening (and replaying) the log on first use"""
+    global _buffer
+    if _buffer is None:
+        with _lock:
+            if _buffer is None:
+                _buffer = VoteBuffer(db).open()
+                atexit.register(_buffer.close)
+    return _buffer
+
+
+def record_vote(db, vote, contestants):
+    """
+    Buffered counterpart of vote_counters.record_vote: checks the contestant
+    against the cached list instead of reading it, logs and buffers the vote,
+    and returns the cached total plus this instance's unflushed votes.
+    """
+    contestant = next((c for c in contestants if str(c.get("id")) == vote["contestantId"]), None)
+    if contestant is None:
+        raise vote_counters.VoteValidationError("Contestant not found")
+    if contestant.get("eliminated"):
+        raise vote_counters.VoteValidationError("This contestant has been eliminated and can no longer receive votes")
+
+    buffer = get_buffer(db)
+    buffer.submit(vote)
+    return int(contestant.get("votes", 0)) + buffer.pending_votes(vote["contestantId"])
+
+
+def wait_until_drained(db, through, timeout=DRAIN_TIMEOUT, poll_interval=1.0):
+    """
+    Flush this process's buffer, then wait until every buffer's drain marker
+    shows its votes logged before `through` (epoch seconds) are in Firestore.
+    Returns the paths of the logs still behind after `timeout` seconds (an
+    empty list once everything is drained).
+    """
+    if _buffer is not None:
+        _buffer.drain()
+    deadline = time.monotonic() + timeout
+    while True:
+        behind = []
+        for snap in db.collection(MARKERS_COLLECTION).get():
+            marker = snap.to_dict() or {}
+            if not marker.get("closed") and marker.get("drainedThrough", 0) < through:
+                behind.append(marker.get("path") or snap.id)
+        if not behind or time.monotonic() >= deadline:
+            return behind
+        time.sleep(poll_interval)
+
+
+def stats():
+    return _buffer.stats() if _buffer is not None else None
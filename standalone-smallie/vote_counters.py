@@ -0,0 +1,163 @@
+"""
+Sharded vote counters for Smallie contestants
+
+Each contestant's votes are spread across VOTE_COUNTER_SHARDS documents in the
+contestants/{id}/vote_shards subcollection so that busy contestants don't hit
+Firestore's per-document write limit. A contestant's total is the legacy
+`votes` field on the contestant document plus the sum of its shards.
+"""
+
+import os
+import re
+import random
+import logging
+
+# firebase_admin is imported inside the write helpers so cold starts don't pay for it
+
+# Number of counter shards per contestant (write throughput scales with this)
+NUM_SHARDS = int(os.environ.get("VOTE_COUNTER_SHARDS", "10"))
+
+# Price of a single vote in USD
+VOTE_PRICE = 0.5
+
+# Upper bound on votes bought in a single request
+MAX_VOTES_PER_REQUEST = 1000
+
+SHARDS_COLLECTION = "vote_shards"
+
+# Idempotency keys double as vote document ids, so they must be valid ids
+IDEMPOTENCY_KEY_PATTERN = re.compile(r"^(?!__)[A-Za-z0-9_.:-]{1,128}$")
+
+
+class VoteValidationError(ValueError):
+    """Raised when a vote payload is missing or has invalid fields"""
+
+
+class DuplicateVoteError(Exception):
+    """Raised when a vote with the same idempotency key was already recorded"""
+
+
+def validate_vote(payload):
+    """Validate a vote payload from the client and return a normalised vote dict"""
+    if not isinstance(payload, dict):
+        raise VoteValidationError("Vote payload must be a JSON object")
+
+    contestant_id = str(payload.get("contestantId") or "").strip()
+    if not contestant_id or "/" in contestant_id:
+        raise VoteValidationError("A valid contestantId is required")
+
+    try:
+        count = int(payload.get("count", 1))
+    except (TypeError, ValueError):
+        raise VoteValidationError("count must be a whole number")
+    if count < 1 or count > MAX_VOTES_PER_REQUEST:
+        raise VoteValidationError(f"count must be between 1 and {MAX_VOTES_PER_REQUEST}")
+
+    user_id = payload.get("userId") or None
+    email = (payload.get("email") or "").strip() or None
+    if not user_id and not email:
+        raise VoteValidationError("Please log in or provide an email to vote")
+    if email and "@" not in email:
+        raise VoteValidationError("email is not valid")
+
+    try:
+        day = int(payload.get("day") or 0)
+    except (TypeError, ValueError):
+        raise VoteValidationError("day must be a whole number")
+
+    idempotency_key = payload.get("idempotencyKey") or None
+    if idempotency_key is not None:
+        idempotency_key = str(idempotency_key)
+        if not IDEMPOTENCY_KEY_PATTERN.match(idempotency_key):
+            raise VoteValidationError("idempotencyKey must be 1-128 letters, digits or _.:-")
+
+    return {
+        "contestantId": contestant_id,
+        "userId": user_id,
+        "email": email,
+        "count": count,
+        "day": day,
+        "amount": count * VOTE_PRICE,
+        "idempotencyKey": idempotency_key,
+    }
+
+
+def shard_ref(db, contestant_id, shard_index):
+    """Return the document reference for one counter shard"""
+    return (db.collection("contestants").document(contestant_id)
+            .collection(SHARDS_COLLECTION).document(str(shard_index)))
+
+
+def add_increment(batch, db, contestant_id, count):
+    """Queue an increment of `count` votes on a random shard in `batch`"""
+    from firebase_admin import firestore
+
+    shard_index = random.randrange(NUM_SHARDS)
+    batch.set(shard_ref(db, contestant_id, shard_index),
+              {"count": firestore.Increment(count)}, merge=True)
+
+
+def get_shard_total(db, contestant_id):
+    """Sum the vote counts held in a contestant's shards"""
+    shards = (db.collection("contestants").document(contestant_id)
+              .collection(SHARDS_COLLECTION).get())
+    return sum(int((shard.to_dict() or {}).get("count", 0)) for shard in shards)
+
+
+def group_shard_counts(shard_docs):
+    """Group shard snapshots into {contestant_id: {shard_id: count}}"""
+    counts = {}
+    for shard in shard_docs:
+        contestant_id = shard.reference.parent.parent.id
+        counts.setdefault(contestant_id, {})[shard.id] = int((shard.to_dict() or {}).get("count", 0))
+    return counts
+
+
+def get_vote(db, idempotency_key):
+    """Return the recorded vote for an idempotency key, or None"""
+    doc = db.collection("votes").document(idempotency_key).get()
+    return doc.to_dict() if doc.exists else None
+
+
+def record_vote(db, vote, extra_writes=(), contestant=None):
+    """
+    Record a validated vote: one shard increment plus the vote document,
+    committed together in a single batch. Each callable in `extra_writes` is
+    called as fn(batch, db, vote) to add its own writes to the same batch.
+    A vote with an idempotency key is stored at votes/{key} with create(),
+    so a replay fails the whole batch with DuplicateVoteError.
+
+    `contestant` is the contestant as the contestants cache has it (votes
+    including its shards); without it the contestant document is read.
+    Returns the contestant's approximate new total, that count plus this
+    vote, without reading the shards back.
+    """
+    from firebase_admin import firestore
+    from google.api_core.exceptions import Conflict
+
+    if contestant is None:
+        contestant_doc = db.collection("contestants").document(vote["contestantId"]).get()
+        if not contestant_doc.exists:
+            raise VoteValidationError("Contestant not found")
+        contestant = contestant_doc.to_dict() or {}
+
+    if contestant.get("eliminated"):
+        raise VoteValidationError("This contestant has been eliminated and can no longer receive votes")
+
+    batch = db.batch()
+    add_increment(batch, db, vote["contestantId"], vote["count"])
+    vote_doc = dict(vote, timestamp=firestore.SERVER_TIMESTAMP)
+    if vote.get("idempotencyKey"):
+        batch.create(db.collection("votes").document(vote["idempotencyKey"]), vote_doc)
+    else:
+        batch.set(db.collection("votes").document(), vote_doc)
+    for add_writes in extra_writes:
+        add_writes(batch, db, vote)
+    try:
+        batch.commit()
+    except Conflict:
+        raise DuplicateVoteError(f"Vote {vote['idempotencyKey']} was already recorded")
+
+    logging.info(f"Recorded {vote['count']} votes for contestant {vote['contestantId']}")
+
+    return int(contestant.get("votes", 0)) + vote["count"]
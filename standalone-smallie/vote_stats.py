@@ -0,0 +1,125 @@
+"""
+Incrementally maintained vote aggregates for Smallie
+
+Every recorded vote also bumps a running total, a per-day total, a
+per-contestant-per-day total and a per-hour (WAT) total. Like the contestant
+counters these live on VOTE_STATS_SHARDS small documents (stats_shards/{n})
+so a busy evening doesn't funnel every vote into one document. /api/stats merges the shards into a
+single summary, so the admin dashboard no longer downloads the votes
+collection. These are vote counts only; money (revenue, payouts, the prize
+pool) is computed by payouts.py.
+"""
+
+import os
+import time
+import random
+import logging
+import datetime
+import threading
+
+# firebase_admin is imported inside the write helpers so cold starts don't pay for it
+
+NUM_SHARDS = int(os.environ.get("VOTE_STATS_SHARDS", "10"))
+
+# Seconds a merged summary is reused before the shards are read again
+STATS_TTL = float(os.environ.get("VOTE_STATS_TTL", "5"))
+
+STATS_COLLECTION = "stats_shards"
+
+_lock = threading.Lock()
+_cached = None
+_cached_at = 0.0
+
+
+def add_vote(batch, db, vote):
+    """Queue the aggregate increments for a validated vote in `batch`"""
+    from firebase_admin import firestore
+
+    count = vote["count"]
+    day = str(vote.get("day") or 0)
+    day_update = {
+        "votes": firestore.Increment(count),
+        "contestants": {vote["contestantId"]: firestore.Increment(count)},
+    }
+    if vote.get("hour"):
+        day_update["hours"] = {vote["hour"]: firestore.Increment(count)}
+    shard = db.collection(STATS_COLLECTION).document(str(random.randrange(NUM_SHARDS)))
+    batch.set(shard, {
+        "total_votes": firestore.Increment(count),
+        "days": {day: day_update},
+    }, merge=True)
+
+
+def merge_shards(shard_docs):
+    """Merge stats shard snapshots into one {total_votes, days} dict"""
+    total = 0
+    days = {}
+    for shard in shard_docs:
+        data = shard.to_dict() or {}
+        total += int(data.get("total_votes", 0))
+        for day, day_data in (data.get("days") or {}).items():
+            merged = days.setdefault(day, {"votes": 0, "contestants": {}, "hours": {}})
+            merged["votes"] += int(day_data.get("votes", 0))
+            for contestant_id, votes in (day_data.get("contestants") or {}).items():
+                merged["contestants"][contestant_id] = merged["contestants"].get(contestant_id, 0) + int(votes)
+            for hour, votes in (day_data.get("hours") or {}).items():
+                merged["hours"][hour] = merged["hours"].get(hour, 0) + int(votes)
+    return {"total_votes": total, "days": days}
+
+
+def summarize(aggregates):
+    """Order merged aggregates by day, with each day's hours in order"""
+    days = {}
+    for day, day_data in sorted(aggregates["days"].items(), key=lambda item: int(item[0])):
+        days[day] = {
+            "votes": day_data["votes"],
+            "contestants": day_data["contestants"],
+            "hours": dict(sorted(day_data.get("hours", {}).items())),
+        }
+    return {"total_votes": aggregates["total_votes"], "days": days}
+
+
+def get_stats(db):
+    """Return the vote summary, re-reading the shards at most every STATS_TTL seconds"""
+    global _cached, _cached_at
+
+    with _lock:
+        if _cached is not None and time.monotonic() - _cached_at < STATS_TTL:
+            return _cached
+
+    summary = summarize(merge_shards(db.collection(STATS_COLLECTION).get()))
+    summary["updated_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    with _lock:
+        _cached = summary
+        _cached_at = time.monotonic()
+    return summary
+
+
+def rebuild(db):
+    """
+    One-off backfill: rebuild the aggregates from the votes collection.
+    Only needed for votes recorded before the aggregates existed; run it
+    while voting is paused since it replaces the shards wholesale.
+    """
+    aggregates = {"total_votes": 0, "days": {}}
+    for vote_doc in db.collection("votes").stream():
+        vote = vote_doc.to_dict() or {}
+        count = int(vote.get("count") or 1)
+        day = aggregates["days"].setdefault(str(vote.get("day") or 0), {"votes": 0, "contestants": {}, "hours": {}})
+        aggregates["total_votes"] += count
+        day["votes"] += count
+        contestant_id = str(vote.get("contestantId") or "")
+        if contestant_id:
+            day["contestants"][contestant_id] = day["contestants"].get(contestant_id, 0) + count
+        if vote.get("hour"):
+            day["hours"][vote["hour"]] = day["hours"].get(vote["hour"], 0) + count
+
+    batch = db.batch()
+    for shard in db.collection(STATS_COLLECTION).list_documents():
+        batch.delete(shard)
+    batch.set(db.collection(STATS_COLLECTION).document("0"), aggregates)
+    batch.commit()
+
+    logging.info(f"Rebuilt vote stats from {aggregates['total_votes']} votes")
+    return summarize(aggregates)
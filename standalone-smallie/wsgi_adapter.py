@@ -0,0 +1,202 @@
+"""
+WSGI adapter for the Vercel serverless handler
+
+Turns a Vercel request object into a complete WSGI environ, runs the Flask
+app and converts the result into the response dict Vercel expects. The body
+is collected with a single join (or handed over as an iterator when
+streaming), text responses are decoded once, and binary or pre-compressed
+responses are passed through base64 instead of being forced through UTF-8.
+"""
+
+import io
+import sys
+import base64
+from urllib.parse import unquote_to_bytes
+
+from rate_limit import forwarded_client
+
+# Content types that can be returned as plain (non-base64) text
+TEXT_CONTENT_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/xhtml+xml",
+    "image/svg+xml",
+)
+
+# Request headers that WSGI carries without the HTTP_ prefix
+_UNPREFIXED_HEADERS = {"CONTENT_TYPE", "CONTENT_LENGTH"}
+
+
+def _as_bytes(value):
+    if value is None:
+        return b""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return value
+    return str(value).encode("utf-8")
+
+
+def _as_str(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("latin-1")
+    return value or ""
+
+
+def build_environ(request):
+    """Build a full PEP 3333 environ from a Vercel request object"""
+    url = getattr(request, "url", "") or ""
+    scheme = url.split("://", 1)[0] if "://" in url else "https"
+    headers = getattr(request, "headers", None) or {}
+
+    host = headers.get("x-forwarded-host") or headers.get("host") or "localhost"
+    if ":" in host:
+        server_name, server_port = host.rsplit(":", 1)
+    else:
+        server_name, server_port = host, "443" if scheme == "https" else "80"
+
+    # WSGI wants PATH_INFO as latin-1 decoded raw bytes
+    path = _as_str(getattr(request, "path", "/")) or "/"
+    path_info = unquote_to_bytes(path).decode("latin-1") if "%" in path else path
+
+    body = getattr(request, "body", None)
+    if hasattr(body, "read"):
+        # Already a stream; hand it over untouched
+        wsgi_input = body
+        content_length = headers.get("content-length", "")
+    else:
+        body = _as_bytes(body)
+        wsgi_input = io.BytesIO(body)
+        content_length = str(len(body)) if body else headers.get("content-length", "")
+
+    environ = {
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": headers.get("x-forwarded-proto", scheme),
+        "wsgi.input": wsgi_input,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "REQUEST_METHOD": _as_str(getattr(request, "method", "GET")).upper(),
+        "SCRIPT_NAME": "",
+        "PATH_INFO": path_info,
+        "QUERY_STRING": _as_str(getattr(request, "query_string", "")),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": server_port,
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        # Picked the same way as the rate limiter's client_ip(), never the
+        # leftmost hop, which the client writes
+        "REMOTE_ADDR": forwarded_client(headers.get("x-forwarded-for"), "127.0.0.1"),
+        "CONTENT_TYPE": headers.get("content-type", ""),
+        "CONTENT_LENGTH": content_length,
+    }
+
+    for key, value in headers.items():
+        name = key.upper().replace("-", "_")
+        if name in _UNPREFIXED_HEADERS:
+            continue
+        name = f"HTTP_{name}"
+        # Repeated headers are comma-joined, as WSGI servers do
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+
+    return environ
+
+
+def is_text_response(headers):
+    """True if the response can be sent as a UTF-8 string instead of base64"""
+    content_type = ""
+    for name, value in headers:
+        lowered = name.lower()
+        if lowered == "content-encoding" and value.lower() != "identity":
+            return False
+        if lowered == "content-type":
+            content_type = value.lower()
+    return content_type.startswith(TEXT_CONTENT_TYPES)
+
+
+def run_app(app, environ):
+    """Call the WSGI app; returns (response status/headers dict, write() buffer, iterable)"""
+    response = {}
+    written = []
+
+    def start_response(status, response_headers, exc_info=None):
+        if exc_info and response:
+            raise exc_info[1].with_traceback(exc_info[2])
+        response["status"] = status
+        response["headers"] = response_headers
+        # Legacy write() callable required by PEP 3333
+        return written.append
+
+    body_iter = app(environ, start_response)
+    return response, written, body_iter
+
+
+def _iterate(written, body_iter):
+    try:
+        for chunk in written:
+            yield chunk
+        for chunk in body_iter:
+            if chunk:
+                yield chunk
+    finally:
+        close = getattr(body_iter, "close", None)
+        if close is not None:
+            close()
+
+
+def to_vercel_response(status, headers, body):
+    """Build the response dict from a fully collected body"""
+    multi_headers = {}
+    for name, value in headers:
+        multi_headers.setdefault(name, []).append(value)
+
+    response = {
+        "statusCode": int(status.split(" ", 1)[0]),
+        "headers": {name: values[-1] for name, values in multi_headers.items()},
+        "multiValueHeaders": multi_headers,
+    }
+    if is_text_response(headers):
+        response["body"] = body.decode("utf-8", errors="replace") if body else ""
+        response["isBase64Encoded"] = False
+    else:
+        response["body"] = base64.b64encode(body).decode("ascii") if body else ""
+        response["isBase64Encoded"] = True
+    return response
+
+
+def handle(app, request, stream=False):
+    """
+    Run `app` for a Vercel `request`. With stream=True the body is returned
+    as an iterator of bytes (for runtimes that accept streamed bodies);
+    otherwise it is joined once and encoded for the JSON response.
+    """
+    response, written, body_iter = run_app(app, build_environ(request))
+
+    if stream:
+        # Pull the first chunk so start_response has definitely been called
+        chunks = _iterate(written, body_iter)
+        first = next(chunks, b"")
+        headers = response["headers"]
+        return {
+            "statusCode": int(response["status"].split(" ", 1)[0]),
+            "headers": dict(headers),
+            "body": _prepend(first, chunks),
+            "isBase64Encoded": False,
+        }
+
+    # Collect into one list and join once (no quadratic concatenation)
+    chunks = written
+    try:
+        chunks.extend(body_iter)
+    finally:
+        close = getattr(body_iter, "close", None)
+        if close is not None:
+            close()
+    body = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    return to_vercel_response(response["status"], response["headers"], body)
+
+
+def _prepend(first, rest):
+    if first:
+        yield first
+    yield from rest